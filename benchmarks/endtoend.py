@@ -0,0 +1,93 @@
+"""Runs split, push, delete_orphans and the balance check end to end against a local YNAB stand-in with synthetic
+budgets. Reports requests issued, wall time and peak memory of each operation.
+
+The stand-in runs in a child process, so that its allocations don't count towards the measured peak memory. As it is
+imported from the tests package, the benchmark needs to be run as module from the root of the repository.
+
+    $ python -m benchmarks.endtoend [number of transactions ...] [--latency seconds] [--throttle-every n]
+"""
+import argparse
+import multiprocessing
+import time
+import tracemalloc
+from datetime import date, timedelta
+from multiprocessing.connection import Connection
+from typing import Callable, Dict, List
+
+from tests.ynabstandin import YnabStandIn, populate, redirect
+from ynabsplitbudget import YnabSplitBudget, User
+from ynabsplitbudget.accountcache import AccountCache
+from ynabsplitbudget.models.exception import BalancesDontMatch
+
+SIZES = (1_000, 10_000, 100_000)
+
+
+def raise_on_balances_off(ysb: YnabSplitBudget) -> None:
+	try:
+		ysb.raise_on_balances_off()
+	except BalancesDontMatch:
+		pass
+
+
+OPERATIONS: Dict[str, Callable[[YnabSplitBudget], object]] = {
+	'split': lambda ysb: ysb.split(),
+	'push': lambda ysb: ysb.push(include_uncleared=True),
+	'delete_orphans': lambda ysb: ysb.delete_orphans(),
+	'raise_on_balances_off': raise_on_balances_off}
+
+
+def serve(conn: Connection, n: int, latency: float, throttle_every: int) -> None:
+	"""Runs stand-in with synthetic budgets and answers with the number of requests it received until stopped"""
+	with YnabStandIn(latency=latency, throttle_every=throttle_every, rate_limit=10 ** 9) as ynab:
+		populate(ynab, n)
+		conn.send(ynab.base_url)
+		while conn.recv() != 'stop':
+			conn.send(len(ynab.requests))
+
+
+def run(n: int, latency: float, throttle_every: int) -> List[dict]:
+	conn, child_conn = multiprocessing.Pipe()
+	server = multiprocessing.Process(target=serve, args=(child_conn, n, latency, throttle_every), daemon=True)
+	server.start()
+	base_url = conn.recv()
+
+	def requests() -> int:
+		conn.send('count')
+		return conn.recv()
+
+	# fresh tokens, so that rate limits and sessions of other sizes aren't reused
+	user = User(name='user', token=f'token-{n}-u', budget_id='budget_u', account_id='account_u', flag_color='purple')
+	partner = User(name='partner', token=f'token-{n}-p', budget_id='budget_p', account_id='account_p',
+				   flag_color='purple')
+	results = []
+	with redirect(base_url):
+		ysb = YnabSplitBudget(user=user, partner=partner, since=date.today() - timedelta(days=30))
+		ysb.accounts = AccountCache()
+		tracemalloc.start()
+		for name, operation in OPERATIONS.items():
+			before = requests()
+			tracemalloc.reset_peak()
+			start = time.perf_counter()
+			operation(ysb)
+			duration = time.perf_counter() - start
+			_, peak = tracemalloc.get_traced_memory()
+			results.append({'transactions': n, 'operation': name, 'requests': requests() - before,
+							'seconds': duration, 'peak_mib': peak / 2 ** 20})
+		tracemalloc.stop()
+	conn.send('stop')
+	server.join()
+	return results
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('sizes', nargs='*', type=int, default=SIZES, help='numbers of transactions per budget')
+	parser.add_argument('--latency', type=float, default=0, help='seconds each response of the stand-in is delayed')
+	parser.add_argument('--throttle-every', type=int, default=0, help='answer every nth request with 429')
+	args = parser.parse_args()
+
+	print(f"{'transactions':>12} {'operation':<22} {'requests':>8} {'seconds':>8} {'peak MiB':>9}")
+	for size in args.sizes:
+		for r in run(size, latency=args.latency, throttle_every=args.throttle_every):
+			print(f"{r['transactions']:>12} {r['operation']:<22} {r['requests']:>8} {r['seconds']:>8.2f} "
+				  f"{r['peak_mib']:>9.1f}")
@@ -0,0 +1,54 @@
+"""Measures memory held by transaction models built from YNAB transaction dicts.
+
+Compares the slotted models with interned strings against equivalent models with a per-instance __dict__.
+
+    $ python -m benchmarks.memory [number of transactions]
+"""
+import sys
+import tracemalloc
+from dataclasses import make_dataclass, fields
+from datetime import datetime
+
+from ynabsplitbudget.models.transaction import RootTransaction
+from ynabsplitbudget.transactionbuilder import TransactionBuilder
+
+PlainRootTransaction = make_dataclass('PlainRootTransaction', [(f.name, f.type) for f in fields(RootTransaction)])
+
+
+def transaction_dicts(n: int) -> list:
+	# strings are built at runtime like the ones parsed from JSON responses, so they are distinct objects
+	return [{'id': f'transaction-{i:08d}', 'date': f'2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}', 'memo': f'memo {i}',
+			 'payee_name': ''.join(['payee ', str(i % 50)]), 'amount': -1000 * (i % 300),
+			 'account_id': ''.join(['account-', str(i % 3)])} for i in range(n)]
+
+
+def build_plain(t_dicts: list) -> list:
+	return [PlainRootTransaction(id=t['id'], share_id=t['id'][-10:] * 2,
+								 transaction_date=datetime.strptime(t['date'], '%Y-%m-%d').date(), memo=t['memo'],
+								 payee_name=t['payee_name'], amount=float(t['amount']), account_id=t['account_id'])
+			for t in t_dicts]
+
+
+def build_compact(t_dicts: list) -> list:
+	return [TransactionBuilder.build_root(t) for t in t_dicts]
+
+
+def measure(build, n: int) -> int:
+	t_dicts = transaction_dicts(n)
+	tracemalloc.start()
+	transactions = build(t_dicts)
+	del t_dicts
+	current, _ = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	del transactions
+	return current
+
+
+if __name__ == '__main__':
+	n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+	plain = measure(build_plain, n)
+	compact = measure(build_compact, n)
+	print(f'{n} transactions')
+	print(f'dict models:    {plain / 2 ** 20:7.1f} MiB ({plain / n:.0f} bytes per transaction)')
+	print(f'slotted models: {compact / 2 ** 20:7.1f} MiB ({compact / n:.0f} bytes per transaction)')
+	print(f'saved:          {1 - compact / plain:7.1%}')
@@ -1,5 +1,31 @@
 import pytest
 
+from ynabsplitbudget import User
+from ynabsplitbudget.accountcache import AccountCache
+from ynabsplitbudget.scheduler import RateLimit
+from ynabsplitbudget.sessions import SessionRegistry
+
+
+@pytest.fixture(autouse=True)
+def reset_registries():
+	"""Resets the process-wide sessions, rate limits and account cache after each test"""
+	yield
+	SessionRegistry.close()
+	with RateLimit._registry_lock:
+		RateLimit._registry.clear()
+	with AccountCache._shared_lock:
+		AccountCache._shared = None
+
+
+@pytest.fixture
+def user():
+	return User(name='user', token='token_u', budget_id='budget_u', account_id='account_u', flag_color='purple')
+
+
+@pytest.fixture
+def partner():
+	return User(name='partner', token='token_p', budget_id='budget_p', account_id='account_p', flag_color='purple')
+
 
 @pytest.fixture
 def mock_transaction_dict():
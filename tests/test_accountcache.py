@@ -0,0 +1,55 @@
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from ynabsplitbudget.accountcache import AccountCache
+from ynabsplitbudget.models.account import Account
+from ynabsplitbudget.transactionstore import TransactionStore
+
+
+@pytest.fixture
+def mock_account():
+	return Account(budget_id='budget_u', budget_name='budget', account_id='account_u', account_name='account',
+				   transfer_payee_id='transfer_payee_id', currency='EUR')
+
+
+@patch('ynabsplitbudget.accountcache.Client')
+def test_fetch_cached_within_ttl(mock_client, user, mock_account):
+	# Arrange
+	mock_client.return_value.fetch_single_account.return_value = mock_account
+	now = MagicMock(return_value=1000)
+	cache = AccountCache(ttl=60, clock=now)
+	# Act
+	cache.fetch(user)
+	a = cache.fetch(user)
+	now.return_value = 1060
+	cache.fetch(user)
+	# Assert
+	assert a == mock_account
+	assert mock_client.return_value.fetch_single_account.call_count == 2
+
+
+@patch('ynabsplitbudget.accountcache.Client')
+def test_fetch_invalidated(mock_client, user, mock_account):
+	# Arrange
+	mock_client.return_value.fetch_single_account.return_value = mock_account
+	cache = AccountCache()
+	cache.fetch(user)
+	# Act
+	cache.invalidate(budget_id='budget_u')
+	cache.fetch(user)
+	# Assert
+	assert mock_client.return_value.fetch_single_account.call_count == 2
+
+
+@patch('ynabsplitbudget.accountcache.Client')
+def test_fetch_persisted(mock_client, user, mock_account):
+	# Arrange
+	mock_client.return_value.fetch_single_account.return_value = mock_account
+	store = TransactionStore()
+	AccountCache(store=store).fetch(user)
+	# Act
+	a = AccountCache(store=store).fetch(user)
+	# Assert
+	assert a == mock_account
+	mock_client.return_value.fetch_single_account.assert_called_once()
@@ -163,3 +163,23 @@ def test_clear_adjust_wo_category(mock_categories):
 	# Assert
 	assert mt.cleared == 'cleared'
 	assert mt.category == mock_category
+
+
+def test_split_build_roots():
+	# Arrange
+	sa = SplitAdjuster(credentials=MagicMock(), flag_color='red', transfer_payee_id='transfer_payee_id',
+					   account_id='account_id', since=date(2024, 1, 1))
+	transfer = MagicMock(payee=MagicMock(id='transfer_payee_id'), transfer_transaction_id='root_id', amount=-500,
+						 memo='payee | @5')
+	rest = MagicMock(payee=MagicMock(id='payee_id'), transfer_transaction_id=None, amount=-500)
+	t = MagicMock(transaction_date=date(2024, 1, 2), payee=MagicMock(), subtransactions=(transfer, rest))
+	t.payee.name = 'payee'
+	# Act
+	r = sa.build_roots([t])
+	# Assert
+	assert len(r) == 1
+	assert r[0].id == 'root_id'
+	assert r[0].amount == 500
+	assert r[0].payee_name == 'payee'
+	assert r[0].account_id == 'account_id'
+	assert r[0].transaction_date == date(2024, 1, 2)
@@ -0,0 +1,93 @@
+import asyncio
+from datetime import date
+from unittest.mock import MagicMock, AsyncMock, ANY
+
+import pytest
+from httpx import Response, Request
+
+from ynabsplitbudget.asyncclient import AsyncClient, SchedulingTransport
+from ynabsplitbudget.models.transaction import RootTransaction, ComplementTransaction
+from ynabsplitbudget.scheduler import RateLimit
+
+
+@pytest.fixture
+def mock_client():
+    client = AsyncClient(token='', user_name='', budget_id='', account_id='account_id')
+    client.session = AsyncMock()
+    return client
+
+
+def mock_response(data: dict) -> MagicMock:
+    mock_resp_obj = MagicMock(spec=Response)
+    mock_resp_obj.json.return_value = data
+    return mock_resp_obj
+
+
+def test_fetch_roots(mock_client, mock_transaction_dict):
+    # Arrange
+    mock_client.session.get.return_value = mock_response({'data': {'transactions': [mock_transaction_dict],
+                                                                   'server_knowledge': 100}})
+    # Act
+    r = asyncio.run(mock_client.fetch_roots(since=date(2024, 1, 1), include_uncleared=False))
+
+    # Assert
+    mock_client.session.get.assert_called_once_with(ANY, params={'since_date': '2024-01-01'})
+    assert len(r) == 1
+    assert isinstance(r[0], RootTransaction)
+    assert r[0].share_id == '6f66e5aa449e868261ce'
+
+
+def test_fetch_balance(mock_client):
+    # Arrange
+    mock_client.session.get.return_value = mock_response({'data': {'account': {'balance': 100}}})
+    # Act
+    b = asyncio.run(mock_client.fetch_balance())
+
+    # Assert
+    assert b == 100
+
+
+def test_insert_complement_iteration(mock_client, mock_transaction_dict):
+    # Arrange
+    mock_root = RootTransaction(id='id', share_id='share_id', account_id='account_id_o',
+                                transaction_date=date(2024, 1, 1), memo='memo', payee_name='payee_name', amount=1000)
+    mock_transaction_dict['import_id'] = 's||share_id||2'
+    mock_client.session.post.side_effect = [mock_response({'data': {'transactions': [],
+                                                                    'duplicate_import_ids': ['s||share_id||1']}}),
+                                            mock_response({'data': {'transactions': [mock_transaction_dict],
+                                                                    'duplicate_import_ids': []}})]
+    # Act
+    c = asyncio.run(mock_client.insert_complements([mock_root]))
+
+    # Assert
+    assert mock_client.session.post.call_count == 2
+    post_dict = mock_client.session.post.call_args_list[1][1]['json']['transactions'][0]
+    assert post_dict['import_id'] == 's||share_id||2'
+    assert isinstance(c[0], ComplementTransaction)
+
+
+def test_scheduling_transport_retries_throttled():
+    # Arrange
+    transport = AsyncMock()
+    transport.handle_async_request.side_effect = [Response(429, headers={'Retry-After': '0'}),
+                                                  Response(200, headers={'X-Rate-Limit': '10/200'})]
+    rate_limit = RateLimit()
+    st = SchedulingTransport(rate_limit=rate_limit, transport=transport)
+    # Act
+    r = asyncio.run(st.handle_async_request(Request('GET', 'https://api.ynab.com/v1/budgets')))
+    # Assert
+    assert r.status_code == 200
+    assert transport.handle_async_request.call_count == 2
+    assert rate_limit.remaining == 190
+
+
+def test_scheduling_transport_doesnt_retry_failed_post():
+    # Arrange
+    transport = AsyncMock()
+    transport.handle_async_request.side_effect = [Response(502), Response(201)]
+    st = SchedulingTransport(rate_limit=RateLimit(), transport=transport)
+    # Act
+    r = asyncio.run(st.handle_async_request(Request('POST', 'https://api.ynab.com/v1/budgets/budget_id/transactions')))
+    # Assert
+    assert r.status_code == 502
+    assert transport.handle_async_request.call_count == 1
@@ -0,0 +1,53 @@
+from datetime import date
+
+from ynabsplitbudget.balanceledger import BalanceLedger, find_drift
+from ynabsplitbudget.transactionbuilder import TransactionBuilder
+
+
+def test_ledger_add_remove(mock_transaction_dict):
+	# Arrange
+	t_late = dict(mock_transaction_dict, id='late', date='2024-01-03', amount=-2000)
+	t_early = dict(mock_transaction_dict, id='early', date='2023-12-30')
+	ledger = BalanceLedger.from_transactions([mock_transaction_dict, t_late])
+	# Act
+	ledger.add(t_early)
+	ledger.remove(mock_transaction_dict)
+	ledger.remove(dict(mock_transaction_dict, id='unknown'))
+	# Assert
+	assert ledger.dates == ['2023-12-30', '2024-01-03']
+	assert ledger.sums == {'2023-12-30': 1000, '2024-01-03': -2000}
+	assert ledger.total == -1000
+	assert ledger.transactions_on('2024-01-03') == [t_late]
+
+
+def test_find_drift(mock_transaction_dict):
+	# Arrange
+	root = dict(mock_transaction_dict, id='root', account_id='user_account', date='2024-01-02')
+	share_id = TransactionBuilder.share_id('root')
+	complement = dict(root, id='complement', account_id='partner_account', amount=-1000,
+					  import_id=f's||{share_id}||0')
+	balanced = dict(root, id='balanced', date='2024-01-05')
+	balanced_complement = dict(complement, id='balanced_complement', date='2024-01-05',
+							   import_id=f"s||{TransactionBuilder.share_id('balanced')}||0")
+	off = dict(root, id='off', date='2024-01-05', amount=500)
+	user_ledger = BalanceLedger.from_transactions([root, balanced, off])
+	partner_ledger = BalanceLedger.from_transactions([complement, balanced_complement])
+	# Act
+	drift = find_drift(user_ledger, partner_ledger, user_account_id='user_account',
+					   partner_account_id='partner_account')
+	# Assert
+	assert drift.transaction_date == date(2024, 1, 5)
+	assert drift.difference == 500
+	assert [t.id for t in drift.user_transactions] == ['off']
+	assert drift.partner_transactions == []
+
+
+def test_find_drift_balanced(mock_transaction_dict):
+	# Arrange
+	user_ledger = BalanceLedger.from_transactions([mock_transaction_dict])
+	partner_ledger = BalanceLedger.from_transactions([dict(mock_transaction_dict, id='partner', amount=-1000)])
+	# Act
+	drift = find_drift(user_ledger, partner_ledger, user_account_id='sample_account',
+					   partner_account_id='sample_account')
+	# Assert
+	assert drift is None
@@ -1,3 +1,5 @@
+import json
+from io import BytesIO
 from datetime import date, datetime
 from unittest.mock import MagicMock, ANY
 
@@ -12,7 +14,7 @@ from ynabsplitbudget.models.transaction import RootTransaction, LookupTransactio
 
 @pytest.fixture
 def mock_client():
-    client = Client(token='', user_name='', budget_id='', account_id='account_id')
+    client = Client(token='', user_name='', budget_id='', account_id='account_id', stream=False)
     client.session = MagicMock()
     return client
 
@@ -51,6 +53,21 @@ def test_fetch_account_passes(mock_client, mock_budget):
     assert a.transfer_payee_id == 'sample_transfer_payee_id'
 
 
+def test_fetch_single_account(mock_client, mock_budget):
+    # Arrange
+    budget = {k: v for k, v in mock_budget.items() if k != 'accounts'}
+    mock_client.session.get.side_effect = [mock_response({'data': {'budgets': [budget]}}),
+                                           mock_response({'data': {'account': mock_budget['accounts'][0]}})]
+
+    # Act
+    a = mock_client.fetch_single_account(budget_id='sample_budget_id', account_id='sample_account_id')
+
+    # Assert
+    assert a.transfer_payee_id == 'sample_transfer_payee_id'
+    assert a.currency == 'sample_iso_code'
+    assert mock_client.session.get.call_args[0][0].endswith('budgets/sample_budget_id/accounts/sample_account_id')
+
+
 def test_fetch_new_cleared_only(mock_client, mock_transaction_dict):
     # Arrange
     mock_transaction_uncleared = mock_transaction_dict.copy()
@@ -185,3 +202,281 @@ def test_insert_complement_iteration(mock_client, mock_transaction_dict):
                                                                               'import_id': 's||share_id||2'}]))
     post_dict = mock_client.session.post.call_args_list[1][1]['json']['transactions'][0]
     assert post_dict['import_id'] == f's||{mock_root.share_id}||2'
+
+
+def test_fetch_roots_delta(mock_client, mock_transaction_dict):
+    # Arrange
+    mock_transaction_changed = mock_transaction_dict.copy()
+    mock_transaction_changed['memo'] = 'changed_memo'
+    mock_client.session.get.side_effect = [mock_response({'data': {'transactions': [mock_transaction_dict],
+                                                                    'server_knowledge': 100}}),
+                                           mock_response({'data': {'transactions': [mock_transaction_changed],
+                                                                    'server_knowledge': 101}})]
+    # Act
+    mock_client.fetch_roots(since=date(2024, 1, 1), include_uncleared=False)
+    mock_client.expire()
+    r = mock_client.fetch_roots(since=date(2024, 1, 1), include_uncleared=False)
+
+    # Assert
+    mock_client.session.get.assert_called_with(ANY, params={'since_date': '2024-01-01',
+                                                            'last_knowledge_of_server': 100})
+    assert len(r) == 1
+    assert r[0].memo == 'changed_memo'
+
+
+def test_fetch_roots_delta_deleted(mock_client, mock_transaction_dict):
+    # Arrange
+    mock_transaction_deleted = mock_transaction_dict.copy()
+    mock_transaction_deleted['deleted'] = True
+    mock_client.session.get.side_effect = [mock_response({'data': {'transactions': [mock_transaction_dict],
+                                                                    'server_knowledge': 100}}),
+                                           mock_response({'data': {'transactions': [mock_transaction_deleted],
+                                                                    'server_knowledge': 101}})]
+    # Act
+    mock_client.fetch_roots(since=date(2024, 1, 1), include_uncleared=False)
+    mock_client.expire()
+    r = mock_client.fetch_roots(since=date(2024, 1, 1), include_uncleared=False)
+
+    # Assert
+    assert len(r) == 0
+
+
+def test_fetch_roots_delta_clears_changes_without_store(mock_client, mock_transaction_dict):
+    # Arrange
+    mock_root = dict(mock_transaction_dict, account_id='account_id')
+    mock_client.session.get.side_effect = [mock_response({'data': {'transactions': [mock_root],
+                                                                    'server_knowledge': 100}}),
+                                           mock_response({'data': {'transactions': [dict(mock_root, deleted=True)],
+                                                                    'server_knowledge': 101}})]
+    # Act
+    mock_client.fetch_roots(since=date(2024, 1, 1), include_uncleared=False)
+    mock_client.expire()
+    mock_client.fetch_roots(since=date(2024, 1, 1), include_uncleared=False)
+
+    # Assert
+    snapshot = mock_client._snapshots['account_id']
+    assert snapshot.changed_ids == snapshot.deleted_ids == snapshot.changed_iterations == set()
+    assert snapshot.tombstones == {}
+
+
+def test_fetch_roots_delta_earlier_since(mock_client, mock_transaction_dict):
+    # Arrange
+    mock_client.session.get.return_value = mock_response({'data': {'transactions': [mock_transaction_dict],
+                                                                   'server_knowledge': 100}})
+    # Act
+    mock_client.fetch_roots(since=date(2024, 1, 1), include_uncleared=False)
+    mock_client.fetch_roots(since=date(2023, 1, 1), include_uncleared=False)
+
+    # Assert
+    mock_client.session.get.assert_called_with(ANY, params={'since_date': '2023-01-01'})
+
+
+def test_fetch_roots_once(mock_client, mock_transaction_dict):
+    # Arrange
+    mock_client.session.get.return_value = mock_response({'data': {'transactions': [mock_transaction_dict],
+                                                                   'server_knowledge': 100}})
+    # Act
+    mock_client.fetch_roots(since=date(2024, 1, 1), include_uncleared=False)
+    r = mock_client.fetch_roots(since=date(2024, 2, 1), include_uncleared=False)
+
+    # Assert
+    mock_client.session.get.assert_called_once()
+    assert len(r) == 0
+
+
+def test_insert_complement_merged_into_snapshot(mock_client, mock_transaction_dict):
+    # Arrange
+    mock_complement_dict = dict(mock_transaction_dict, id='complement_id', import_id='s||share_id||0')
+    mock_client.session.get.return_value = mock_response({'data': {'transactions': [mock_transaction_dict],
+                                                                   'server_knowledge': 100}})
+    mock_client.session.post.return_value = mock_response({'data': {'transactions': [mock_complement_dict],
+                                                                    'duplicate_import_ids': []}})
+    mock_root = RootTransaction(id='id', share_id='share_id', account_id='account_id_o',
+                                transaction_date=date(2024, 1, 1), memo='memo', payee_name='payee_name', amount=1000)
+    # Act
+    mock_client.fetch_lookup(since=date(2024, 1, 1))
+    mock_client.insert_complements([mock_root])
+    mock_client.delete_complement('sample_id')
+    r = mock_client.fetch_lookup(since=date(2024, 1, 1))
+
+    # Assert
+    mock_client.session.get.assert_called_once()
+    assert len(r) == 1
+    assert isinstance(r[0], ComplementTransaction)
+
+
+def test_delete_complements_partial_failure(mock_client):
+    # Arrange
+    failing_response = mock_response({})
+    failing_response.raise_for_status.side_effect = HTTPError('404')
+    mock_client.session.delete.side_effect = lambda url: failing_response if url.endswith('id2') else mock_response({})
+
+    # Act
+    r = mock_client.delete_complements(['id1', 'id2', 'id3'])
+
+    # Assert
+    assert mock_client.session.delete.call_count == 3
+    assert r['id1'] is None
+    assert isinstance(r['id2'], HTTPError)
+    assert r['id3'] is None
+
+
+def test_insert_chunks_partial_failure(mock_client, mock_transaction_dict):
+    # Arrange
+    mock_roots = [RootTransaction(id=f'id{i}', share_id=f'share_id{i}', account_id='account_id_o',
+                                  transaction_date=date(2024, 1, 1), memo='memo', payee_name='payee_name', amount=1000)
+                  for i in range(3)]
+    failing_response = mock_response({})
+    failing_response.raise_for_status.side_effect = HTTPError('500')
+
+    def post(url, json):
+        if json['transactions'][0]['import_id'] == 's||share_id2||0':
+            return failing_response
+        return mock_response({'data': {'transactions': [dict(mock_transaction_dict, import_id=t['import_id'])
+                                                        for t in json['transactions']],
+                                       'duplicate_import_ids': []}})
+    mock_client.session.post.side_effect = post
+
+    # Act
+    r = mock_client.insert_chunks(mock_roots, chunk_size=2)
+
+    # Assert
+    assert mock_client.session.post.call_count == 2
+    assert [len(c.transactions) for c in r] == [2, 1]
+    assert len(r[0].complements) == 2 and r[0].error is None
+    assert r[1].complements == [] and isinstance(r[1].error, HTTPError)
+    with pytest.raises(HTTPError):
+        mock_client.insert_complements(mock_roots, chunk_size=2)
+
+
+def test_insert_complement_known_iteration(mock_client, mock_transaction_dict):
+    # Arrange
+    mock_complement_dict = dict(mock_transaction_dict, id='complement_id', import_id='s||share_id||3')
+    mock_client.session.get.return_value = mock_response({'data': {'transactions': [mock_complement_dict],
+                                                                   'server_knowledge': 100}})
+    mock_client.session.post.return_value = mock_response({'data': {'transactions': [],
+                                                                    'duplicate_import_ids': []}})
+    mock_root = RootTransaction(id='id', share_id='share_id', account_id='account_id_o',
+                                transaction_date=date(2024, 1, 1), memo='memo', payee_name='payee_name', amount=1000)
+    # Act
+    mock_client.fetch_lookup(since=date(2024, 1, 1))
+    mock_client.insert_complements([mock_root])
+
+    # Assert
+    post_dict = mock_client.session.post.call_args[1]['json']['transactions'][0]
+    assert post_dict['import_id'] == 's||share_id||4'
+
+
+def test_insert_complement_remembers_duplicates(mock_client, mock_transaction_dict):
+    # Arrange
+    mock_root = RootTransaction(id='id', share_id='share_id', account_id='account_id_o',
+                                transaction_date=date(2024, 1, 1), memo='memo', payee_name='payee_name', amount=1000)
+    mock_client.session.post.side_effect = [
+        mock_response({'data': {'transactions': [], 'duplicate_import_ids': ['s||share_id||0']}}),
+        mock_response({'data': {'transactions': [dict(mock_transaction_dict, import_id='s||share_id||1')],
+                                'duplicate_import_ids': []}}),
+        mock_response({'data': {'transactions': [], 'duplicate_import_ids': []}})]
+
+    # Act
+    mock_client.insert_complements([mock_root])
+    mock_client.insert_complements([mock_root])
+
+    # Assert
+    assert mock_client.session.post.call_count == 3
+    post_dict = mock_client.session.post.call_args[1]['json']['transactions'][0]
+    assert post_dict['import_id'] == 's||share_id||2'
+
+
+def test_fetch_changes(mock_client, mock_transaction_dict):
+    # Arrange
+    mock_transaction_changed = dict(mock_transaction_dict, id='changed_id')
+    mock_client.session.get.side_effect = [
+        mock_response({'data': {'transactions': [mock_transaction_dict], 'server_knowledge': 100}}),
+        mock_response({'data': {'transactions': [mock_transaction_changed], 'server_knowledge': 101}})]
+
+    # Act
+    mock_client.fetch_changes(since=date(2024, 1, 1))
+    r = mock_client.fetch_changes(since=date(2024, 1, 1))
+    lookup = mock_client.fetch_lookup(since=date(2024, 1, 1))
+
+    # Assert
+    assert r == [mock_transaction_changed]
+    assert len(lookup) == 2
+    assert mock_client.session.get.call_count == 2
+    mock_client.session.get.assert_called_with(ANY, params={'since_date': '2024-01-01',
+                                                            'last_knowledge_of_server': 100})
+
+
+def test_fetch_roots_streamed(mock_client, mock_transaction_dict):
+    # Arrange
+    mock_client.stream = True
+    r = Response()
+    r.status_code = 200
+    r.raw = BytesIO(json.dumps({'data': {'transactions': [mock_transaction_dict],
+                                         'server_knowledge': 100}}).encode())
+    mock_client.session.get.return_value = r
+
+    # Act
+    roots = mock_client.fetch_roots(since=date(2024, 1, 1), include_uncleared=False)
+
+    # Assert
+    assert len(roots) == 1
+    assert roots[0].id == 'sample_id'
+    assert mock_client._snapshots['account_id'].server_knowledge == 100
+    mock_client.session.get.assert_called_with(ANY, params={'since_date': '2024-01-01'}, stream=True)
+
+
+def test_fetch_complements_account_scoped(mock_client, mock_transaction_dict):
+    # Arrange
+    mock_complement = dict(mock_transaction_dict, id='complement_id', import_id='s||share_id||0')
+    mock_client.session.get.return_value = mock_response({'data': {'transactions': [mock_transaction_dict,
+                                                                                    mock_complement],
+                                                                   'server_knowledge': 100}})
+
+    # Act
+    r = mock_client.fetch_complements(since=date(2024, 1, 1))
+
+    # Assert
+    assert [c.id for c in r] == ['complement_id']
+    assert mock_client.session.get.call_args[0][0].endswith('/accounts/account_id/transactions')
+
+
+def test_fetch_transfer_lookup_referenced_accounts_only(mock_client, mock_transaction_dict):
+    # Arrange
+    mock_root = dict(mock_transaction_dict, id='root_id', account_id='account_id',
+                     transfer_transaction_id='transfer_id', transfer_account_id='checking_id')
+    mock_other_root = dict(mock_transaction_dict, id='other_root_id', account_id='account_id',
+                           transfer_transaction_id='other_id', transfer_account_id='savings_id')
+    mock_transfer = dict(mock_transaction_dict, id='transfer_id', account_id='checking_id',
+                         transfer_transaction_id='root_id', import_payee_name='transfer_payee')
+    mock_client.session.get.side_effect = [
+        mock_response({'data': {'transactions': [mock_root, mock_other_root], 'server_knowledge': 100}}),
+        mock_response({'data': {'transactions': [mock_transfer], 'server_knowledge': 100}})]
+
+    # Act
+    mock_client.fetch_roots(since=date(2024, 1, 1), include_uncleared=False)
+    r = mock_client.fetch_transfer_lookup(since=date(2024, 1, 1), transaction_ids=['root_id'])
+
+    # Assert
+    assert len(r) == 1
+    assert r[0].payee_name == 'transfer_payee'
+    assert r[0].transfer_transaction_ids == ['root_id']
+    assert mock_client.session.get.call_count == 2
+    assert mock_client.session.get.call_args[0][0].endswith('/accounts/checking_id/transactions')
+
+
+def test_fetch_complements_from_budget_snapshot(mock_client, mock_transaction_dict):
+    # Arrange
+    mock_complement = dict(mock_transaction_dict, id='complement_id', account_id='account_id',
+                           import_id='s||share_id||0')
+    mock_client.session.get.return_value = mock_response({'data': {'transactions': [mock_transaction_dict,
+                                                                                    mock_complement],
+                                                                   'server_knowledge': 100}})
+
+    # Act
+    mock_client.fetch_lookup(since=date(2024, 1, 1))
+    r = mock_client.fetch_complements(since=date(2024, 1, 1))
+
+    # Assert
+    assert [c.id for c in r] == ['complement_id']
+    mock_client.session.get.assert_called_once()
@@ -0,0 +1,133 @@
+from datetime import date, timedelta
+
+import pytest
+from requests import HTTPError
+
+from ynabsplitbudget import YnabSplitBudget
+from ynabsplitbudget.transactionbuilder import IMPORT_ID_PATTERN
+from tests.ynabstandin import YnabStandIn, populate, redirect
+
+
+def test_sync_synthetic_budgets(user, partner):
+	# Arrange
+	with YnabStandIn(throttle_every=7) as ynab, redirect(ynab.base_url):
+		populate(ynab, 200, duplicate_ratio=0.2, orphan_ratio=0.1)
+		orphans = [t['id'] for t in ynab.fetch('budget_p', 'account_p') if 'orphan' in t['import_id']]
+		ysb = YnabSplitBudget(user=user, partner=partner, since=date.today() - timedelta(days=30))
+
+		# Act
+		split = ysb.split()
+		pushed = ysb.push(include_uncleared=True)
+		deleted = ysb.delete_orphans()
+
+		# Assert
+		roots = ynab.fetch('budget_u', 'account_u')
+		complements = ynab.fetch('budget_p', 'account_p')
+		assert split
+		assert pushed
+		assert not [c.payee_name for c in pushed if c.payee_name.startswith('Transfer')]
+		assert sorted(c.id for c in deleted) == sorted(orphans)
+		assert len(complements) == len(roots)
+		assert ynab.balance('budget_u', 'account_u') + ynab.balance('budget_p', 'account_p') == 0
+		assert any(r[1] == '/v1/budgets/budget_u/accounts/account_u' for r in ynab.requests)
+
+
+def test_sync_fetches_user_budget_once(user, partner):
+	# Arrange
+	with YnabStandIn() as ynab, redirect(ynab.base_url):
+		populate(ynab, 200, orphan_ratio=0.05)
+		orphans = [t['id'] for t in ynab.fetch('budget_p', 'account_p') if 'orphan' in t['import_id']]
+		ysb = YnabSplitBudget(user=user, partner=partner, since=date.today() - timedelta(days=30))
+
+		# Act
+		with ysb.run():
+			split, pushed = ysb.sync(include_uncleared=True)
+			deleted = ysb.delete_orphans()
+
+		# Assert
+		roots = ynab.fetch('budget_u', 'account_u')
+		complements = ynab.fetch('budget_p', 'account_p')
+		user_fetches = [r for r in ynab.requests if r[0] == 'GET' and r[1].startswith('/v1/budgets/budget_u/')
+						and r[1].endswith('/transactions')]
+		assert split
+		assert len(pushed) >= len(split)
+		assert not [c.payee_name for c in pushed if c.payee_name.startswith('Transfer')]
+		assert sorted(c.id for c in deleted) == sorted(orphans)
+		assert len(complements) == len(roots)
+		assert user_fetches[0][1] == '/v1/budgets/budget_u/transactions'
+		assert len([r for r in user_fetches if r[1] == '/v1/budgets/budget_u/transactions']) == 1
+
+
+def test_find_balance_drift(user, partner):
+	# Arrange
+	with YnabStandIn() as ynab, redirect(ynab.base_url):
+		populate(ynab, 100, orphan_ratio=0)
+		ysb = YnabSplitBudget(user=user, partner=partner, since=date.today() - timedelta(days=30))
+		ysb.push(include_uncleared=True)
+		complement = ynab.fetch('budget_p', 'account_p')[0]
+
+		# Act
+		balanced = ysb.find_balance_drift()
+		ynab.change('budget_p', complement['id'], amount=complement['amount'] + 1000)
+		drift = ysb.find_balance_drift()
+
+		# Assert
+		assert balanced is None
+		assert drift.transaction_date.strftime('%Y-%m-%d') == complement['date']
+		assert [t.id for t in drift.partner_transactions] == [complement['id']]
+		assert len(drift.user_transactions) == 1
+
+
+def test_push_failed_insert_no_duplicate_complements(user, partner):
+	# Arrange
+	with YnabStandIn() as ynab, redirect(ynab.base_url):
+		populate(ynab, 100, orphan_ratio=0, duplicate_ratio=0)
+		ysb = YnabSplitBudget(user=user, partner=partner, since=date.today() - timedelta(days=30))
+		ynab.fail_after['POST'] = [502]
+
+		# Act
+		with pytest.raises(HTTPError):
+			ysb.push(include_uncleared=True)
+		ysb.push(include_uncleared=True)
+
+		# Assert
+		share_ids = [IMPORT_ID_PATTERN.search(c['import_id']).groups()[0]
+					 for c in ynab.fetch('budget_p', 'account_p')]
+		assert len(share_ids) == len(set(share_ids))
+		assert len(share_ids) == len(ynab.fetch('budget_u', 'account_u'))
+
+
+def test_push_earlier_since_replaces_stored_complements(user, partner, tmp_path):
+	# Arrange
+	with YnabStandIn() as ynab, redirect(ynab.base_url):
+		populate(ynab, 50, orphan_ratio=0, duplicate_ratio=0, pushed_ratio=1)
+		since = date.today() - timedelta(days=10)
+		ysb = YnabSplitBudget(user=user, partner=partner, since=since, cache_dir=str(tmp_path))
+		ysb.push(include_uncleared=True)
+		complement = next(c for c in ynab.fetch('budget_p', 'account_p') if c['date'] >= since.strftime('%Y-%m-%d'))
+		ynab.change('budget_p', complement['id'], deleted=True)
+
+		# Act
+		pushed = YnabSplitBudget(user=user, partner=partner, since=since - timedelta(days=20),
+								 cache_dir=str(tmp_path)).push(include_uncleared=True)
+
+		# Assert
+		assert [c.share_id for c in pushed] == [IMPORT_ID_PATTERN.search(complement['import_id']).groups()[0]]
+
+
+def test_push_transfer_lookup_request_count(user, partner):
+	# Arrange
+	with YnabStandIn() as ynab, redirect(ynab.base_url):
+		populate(ynab, 200, orphan_ratio=0, pushed_ratio=0, checking_accounts=30)
+		ysb = YnabSplitBudget(user=user, partner=partner, since=date.today() - timedelta(days=30))
+
+		# Act
+		pushed = ysb.push(include_uncleared=True)
+
+		# Assert
+		transaction_fetches = [r[1] for r in ynab.requests if r[0] == 'GET' and r[1].endswith('/transactions')]
+		assert pushed
+		assert not [c.payee_name for c in pushed if c.payee_name.startswith('Transfer')]
+		assert sorted(transaction_fetches) == ['/v1/budgets/budget_p/accounts/account_p/transactions',
+											   '/v1/budgets/budget_u/accounts/account_u/transactions',
+											   '/v1/budgets/budget_u/transactions']
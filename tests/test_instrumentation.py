@@ -0,0 +1,56 @@
+from datetime import date, timedelta
+
+from ynabsplitbudget import YnabSplitBudget
+from ynabsplitbudget.instrumentation import Metrics, endpoint
+from tests.ynabstandin import YnabStandIn, populate, redirect
+
+
+def test_endpoint():
+	# Act
+	e = endpoint('https://api.ynab.com/v1/budgets/budget_id/accounts/account_id/transactions?since_date=2024-01-01')
+	# Assert
+	assert e == 'budgets/{id}/accounts/{id}/transactions'
+
+
+def test_metrics_record_requests_and_phases(user, partner):
+	# Arrange
+	metrics = Metrics()
+	with YnabStandIn(throttle_every=5) as ynab, redirect(ynab.base_url):
+		populate(ynab, 50)
+		ysb = YnabSplitBudget(user=user, partner=partner, since=date.today() - timedelta(days=30),
+							  instrumentation=metrics)
+
+		# Act
+		ysb.push(include_uncleared=True)
+
+		# Assert
+		summary = metrics.to_dict()
+		transactions = next(e for e in summary['endpoints']
+							if e['method'] == 'GET' and e['endpoint'] == 'budgets/{id}/accounts/{id}/transactions')
+		assert transactions['bytes'] > 0
+		assert transactions['latency']['count'] == transactions['requests']
+		assert summary['totals']['requests'] + summary['totals']['retries'] == len(ynab.requests)
+		assert summary['totals']['retries'] > 0
+		assert {'push', 'fetch_roots_wo_complement', 'fetch_transactions', 'insert_complements',
+				'insert'} <= summary['phases'].keys()
+
+
+def test_to_openmetrics():
+	# Arrange
+	metrics = Metrics()
+	metrics.request('GET', 'budgets/{id}/transactions', status=200, seconds=0.2, retries=1)
+	metrics.request('GET', 'budgets/{id}/transactions', status=429, seconds=3, retries=5)
+	metrics.received('GET', 'budgets/{id}/transactions', size=100)
+	with metrics.phase('push'):
+		pass
+	# Act
+	text = metrics.to_openmetrics()
+	# Assert
+	labels = 'method="GET",endpoint="budgets/{id}/transactions"'
+	assert f'ynabsplitbudget_requests_total{{{labels},status="429"}} 1' in text
+	assert f'ynabsplitbudget_response_bytes_total{{{labels}}} 100' in text
+	assert f'ynabsplitbudget_retries_total{{{labels}}} 6' in text
+	assert f'ynabsplitbudget_request_duration_seconds_bucket{{{labels},le="0.25"}} 1' in text
+	assert f'ynabsplitbudget_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in text
+	assert 'ynabsplitbudget_phase_duration_seconds_count{phase="push"} 1' in text
+	assert text.endswith('# EOF\n')
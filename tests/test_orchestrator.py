@@ -0,0 +1,94 @@
+from datetime import date
+from unittest.mock import patch, MagicMock
+
+import pytest
+from requests import Response
+
+from ynabsplitbudget import User
+from ynabsplitbudget.clientpool import ClientPool
+from ynabsplitbudget.models.pair import Pair
+from ynabsplitbudget.orchestrator import Orchestrator
+
+
+def user(name: str, budget_id: str = 'budget_id', account_id: str = None) -> User:
+	return User(name=name, token=f'token_{name}', budget_id=budget_id, account_id=account_id or f'account_{name}',
+				flag_color='purple')
+
+
+def test_client_pool_shares_budget(mock_transaction_dict):
+	# Arrange
+	pool = ClientPool()
+	c1 = pool.get(user('alice'))
+	c2 = pool.get(User(name='alice', token='token_alice', budget_id='budget_id', account_id='other_account',
+					   flag_color='purple'))
+	response = MagicMock(spec=Response)
+	response.json.return_value = {'data': {'transactions': [mock_transaction_dict], 'server_knowledge': 100}}
+	c1.session = MagicMock()
+	c1.stream = False
+	c1.session.get.return_value = response
+	c2.session = MagicMock()
+	# Act
+	c1.fetch_lookup(since=date(2024, 1, 1))
+	r = c2.fetch_lookup(since=date(2024, 1, 1))
+	# Assert
+	assert pool.get(user('alice')) is c1
+	assert pool.get(user('bob')) is not c1
+	assert len(r) == 1
+	c2.session.get.assert_not_called()
+
+
+def test_client_pool_expire_users():
+	# Arrange
+	pool = ClientPool()
+	alice, bob = pool.get(user('alice', budget_id='budget_alice')), pool.get(user('bob', budget_id='budget_bob'))
+	alice._fresh.add(None)
+	bob._fresh.add(None)
+	# Act
+	pool.expire([user('alice', budget_id='budget_alice'), user('carol')])
+	# Assert
+	assert alice._fresh == set()
+	assert bob._fresh == {None}
+
+
+def test_pair_from_dict():
+	# Arrange
+	alice = {'name': 'alice', 'token': 'token', 'budget_id': 'budget_id', 'account_id': 'account_id',
+			 'flag_color': 'purple'}
+	# Act
+	p = Pair.from_dict({'user': alice, 'partner': dict(alice, name='bob'), 'steps': ['push']})
+	# Assert
+	assert p.name == 'alice-bob'
+	assert p.steps == ('push', )
+	with pytest.raises(ValueError):
+		Pair.from_dict({'user': alice, 'partner': alice, 'steps': ['bullshit']})
+
+
+@patch('ynabsplitbudget.orchestrator.YnabSplitBudget.delete_orphans')
+@patch('ynabsplitbudget.orchestrator.YnabSplitBudget.push')
+@patch('ynabsplitbudget.orchestrator.YnabSplitBudget.split')
+def test_run(mock_split, mock_push, mock_delete_orphans):
+	# Arrange
+	calls = []
+	mock_split.side_effect = lambda: calls.append('split') or ['t']
+	mock_push.side_effect = lambda include_uncleared=False: calls.append('push') or ['c', 'c']
+	mock_delete_orphans.side_effect = Exception('failed')
+	o = Orchestrator(pairs=[Pair(name='ab', user=user('alice'), partner=user('bob', budget_id='budget_bob')),
+							Pair(name='ac', user=user('alice', account_id='account_alice2'),
+								 partner=user('carol', budget_id='budget_carol'), steps=('split', 'push'))],
+					 since=date(2024, 1, 1), max_workers=2)
+	# Act
+	r = o.run()
+	# Assert
+	assert calls == ['split', 'push', 'push']
+	assert r.pairs[0].results == {'split': 1, 'push': 2}
+	assert r.pairs[0].error == "delete_orphans: Exception('failed')"
+	assert set(r.pairs[0].timings.keys()) == {'split', 'push', 'delete_orphans'}
+	assert r.pairs[1].error is None
+	assert r.pairs[1].results == {'split': 0, 'push': 2}
+	assert [p.name for p in r.failed] == ['ab']
+	assert set(r.to_dict()['rate_limits'].keys()) == {'budget_id', 'budget_bob', 'budget_carol'}
+
+
+def test_unique_names():
+	with pytest.raises(ValueError):
+		Orchestrator(pairs=[Pair(name='ab', user=user('alice'), partner=user('bob'))] * 2, since=date(2024, 1, 1))
@@ -0,0 +1,147 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from requests import Response, PreparedRequest
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from ynabsplitbudget.models.exception import RateLimitExceeded
+from ynabsplitbudget.scheduler import RateLimit, RetryPolicy, SchedulingAdapter
+
+
+class Clock:
+	def __init__(self):
+		self.now = 0.0
+
+	def __call__(self) -> float:
+		return self.now
+
+
+def mock_response(status_code: int, headers: dict = None) -> Response:
+	r = Response()
+	r.status_code = status_code
+	r.raw = MagicMock()
+	r.headers.update(headers or {})
+	return r
+
+
+def test_rate_limit_reserve():
+	# Arrange
+	clock = Clock()
+	rl = RateLimit(limit=2, period=10, clock=clock)
+	# Act
+	waits = [rl.reserve(), rl.reserve(), rl.reserve()]
+	# Assert
+	assert waits == [0, 0, 10]
+	assert rl.remaining == 0
+	clock.now = 10
+	assert rl.remaining == 1
+
+
+def test_rate_limit_reserve_max_wait():
+	# Arrange
+	rl = RateLimit(limit=1, period=3600, clock=Clock())
+	rl.reserve()
+	# Act
+	with pytest.raises(RateLimitExceeded):
+		rl.reserve(max_wait=300)
+	# Assert
+	assert rl.remaining == 0
+	assert rl.reserve(max_wait=3600) == 3600
+
+
+def test_rate_limit_update():
+	# Arrange
+	rl = RateLimit(clock=Clock())
+	rl.reserve()
+	# Act
+	rl.update('36/200')
+	# Assert
+	assert rl.remaining == 164
+	rl.update(None)
+	assert rl.remaining == 164
+
+
+def test_rate_limit_for_token():
+	assert RateLimit.for_token('token') is RateLimit.for_token('token')
+	assert RateLimit.for_token('token') is not RateLimit.for_token('other_token')
+
+
+def test_retry_policy_delay():
+	rp = RetryPolicy(backoff_factor=1, max_backoff=5)
+	assert rp.delay(attempt=2, retry_after='30') == 30
+	assert rp.delay(attempt=2, retry_after='3600') == 300
+	assert all(0 <= rp.delay(attempt=a) <= min(5, 2 ** a) for a in range(6))
+
+
+@patch.object(HTTPAdapter, 'send')
+def test_adapter_retries_throttled(mock_send):
+	# Arrange
+	mock_send.side_effect = [mock_response(429, {'Retry-After': '3'}), mock_response(503),
+							 mock_response(200, {'X-Rate-Limit': '10/200'})]
+	sleep = MagicMock()
+	rl = RateLimit(clock=Clock())
+	adapter = SchedulingAdapter(rate_limit=rl, retry_policy=RetryPolicy(backoff_factor=0), sleep=sleep)
+	# Act
+	r = adapter.send(PreparedRequest())
+	# Assert
+	assert r.status_code == 200
+	assert mock_send.call_count == 3
+	assert [c.args[0] for c in sleep.call_args_list] == [0, 3, 0, 0, 0]
+	assert rl.remaining == 190
+
+
+@patch.object(HTTPAdapter, 'send')
+def test_adapter_gives_up(mock_send):
+	# Arrange
+	mock_send.side_effect = [mock_response(500), mock_response(500)]
+	adapter = SchedulingAdapter(rate_limit=RateLimit(clock=Clock()), retry_policy=RetryPolicy(retries=1),
+								sleep=MagicMock())
+	# Act
+	r = adapter.send(PreparedRequest())
+	# Assert
+	assert r.status_code == 500
+	assert mock_send.call_count == 2
+
+
+@patch.object(HTTPAdapter, 'send')
+def test_adapter_reraises_connection_error(mock_send):
+	# Arrange
+	mock_send.side_effect = ConnectionError()
+	adapter = SchedulingAdapter(rate_limit=RateLimit(clock=Clock()), retry_policy=RetryPolicy(retries=2),
+								sleep=MagicMock())
+	# Act
+	with pytest.raises(ConnectionError):
+		adapter.send(PreparedRequest())
+	# Assert
+	assert mock_send.call_count == 3
+
+
+@patch.object(HTTPAdapter, 'send')
+def test_adapter_doesnt_retry_failed_post(mock_send):
+	# Arrange
+	mock_send.side_effect = [mock_response(429), mock_response(502), mock_response(201)]
+	request = PreparedRequest()
+	request.prepare(method='POST', url='https://api.ynab.com/v1/budgets/budget_id/transactions')
+	adapter = SchedulingAdapter(rate_limit=RateLimit(clock=Clock()), sleep=MagicMock())
+	# Act
+	r = adapter.send(request)
+	# Assert
+	assert r.status_code == 502
+	assert mock_send.call_count == 2
+
+
+@patch.object(HTTPAdapter, 'send')
+def test_adapter_retries_post_not_sent(mock_send):
+	# Arrange
+	mock_send.side_effect = [ConnectionError(MaxRetryError(None, 'url', NewConnectionError(None, 'refused'))),
+							 ConnectionError(), mock_response(201)]
+	request = PreparedRequest()
+	request.prepare(method='POST', url='https://api.ynab.com/v1/budgets/budget_id/transactions')
+	adapter = SchedulingAdapter(rate_limit=RateLimit(clock=Clock()), sleep=MagicMock())
+	# Act
+	with pytest.raises(ConnectionError):
+		adapter.send(request)
+	# Assert
+	assert mock_send.call_count == 2
@@ -0,0 +1,25 @@
+from ynabsplitbudget.client import Client
+from ynabsplitbudget.scheduler import SchedulingAdapter, RetryPolicy
+from ynabsplitbudget.sessions import SessionRegistry, POOL_MAXSIZE
+
+
+def test_for_token_shared():
+	# Act
+	c1 = Client(token='token_shared', user_name='', budget_id='budget_id', account_id='account_id')
+	c2 = Client(token='token_shared', user_name='', budget_id='other_budget_id', account_id='account_id')
+	# Assert
+	assert c1.session is c2.session
+	assert c1.session is SessionRegistry.for_token('token_shared')
+	assert SessionRegistry.for_token('token_other') is not c1.session
+	assert SessionRegistry.for_token('token_shared', retry_policy=RetryPolicy(retries=0)) is not c1.session
+
+
+def test_for_token_configured():
+	# Act
+	s = SessionRegistry.for_token('token_configured')
+	# Assert
+	adapter = s.get_adapter('https://api.ynab.com/v1/budgets')
+	assert isinstance(adapter, SchedulingAdapter)
+	assert adapter._pool_maxsize == POOL_MAXSIZE
+	assert s.headers['Authorization'] == 'Bearer token_configured'
+	assert s.headers['Accept-Encoding'] == 'gzip'
@@ -0,0 +1,66 @@
+from datetime import date
+
+from ynabsplitbudget.snapshot import Snapshot
+
+
+def test_snapshot_covers():
+	s = Snapshot(budget_id='budget_id', since=date(2024, 1, 1), server_knowledge=100)
+	assert s.covers(date(2024, 2, 1))
+	assert not s.covers(date(2023, 12, 1))
+	assert not Snapshot(budget_id='budget_id', since=date(2024, 1, 1)).covers(date(2024, 2, 1))
+
+
+def test_snapshot_merge(mock_transaction_dict):
+	# Arrange
+	s = Snapshot(budget_id='budget_id', since=date(2024, 1, 1))
+	t_old = dict(mock_transaction_dict, id='old', date='2023-12-01')
+	t_deleted = dict(mock_transaction_dict, id='deleted', deleted=True)
+	# Act
+	s.merge([mock_transaction_dict, t_old], server_knowledge=100)
+	s.merge([t_deleted, dict(t_deleted, id='sample_id')], server_knowledge=101)
+	# Assert
+	assert s.server_knowledge == 101
+	assert list(s.transactions.keys()) == ['old']
+	assert s.changed_ids == {'old'}
+	assert s.deleted_ids == {'deleted', 'sample_id'}
+	assert s.transactions_since(date(2024, 1, 1)) == []
+
+
+
+def test_snapshot_iterations(mock_transaction_dict):
+	# Arrange
+	s = Snapshot(budget_id='budget_id', since=date(2024, 1, 1))
+	complement = dict(mock_transaction_dict, id='complement_id', import_id='s||share_id||2')
+	# Act
+	s.merge([complement, dict(mock_transaction_dict, import_id='YNAB:-1000:2024-01-01:1')], server_knowledge=100)
+	s.merge([{'id': 'complement_id', 'deleted': True}], server_knowledge=101)
+	s.record_import_id('s||share_id||1')
+	# Assert
+	assert s.iterations == {'share_id': 2}
+	assert s.changed_iterations == {'share_id'}
+
+
+def test_snapshot_tombstones(mock_transaction_dict):
+	# Arrange
+	s = Snapshot(budget_id='budget_id', since=date(2024, 1, 1))
+	complement = dict(mock_transaction_dict, id='complement_id', import_id='s||share_id||0')
+	s.merge([mock_transaction_dict, complement], server_knowledge=100)
+	# Act
+	s.merge([dict(mock_transaction_dict, deleted=True), dict(complement, deleted=True),
+			 {'id': 'unknown_id', 'account_id': 'sample_account', 'deleted': True}], server_knowledge=101)
+	# Assert
+	assert s.tombstones == {'sample_id': ('sample_account', '6f66e5aa449e868261ce')}
+
+
+def test_snapshot_ledger(mock_transaction_dict):
+	# Arrange
+	s = Snapshot(budget_id='budget_id', since=date(2024, 1, 1))
+	s.merge([mock_transaction_dict, dict(mock_transaction_dict, id='other', date='2024-01-02')], server_knowledge=100)
+	ledger = s.build_ledger()
+	# Act
+	s.merge([dict(mock_transaction_dict, amount=3000, date='2024-01-03'),
+			 {'id': 'other', 'account_id': 'sample_account', 'deleted': True}], server_knowledge=101)
+	# Assert
+	assert s.build_ledger() is ledger
+	assert ledger.dates == ['2024-01-03']
+	assert ledger.sums == {'2024-01-03': 3000}
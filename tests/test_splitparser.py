@@ -3,7 +3,7 @@ from unittest.mock import MagicMock
 import pytest
 
 from ynabsplitbudget.models.exception import SplitNotValid
-from ynabsplitbudget.splitparser import SplitParser
+from ynabsplitbudget.splitparser import SplitParser, parse_memo
 
 
 @pytest.mark.parametrize('test_input, expected', [('xxx', -1000), ('xxx @25%:xxx', -500), ('@33%', -660), ('@0.7', -700),
@@ -30,3 +30,21 @@ def test_parse_split_fail(test_input):
 	with pytest.raises(SplitNotValid):
 		# Act
 		c.parse_split(transaction)
+
+
+def test_parse_many():
+	# Arrange
+	parse_memo.cache_clear()
+	transactions = [MagicMock(amount=-2000, memo=m) for m in ('@25%', 'xxx', '@25%', None)]
+
+	# Act
+	split_amounts = SplitParser.parse_many(transactions)
+
+	# Assert
+	assert split_amounts == [-500, -1000, -500, -1000]
+	assert parse_memo.cache_info().hits == 1
+
+
+def test_parse_many_fail():
+	with pytest.raises(SplitNotValid):
+		SplitParser.parse_many([MagicMock(amount=-1000, memo='xxx'), MagicMock(amount=-1000, memo='@2')])
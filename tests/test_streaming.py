@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from ynabsplitbudget.streaming import TransactionStream
+
+
+def chunked(data: dict, size: int):
+	body = json.dumps({'data': data}).encode()
+	return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+@pytest.mark.parametrize('size', [1, 7, 4096])
+def test_transaction_stream(mock_transaction_dict, size):
+	# Arrange
+	transactions = [dict(mock_transaction_dict, id=str(i), memo='ümlaut ] }') for i in range(3)]
+	stream = TransactionStream(chunked({'transactions': transactions, 'server_knowledge': 100}, size))
+
+	# Act
+	r = list(stream)
+
+	# Assert
+	assert r == transactions
+	assert stream.server_knowledge == 100
+
+
+def test_transaction_stream_read_empty():
+	# Arrange
+	stream = TransactionStream(chunked({'server_knowledge': 5, 'transactions': []}, 3))
+
+	# Act
+	r = stream.read()
+
+	# Assert
+	assert r == {'transactions': [], 'server_knowledge': 5}
+
+
+def test_transaction_stream_truncated(mock_transaction_dict):
+	# Arrange
+	body = b''.join(chunked({'transactions': [mock_transaction_dict], 'server_knowledge': 100}, 10))
+
+	# Act
+	with pytest.raises(ValueError):
+		list(TransactionStream([body[:50]]))
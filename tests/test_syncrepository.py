@@ -1,19 +1,31 @@
+import asyncio
+import threading
 from datetime import date
 from unittest.mock import MagicMock, patch
 
+import pytest
+
+from ynabsplitbudget.asyncsyncrepository import AsyncSyncRepository
 from ynabsplitbudget.models.transaction import RootTransaction, ComplementTransaction
-from ynabsplitbudget.syncrepository import SyncRepository
+from ynabsplitbudget.syncrepository import SyncRepository, Reconciliation
+from ynabsplitbudget.transactionstore import TransactionStore
+
+
+@pytest.fixture
+def mock_transfer_lookup():
+	with patch('ynabsplitbudget.client.Client.fetch_transfer_lookup', return_value=[]) as mock_transfer_lookup:
+		yield mock_transfer_lookup
 
 
 @patch('ynabsplitbudget.client.Client.fetch_roots')
-@patch('ynabsplitbudget.client.Client.fetch_lookup')
-def test_fetch_new_to_insert_new(mock_lookup, mock_changed):
+@patch('ynabsplitbudget.client.Client.fetch_complements')
+def test_fetch_new_to_insert_new(mock_complements, mock_changed, mock_transfer_lookup):
 	# Arrange
 	mock_transaction = MagicMock(spec=RootTransaction, transaction_date=date(2023, 10, 1), id='id',
 								 share_id='share_id')
-	mock_lookup_transaction = MagicMock(spec=RootTransaction, share_id='share_id2')
+	mock_complement = MagicMock(spec=ComplementTransaction, share_id='share_id2')
 	mock_changed.return_value = [mock_transaction]
-	mock_lookup.return_value = [mock_lookup_transaction]
+	mock_complements.return_value = [mock_complement]
 	# Act
 	strepo = SyncRepository(user=MagicMock(), partner=MagicMock())
 	t = strepo.fetch_roots_wo_complement(since=date(2024, 1, 1), include_uncleared=True)
@@ -22,14 +34,14 @@ def test_fetch_new_to_insert_new(mock_lookup, mock_changed):
 
 
 @patch('ynabsplitbudget.client.Client.fetch_roots')
-@patch('ynabsplitbudget.client.Client.fetch_lookup')
-def test_fetch_new_to_insert_not_new(mock_lookup, mock_changed):
+@patch('ynabsplitbudget.client.Client.fetch_complements')
+def test_fetch_new_to_insert_not_new(mock_complements, mock_changed, mock_transfer_lookup):
 	# Arrange
 	mock_transaction = MagicMock(spec=RootTransaction, transaction_date=date(2023, 10, 1), id='id',
 								 share_id='share_id')
 	mock_complement = MagicMock(spec=ComplementTransaction, id='id2', share_id='share_id')
 	mock_changed.return_value = [mock_transaction]
-	mock_lookup.return_value = [mock_complement]
+	mock_complements.return_value = [mock_complement]
 	# Act
 	strepo = SyncRepository(user=MagicMock(), partner=MagicMock())
 	t = strepo.fetch_roots_wo_complement(since=date(2024, 1, 1), include_uncleared=True)
@@ -38,13 +50,101 @@ def test_fetch_new_to_insert_not_new(mock_lookup, mock_changed):
 
 
 @patch('ynabsplitbudget.client.Client.fetch_roots')
-@patch('ynabsplitbudget.client.Client.fetch_lookup')
-def test_fetch_new_to_insert_empty(mock_lookup, mock_changed):
+@patch('ynabsplitbudget.client.Client.fetch_complements')
+def test_fetch_new_to_insert_empty(mock_complements, mock_changed, mock_transfer_lookup):
 	# Arrange
 	mock_changed.return_value = []
-	mock_lookup.return_value = []
+	mock_complements.return_value = []
 	# Act
 	strepo = SyncRepository(user=MagicMock(), partner=MagicMock())
 	t = strepo.fetch_roots_wo_complement(since=date(2024, 1, 1), include_uncleared=True)
 	# Assert
 	assert len(t) == 0
+
+
+@patch('ynabsplitbudget.client.Client.refresh_transfers')
+@patch('ynabsplitbudget.client.Client.refresh')
+@patch('ynabsplitbudget.client.Client.fetch_roots')
+def test_fetch_new_to_insert_store(mock_changed, mock_refresh, mock_refresh_transfers):
+	# Arrange
+	mock_store = MagicMock(spec=TransactionStore)
+	mock_store.fetch_share_ids.return_value = {'share_id'}
+	mock_store.fetch_transfer_payees.return_value = {'id2': 'transfer_payee'}
+	mock_changed.return_value = [RootTransaction(id='id', share_id='share_id', transaction_date=date(2024, 1, 1),
+												 memo=None, payee_name='payee', amount=1000, account_id='account_id'),
+								 RootTransaction(id='id2', share_id='share_id2', transaction_date=date(2024, 1, 1),
+												 memo=None, payee_name='payee', amount=1000, account_id='account_id')]
+	# Act
+	strepo = SyncRepository(user=MagicMock(), partner=MagicMock(), store=mock_store)
+	t = strepo.fetch_roots_wo_complement(since=date(2024, 1, 1), include_uncleared=True)
+	# Assert
+	assert len(t) == 1
+	assert t[0].id == 'id2'
+	assert t[0].payee_name == 'transfer_payee'
+
+
+@patch('ynabsplitbudget.client.Client.refresh')
+def test_find_orphaned_partner_complements_store(mock_refresh):
+	# Arrange
+	mock_store = MagicMock(spec=TransactionStore)
+	mock_store.fetch_complements.return_value = [MagicMock(spec=ComplementTransaction, id='id1', share_id='share_id'),
+												 MagicMock(spec=ComplementTransaction, id='id2', share_id='share_id2')]
+	mock_store.fetch_share_ids.return_value = {'share_id'}
+	mock_store.fetch_tombstoned_complements.return_value = [
+		MagicMock(spec=ComplementTransaction, id='id2', share_id='share_id2'),
+		MagicMock(spec=ComplementTransaction, id='id3', share_id='share_id3')]
+	# Act
+	strepo = SyncRepository(user=MagicMock(), partner=MagicMock(), store=mock_store)
+	o = strepo.find_orphaned_partner_complements(since=date(2024, 1, 1))
+	# Assert
+	assert [c.share_id for c in o] == ['share_id2', 'share_id3']
+
+
+@patch('ynabsplitbudget.asyncclient.AsyncClient.refresh')
+def test_find_orphaned_partner_complements_store_async(mock_refresh):
+	# Arrange
+	mock_store = MagicMock(spec=TransactionStore)
+	mock_store.fetch_complements.return_value = [MagicMock(spec=ComplementTransaction, id='id1', share_id='share_id'),
+												 MagicMock(spec=ComplementTransaction, id='id2', share_id='share_id2')]
+	mock_store.fetch_share_ids.return_value = {'share_id'}
+	mock_store.fetch_tombstoned_complements.return_value = [
+		MagicMock(spec=ComplementTransaction, id='id2', share_id='share_id2'),
+		MagicMock(spec=ComplementTransaction, id='id3', share_id='share_id3')]
+	# Act
+	strepo = AsyncSyncRepository(user=MagicMock(), partner=MagicMock(), store=mock_store)
+	o = asyncio.run(strepo.find_orphaned_partner_complements(since=date(2024, 1, 1)))
+	# Assert
+	assert [c.share_id for c in o] == ['share_id2', 'share_id3']
+
+
+def test_reconciliation():
+	# Arrange
+	roots = [MagicMock(spec=RootTransaction, share_id='matched'), MagicMock(spec=RootTransaction, share_id='unmatched')]
+	complements = [MagicMock(spec=ComplementTransaction, share_id='matched'),
+				   MagicMock(spec=ComplementTransaction, share_id='matched'),
+				   MagicMock(spec=ComplementTransaction, share_id='orphaned')]
+	# Act
+	r = Reconciliation(roots=roots, complements=complements)
+	# Assert
+	assert r.matched == [(roots[0], complements[:2])]
+	assert r.unmatched == [roots[1]]
+	assert r.orphaned == [complements[2]]
+
+
+@patch('ynabsplitbudget.client.Client.fetch_balance')
+def test_fetch_balances_concurrently(mock_balance):
+	# Arrange
+	barrier = threading.Barrier(2, timeout=5)
+	balances = iter([100, -100])
+
+	def fetch_balance():
+		# only passes if user and partner balance are fetched at the same time
+		barrier.wait()
+		return next(balances)
+
+	mock_balance.side_effect = fetch_balance
+	# Act
+	strepo = SyncRepository(user=MagicMock(), partner=MagicMock())
+	b = strepo.fetch_balances()
+	# Assert
+	assert sorted(b) == [-100, 100]
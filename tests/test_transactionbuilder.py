@@ -18,3 +18,18 @@ def test_build_complement_import_ids(test_input, expected, mock_transaction_dict
 	# Assert
 	assert isinstance(t, ComplementTransaction)
 	assert t.iteration == expected
+
+
+def test_build_root_compact(mock_transaction_dict):
+	# Arrange
+	tb = TransactionBuilder(account_id='')
+	t_dicts = [dict(mock_transaction_dict, id=f'id{i}', account_id=''.join(['sample_', 'account'])) for i in range(2)]
+
+	# Act
+	t1, t2 = [tb.build_root(t) for t in t_dicts]
+
+	# Assert
+	assert not hasattr(t1, '__dict__')
+	assert isinstance(t1.amount, int)
+	assert t1.account_id is t2.account_id
+	assert t1.transaction_date is t2.transaction_date
@@ -0,0 +1,121 @@
+from datetime import date
+
+import pytest
+
+from ynabsplitbudget.models.transaction import ComplementTransaction
+from ynabsplitbudget.snapshot import Snapshot
+from ynabsplitbudget.transactionstore import TransactionStore
+
+
+@pytest.fixture
+def mock_store(mock_transaction_dict):
+	store = TransactionStore()
+	root = dict(mock_transaction_dict, account_id='account_id')
+	complement = dict(mock_transaction_dict, id='complement_id', account_id='account_id', import_id='s||share_id||1')
+	transfer = dict(mock_transaction_dict, id='transfer_id', account_id='other_account_id',
+					transfer_transaction_id='sample_id', import_payee_name='transfer_payee')
+	snapshot = Snapshot(budget_id='budget_id', since=date(2024, 1, 1), server_knowledge=100)
+	snapshot.merge([root, complement, transfer], server_knowledge=100)
+	store.save(snapshot)
+	return store
+
+
+def test_load_empty():
+	s = TransactionStore().load(budget_id='budget_id', account_id='account_id')
+	assert s == Snapshot(budget_id='budget_id', account_id='account_id')
+
+
+def test_save_and_load(mock_store):
+	# Act
+	s = mock_store.load(budget_id='budget_id', account_id=None)
+	# Assert
+	assert s.since == date(2024, 1, 1)
+	assert s.server_knowledge == 100
+	assert set(s.transactions.keys()) == {'sample_id', 'complement_id', 'transfer_id'}
+	assert s.changed_ids == set()
+
+
+def test_save_deleted(mock_store):
+	# Arrange
+	s = mock_store.load(budget_id='budget_id', account_id=None)
+	# Act
+	s.merge([dict(s.transactions['complement_id'], deleted=True)], server_knowledge=101)
+	mock_store.save(s)
+	# Assert
+	assert mock_store.fetch_share_ids(budget_id='budget_id', kind='complement') == set()
+	assert mock_store.load(budget_id='budget_id', account_id=None).server_knowledge == 101
+
+
+def test_load_since(mock_store, mock_transaction_dict):
+	# Arrange
+	s = mock_store.load(budget_id='budget_id', account_id=None)
+	s.merge([dict(mock_transaction_dict, id='old_id', date='2023-06-01')], server_knowledge=101)
+	mock_store.save(s)
+	# Act
+	s = mock_store.load(budget_id='budget_id', account_id=None, since=date(2024, 1, 1))
+	# Assert
+	assert 'old_id' not in s.transactions
+	assert s.window == date(2024, 1, 1)
+	assert s.misses(date(2023, 1, 1))
+	assert not s.misses(date(2024, 2, 1))
+	assert s.server_knowledge == 101
+
+
+def test_fetch_complements(mock_store):
+	c = mock_store.fetch_complements(budget_id='budget_id', since=date(2024, 1, 1))
+	assert len(c) == 1
+	assert isinstance(c[0], ComplementTransaction)
+	assert c[0].share_id == 'share_id'
+	assert c[0].iteration == 1
+	assert mock_store.fetch_complements(budget_id='budget_id', since=date(2024, 2, 1)) == []
+
+
+def test_fetch_transfer_payees(mock_store):
+	p = mock_store.fetch_transfer_payees(budget_id='budget_id', account_id='account_id',
+										 transaction_ids=['sample_id', 'unknown_id'])
+	assert p == {'sample_id': 'transfer_payee'}
+
+
+def test_save_iterations(mock_store):
+	# Arrange
+	s = mock_store.load(budget_id='budget_id', account_id=None)
+	# Act
+	s.merge([dict(s.transactions['complement_id'], deleted=True)], server_knowledge=101)
+	s.record_iteration('other_share_id', 4)
+	mock_store.save(s)
+	# Assert
+	assert mock_store.load(budget_id='budget_id', account_id=None).iterations == {'share_id': 1, 'other_share_id': 4}
+
+
+def test_fetch_tombstoned_complements(mock_store, mock_transaction_dict):
+	# Arrange
+	s = mock_store.load(budget_id='budget_id', account_id=None)
+	partner = Snapshot(budget_id='partner_budget_id', since=date(2023, 1, 1), server_knowledge=100)
+	partner.merge([dict(mock_transaction_dict, id='old_complement_id', account_id='partner_account_id',
+						date='2023-01-01', import_id='s||6f66e5aa449e868261ce||0')], server_knowledge=100)
+	mock_store.save(partner)
+	assert mock_store.fetch_tombstoned_complements(budget_id='partner_budget_id', account_id='partner_account_id',
+												   root_budget_id='budget_id', root_account_id='account_id') == []
+	# Act
+	s.merge([dict(s.transactions['sample_id'], deleted=True)], server_knowledge=101)
+	mock_store.save(s)
+	c = mock_store.fetch_tombstoned_complements(budget_id='partner_budget_id', account_id='partner_account_id',
+												root_budget_id='budget_id', root_account_id='account_id')
+	# Assert
+	assert [t.id for t in c] == ['old_complement_id']
+
+
+def test_save_reset(mock_store, mock_transaction_dict):
+	# Arrange
+	old = Snapshot(budget_id='budget_id', since=date(2023, 1, 1), server_knowledge=90)
+	old.merge([dict(mock_transaction_dict, id='old_id', date='2023-06-01')], server_knowledge=90)
+	mock_store.save(old)
+	s = Snapshot(budget_id='budget_id', account_id='account_id', since=date(2023, 12, 1), reset=True)
+	# Act
+	s.merge([dict(mock_transaction_dict, account_id='account_id')], server_knowledge=101)
+	mock_store.save(s)
+	# Assert
+	assert mock_store.fetch_share_ids(budget_id='budget_id', kind='complement') == set()
+	assert set(mock_store.load(budget_id='budget_id', account_id=None).transactions.keys()) == \
+		{'sample_id', 'transfer_id', 'old_id'}
+	assert not s.reset
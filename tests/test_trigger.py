@@ -0,0 +1,67 @@
+import threading
+import time
+from datetime import date
+from unittest.mock import patch, MagicMock
+
+import requests
+
+from tests.ynabstandin import YnabStandIn
+from ynabsplitbudget.models.pair import Pair
+from ynabsplitbudget.trigger import CoalescingJob, TriggerServer
+
+
+def wait_for(condition, timeout: float = 5):
+	end = time.time() + timeout
+	while not condition():
+		assert time.time() < end
+		time.sleep(0.01)
+
+
+def test_coalescing_job_merges_triggers():
+	# Arrange
+	started = threading.Event()
+	release = threading.Event()
+
+	def job():
+		started.set()
+		release.wait()
+	mock_job = MagicMock(side_effect=job)
+	cj = CoalescingJob(job=mock_job, delay=0.05)
+	# Act
+	scheduled = [cj.trigger() for _ in range(3)]
+	started.wait()
+	scheduled_while_running = [cj.trigger() for _ in range(3)]
+	release.set()
+	wait_for(lambda: cj.runs == 2)
+	cj.stop()
+	# Assert
+	assert scheduled == [True, False, False]
+	assert scheduled_while_running == [True, False, False]
+	assert mock_job.call_count == 2
+	assert cj.triggers == 6
+
+
+def test_trigger_server_pushes(user, partner, mock_transaction_dict):
+	# Arrange
+	with YnabStandIn() as ynab, patch('ynabsplitbudget.client.YNAB_BASE_URL', ynab.base_url):
+		ynab.add('budget_u', dict(mock_transaction_dict, account_id='account_u'))
+		ts = TriggerServer(pairs=[Pair(name='pair', user=user, partner=partner, steps=('push', ))],
+						   since=date(2024, 1, 1), port=0, delay=0.1)
+		threading.Thread(target=ts.serve_forever, daemon=True).start()
+		url = f'http://127.0.0.1:{ts.port}/sync/'
+
+		# Act
+		responses = [requests.post(url + 'pair') for _ in range(5)]
+		wait_for(lambda: ts.jobs['pair'].runs == 1)
+		status = requests.get(url + 'pair').json()
+		not_found = requests.post(url + 'other_pair')
+		ts.shutdown()
+
+	# Assert
+	assert [r.status_code for r in responses] == [202] * 5
+	assert [r.json()['scheduled'] for r in responses] == [True, False, False, False, False]
+	assert not_found.status_code == 404
+	assert status['runs'] == 1
+	assert status['last_report']['results'] == {'push': 1}
+	assert [r for r in ynab.requests if r[0] == 'POST'] == [('POST', '/v1/budgets/budget_p/transactions')]
+	assert ynab.fetch('budget_p')[0]['import_id'].endswith('||0')
@@ -0,0 +1,113 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from ynabsplitbudget.watcher import Watcher
+from ynabsplitbudget.ynabsplitbudget import YnabSplitBudget
+
+
+@pytest.fixture
+def mock_split_budget(user, partner):
+	ysb = MagicMock(spec=YnabSplitBudget)
+	ysb.user = user
+	ysb.partner = partner
+	ysb.split.return_value = ['t']
+	ysb.push.return_value = ['c']
+	ysb.delete_orphans.return_value = []
+	return ysb
+
+
+def test_poll_no_changes(mock_split_budget):
+	# Arrange
+	mock_split_budget.fetch_changes.return_value = ([], [])
+	w = Watcher(split_budget=mock_split_budget, steps=['split', 'push', 'delete_orphans'])
+	# Act
+	r = w.poll()
+	# Assert
+	assert r == {}
+	mock_split_budget.split.assert_not_called()
+	mock_split_budget.push.assert_not_called()
+
+
+def test_poll_flagged_transaction(mock_split_budget, mock_transaction_dict):
+	# Arrange
+	transfer = dict(mock_transaction_dict, account_id='account_u', flag_color=None)
+	mock_split_budget.fetch_changes.side_effect = [([mock_transaction_dict], []), ([transfer], [])]
+	w = Watcher(split_budget=mock_split_budget, steps=['split', 'push', 'delete_orphans'])
+	# Act
+	r = w.poll()
+	# Assert
+	assert r == {'split': 1, 'push': 1}
+	mock_split_budget.push.assert_called_once_with(include_uncleared=False)
+	mock_split_budget.delete_orphans.assert_not_called()
+
+
+def test_poll_partner_changes(mock_split_budget, mock_transaction_dict):
+	# Arrange
+	complement = dict(mock_transaction_dict, account_id='account_p', deleted=True)
+	mock_split_budget.fetch_changes.return_value = ([], [complement])
+	w = Watcher(split_budget=mock_split_budget, steps=['split', 'push_uncleared', 'delete_orphans'])
+	# Act
+	r = w.poll()
+	# Assert
+	assert r == {'push': 1, 'delete_orphans': 0}
+	mock_split_budget.split.assert_not_called()
+	mock_split_budget.push.assert_called_once_with(include_uncleared=True)
+
+
+def test_watch_continues_after_error(mock_split_budget):
+	# Arrange
+	stop = threading.Event()
+
+	def fetch_changes():
+		if mock_split_budget.fetch_changes.call_count == 2:
+			stop.set()
+		raise ConnectionError()
+	mock_split_budget.fetch_changes.side_effect = fetch_changes
+	w = Watcher(split_budget=mock_split_budget, interval=0)
+	# Act
+	w.watch(stop=stop)
+	# Assert
+	assert mock_split_budget.fetch_changes.call_count == 2
+	mock_split_budget.run.assert_called_once()
+
+
+def test_poll_retries_failed_steps(mock_split_budget, mock_transaction_dict):
+	# Arrange
+	complement = dict(mock_transaction_dict, account_id='account_p')
+	mock_split_budget.fetch_changes.side_effect = [([], [complement]), ([], [])]
+	mock_split_budget.push.side_effect = [ConnectionError(), ['c']]
+	w = Watcher(split_budget=mock_split_budget, steps=['push'])
+	# Act
+	with pytest.raises(ConnectionError):
+		w.poll()
+	r = w.poll()
+	# Assert
+	assert r == {'push': 1}
+	assert mock_split_budget.push.call_count == 2
+
+
+def test_poll_doesnt_retry_failed_balances(mock_split_budget, mock_transaction_dict):
+	# Arrange
+	transfer = dict(mock_transaction_dict, account_id='account_u', flag_color=None)
+	mock_split_budget.fetch_changes.side_effect = [([mock_transaction_dict], []), ([transfer], []), ([], []),
+												   ([], [])]
+	mock_split_budget.raise_on_balances_off.side_effect = Exception('balances off')
+	w = Watcher(split_budget=mock_split_budget, steps=['split', 'push', 'balances'])
+	# Act
+	with pytest.raises(Exception):
+		w.poll()
+	r1 = w.poll()
+	r2 = w.poll()
+	# Assert
+	assert r1 == r2 == {}
+	mock_split_budget.split.assert_called_once()
+	mock_split_budget.push.assert_called_once()
+	mock_split_budget.raise_on_balances_off.assert_called_once()
+	assert mock_split_budget.fetch_changes.call_count == 4
+
+
+def test_unknown_step(mock_split_budget):
+	with pytest.raises(ValueError):
+		Watcher(split_budget=mock_split_budget, steps=['bullshit'])
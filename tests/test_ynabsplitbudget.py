@@ -1,12 +1,14 @@
+import asyncio
 from datetime import date
 from unittest.mock import MagicMock, patch
 
 import pytest
 from ynabtransactionadjuster import ModifiedTransaction
 
-from ynabsplitbudget.models.transaction import RootTransaction
+from ynabsplitbudget.models.transaction import RootTransaction, ComplementTransaction
 from ynabsplitbudget import YnabSplitBudget
-from ynabsplitbudget.models.exception import BalancesDontMatch
+from ynabsplitbudget.asyncynabsplitbudget import AsyncYnabSplitBudget
+from ynabsplitbudget.models.exception import BalancesDontMatch, OrphansNotDeleted
 
 
 @patch('ynabsplitbudget.ynabsplitbudget.SyncRepository.fetch_balances')
@@ -46,4 +48,40 @@ def test_push_preview(mock_repo):
 	rt = ysb.push_preview()
 	# Assert
 	assert len(rt) == 1
-	assert rt[0] == mock_transaction
\ No newline at end of file
+	assert rt[0] == mock_transaction
+@patch('ynabsplitbudget.ynabsplitbudget.SyncRepository.fetch_roots_wo_complement')
+def test_run_shares_repository(mock_repo):
+	# Arrange
+	ysb = YnabSplitBudget(user=MagicMock(), partner=MagicMock(), since=MagicMock(type=date))
+	# Act
+	with ysb.run():
+		r1 = ysb._get_repository()
+		r2 = ysb._get_repository()
+	# Assert
+	assert r1 is r2
+	assert ysb._get_repository() is not r1
+
+@patch('ynabsplitbudget.asyncsyncrepository.AsyncSyncRepository.aclose')
+@patch('ynabsplitbudget.asyncsyncrepository.AsyncSyncRepository.fetch_balances')
+def test_async_raise_on_balances_off_raise(mock_repository, mock_aclose):
+	# Arrange
+	mock_repository.return_value = (100, -50)
+	ysb = AsyncYnabSplitBudget(user=MagicMock(), partner=MagicMock(), since=MagicMock(type=date))
+	with pytest.raises(BalancesDontMatch):
+		asyncio.run(ysb.raise_on_balances_off())
+	mock_aclose.assert_called_once()
+
+@patch('ynabsplitbudget.ynabsplitbudget.SyncRepository.delete_complements')
+@patch('ynabsplitbudget.ynabsplitbudget.SyncRepository.find_orphaned_partner_complements')
+def test_delete_orphans_partial_failure(mock_orphans, mock_delete):
+	# Arrange
+	mock_orphans.return_value = [MagicMock(spec=ComplementTransaction, id='id1'),
+								 MagicMock(spec=ComplementTransaction, id='id2')]
+	mock_delete.return_value = {'id1': None, 'id2': Exception('failed')}
+	ysb = YnabSplitBudget(user=MagicMock(), partner=MagicMock(), since=MagicMock(type=date))
+	# Act
+	with pytest.raises(OrphansNotDeleted) as e:
+		ysb.delete_orphans()
+	# Assert
+	assert e.value.args[0]['deleted'] == [mock_orphans.return_value[0]]
+	assert e.value.args[0]['failed'] == {'id2': 'failed'}
@@ -0,0 +1,320 @@
+import json
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import date, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List, Optional, Iterator
+from unittest.mock import patch
+from urllib.parse import urlparse, parse_qs
+
+from ynabsplitbudget.sessions import SessionRegistry
+from ynabsplitbudget.transactionbuilder import TransactionBuilder
+
+CATEGORIES = {'category-groceries': 'Groceries', 'category-rent': 'Rent', 'category-dining': 'Dining Out',
+			  'category-inflow': 'Inflow: Ready to Assign'}
+
+
+class YnabStandIn:
+	"""Local stand-in for the YNAB API used in tests and benchmarks. Keeps budgets in memory, answers the endpoints
+	used by this library and by ynabtransactionadjuster and records the requests it received. Splitting a transaction
+	into a transfer subtransaction creates the transfer in the target account like YNAB does. Latency and throttling
+	can be simulated.
+
+	:param latency: Seconds each response gets delayed
+	:param throttle_every: Every nth request is answered with 429, 0 for never
+	:param rate_limit: Limit reported in the X-Rate-Limit header
+	:ivar budgets: Budgets with their accounts by budget id
+	:ivar transactions: Transaction dicts by budget id and transaction id
+	:ivar requests: Method and path of each request received
+	:ivar fail_after: Status codes by method, with which the next requests of the method are answered after they got
+	processed
+	"""
+
+	def __init__(self, latency: float = 0, throttle_every: int = 0, rate_limit: int = 200):
+		self.latency = latency
+		self.throttle_every = throttle_every
+		self.rate_limit = rate_limit
+		self.budgets: Dict[str, dict] = {}
+		self.transactions: Dict[str, Dict[str, dict]] = {}
+		self.requests: List[tuple] = []
+		self.fail_after: Dict[str, List[int]] = {}
+		self._knowledge = 0
+		self._lock = threading.RLock()
+		self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+		self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+	@property
+	def base_url(self) -> str:
+		return f'http://127.0.0.1:{self._server.server_address[1]}/v1/'
+
+	def __enter__(self) -> 'YnabStandIn':
+		self._thread.start()
+		return self
+
+	def __exit__(self, *args):
+		self._server.shutdown()
+		self._server.server_close()
+
+	def add_account(self, budget_id: str, account_id: str, name: Optional[str] = None) -> dict:
+		with self._lock:
+			budget = self.budgets.setdefault(budget_id, {'id': budget_id, 'name': f'budget {budget_id}',
+														 'currency_format': {'iso_code': 'EUR'}, 'accounts': {}})
+			if account_id not in budget['accounts']:
+				budget['accounts'][account_id] = {'id': account_id, 'name': name or f'account {account_id}',
+												  'transfer_payee_id': f'transfer-{account_id}', 'deleted': False}
+			return budget['accounts'][account_id]
+
+	def add(self, budget_id: str, t_dict: dict) -> dict:
+		"""Adds transaction, missing fields are filled with defaults
+
+		:return: the stored transaction
+		"""
+		with self._lock:
+			account = self.add_account(budget_id, t_dict['account_id'])
+			self._knowledge += 1
+			t = self._defaults()
+			t.update(t_dict, account_name=account['name'], knowledge=self._knowledge)
+			self.transactions.setdefault(budget_id, {})[t['id']] = t
+			return t
+
+	def change(self, budget_id: str, transaction_id: str, **changes) -> dict:
+		with self._lock:
+			self._knowledge += 1
+			t = self.transactions[budget_id][transaction_id]
+			t.update(changes, knowledge=self._knowledge)
+			return t
+
+	def fetch(self, budget_id: str, account_id: str = None, knowledge: int = 0) -> List[dict]:
+		"""Returns transactions changed after knowledge. Like YNAB deleted ones are only returned for delta requests."""
+		with self._lock:
+			return [self._public(t) for t in self.transactions.get(budget_id, {}).values()
+					if t['knowledge'] > knowledge and account_id in (None, t['account_id'])
+					and (knowledge or not t['deleted'])]
+
+	def balance(self, budget_id: str, account_id: str) -> int:
+		with self._lock:
+			return sum(t['amount'] for t in self.transactions.get(budget_id, {}).values()
+					   if t['account_id'] == account_id and not t['deleted'])
+
+	@staticmethod
+	def _defaults() -> dict:
+		return {'id': str(uuid.uuid4()), 'date': date.today().strftime('%Y-%m-%d'), 'amount': 0, 'memo': None,
+				'cleared': 'cleared', 'approved': True, 'flag_color': None, 'payee_id': None, 'payee_name': None,
+				'category_id': None, 'category_name': 'Uncategorized', 'transfer_account_id': None,
+				'transfer_transaction_id': None, 'import_id': None, 'import_payee_name': None,
+				'import_payee_name_original': None, 'deleted': False, 'subtransactions': []}
+
+	@staticmethod
+	def _public(t: dict) -> dict:
+		return {k: v for k, v in t.items() if k != 'knowledge'}
+
+	def _account(self, budget_id: str, account_id: str) -> dict:
+		return dict(self.budgets[budget_id]['accounts'][account_id], balance=self.balance(budget_id, account_id))
+
+	def _transfer_accounts(self, budget_id: str) -> Dict[str, dict]:
+		return {a['transfer_payee_id']: a for a in self.budgets[budget_id]['accounts'].values()}
+
+	def _get(self, parts: List[str], query: dict) -> Optional[dict]:
+		if parts == ['budgets']:
+			include_accounts = query.get('include_accounts', ['false'])[0].lower() == 'true'
+			return {'budgets': [dict(b, accounts=[self._account(b['id'], a) for a in b['accounts']])
+								if include_accounts else {k: v for k, v in b.items() if k != 'accounts'}
+								for b in self.budgets.values()]}
+		budget_id, rest = parts[1], parts[2:]
+		if rest in (['transactions'], ['accounts', parts[-2], 'transactions']):
+			knowledge = int(query.get('last_knowledge_of_server', ['0'])[0])
+			account_id = rest[1] if len(rest) == 3 else None
+			return {'transactions': self.fetch(budget_id, account_id, knowledge), 'server_knowledge': self._knowledge}
+		if budget_id not in self.budgets:
+			return None
+		if rest == ['accounts']:
+			return {'accounts': [self._account(budget_id, a) for a in self.budgets[budget_id]['accounts']]}
+		if len(rest) == 2 and rest[0] == 'accounts':
+			return {'account': self._account(budget_id, rest[1])} if rest[1] in self.budgets[budget_id]['accounts'] \
+				else None
+		if len(rest) == 2 and rest[0] == 'transactions':
+			t = self.transactions.get(budget_id, {}).get(rest[1])
+			return {'transaction': self._public(t)} if t else None
+		if rest == ['categories']:
+			return {'category_groups': [{'name': 'group', 'deleted': False,
+										 'categories': [{'id': i, 'name': n, 'deleted': False}
+														for i, n in CATEGORIES.items()]}]}
+		if rest == ['payees']:
+			return {'payees': [{'id': a['transfer_payee_id'], 'name': f"Transfer : {a['name']}",
+								'transfer_account_id': a['id'], 'deleted': False}
+							   for a in self.budgets[budget_id]['accounts'].values()]}
+
+	def _insert(self, budget_id: str, t_dicts: List[dict]) -> dict:
+		with self._lock:
+			import_ids = {t['import_id'] for t in self.transactions.get(budget_id, {}).values()}
+			duplicates = [t['import_id'] for t in t_dicts if t['import_id'] in import_ids]
+			created = [self._public(self.add(budget_id, t)) for t in t_dicts if t['import_id'] not in import_ids]
+			return {'transactions': created, 'duplicate_import_ids': duplicates}
+
+	def _update(self, budget_id: str, t_dicts: List[dict]) -> dict:
+		with self._lock:
+			updated = []
+			for t_dict in t_dicts:
+				changes = {k: v for k, v in t_dict.items() if k not in ('id', 'subtransactions')}
+				if 'category_id' in changes:
+					changes['category_name'] = CATEGORIES.get(changes['category_id'], 'Uncategorized')
+				t = self.change(budget_id, t_dict['id'], **changes)
+				if 'subtransactions' in t_dict:
+					self.change(budget_id, t['id'], category_id=None, category_name='Split',
+								subtransactions=[self._subtransaction(budget_id, t, s) for s in t_dict['subtransactions']])
+				updated.append(self._public(t))
+			return {'transactions': updated}
+
+	def _subtransaction(self, budget_id: str, parent: dict, s_dict: dict) -> dict:
+		"""Builds subtransaction, a transfer subtransaction creates its counterpart in the target account"""
+		sub = {'id': str(uuid.uuid4()), 'transaction_id': parent['id'], 'amount': s_dict['amount'],
+			   'memo': s_dict.get('memo'), 'payee_id': s_dict.get('payee_id'), 'payee_name': s_dict.get('payee_name'),
+			   'category_id': s_dict.get('category_id'),
+			   'category_name': CATEGORIES.get(s_dict.get('category_id'), 'Uncategorized'),
+			   'transfer_account_id': None, 'transfer_transaction_id': None, 'deleted': False}
+		target = self._transfer_accounts(budget_id).get(sub['payee_id'])
+		if target:
+			source = self.budgets[budget_id]['accounts'][parent['account_id']]
+			transfer = self.add(budget_id, {'account_id': target['id'], 'date': parent['date'], 'amount': -sub['amount'],
+											'memo': sub['memo'], 'cleared': 'uncleared',
+											'payee_id': source['transfer_payee_id'],
+											'payee_name': f"Transfer : {source['name']}",
+											'transfer_account_id': parent['account_id'],
+											'transfer_transaction_id': sub['id']})
+			sub.update(transfer_account_id=target['id'], transfer_transaction_id=transfer['id'])
+		return sub
+
+	def _delete(self, budget_id: str, transaction_id: str) -> Optional[dict]:
+		with self._lock:
+			if transaction_id not in self.transactions.get(budget_id, {}):
+				return None
+			return {'transaction': self._public(self.change(budget_id, transaction_id, deleted=True))}
+
+	def _handler(self) -> type:
+		stand_in = self
+
+		class Handler(BaseHTTPRequestHandler):
+
+			def do_GET(self):
+				url = urlparse(self.path)
+				self._handle(lambda parts: stand_in._get(parts, parse_qs(url.query)))
+
+			def do_POST(self):
+				self._handle(lambda parts: stand_in._insert(parts[1], self._body()['transactions']))
+
+			def do_PATCH(self):
+				self._handle(lambda parts: stand_in._update(parts[1], self._body()['transactions']))
+
+			def do_DELETE(self):
+				self._handle(lambda parts: stand_in._delete(parts[1], parts[3]))
+
+			def log_message(self, format, *args):
+				pass
+
+			def _body(self) -> dict:
+				return json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+
+			def _handle(self, respond):
+				path = urlparse(self.path).path
+				with stand_in._lock:
+					stand_in.requests.append((self.command, path))
+					count = len(stand_in.requests)
+				if stand_in.latency:
+					time.sleep(stand_in.latency)
+				if stand_in.throttle_every and count % stand_in.throttle_every == 0:
+					return self._respond(429, {'error': {'id': '429', 'name': 'too_many_requests'}}, count)
+				data = respond(path.strip('/').split('/')[1:])
+				with stand_in._lock:
+					failures = stand_in.fail_after.get(self.command)
+					status = failures.pop(0) if failures else None
+				if status:
+					return self._respond(status, {'error': {'id': str(status), 'name': 'failed'}}, count)
+				if data is None:
+					return self._respond(404, {'error': {'id': '404', 'name': 'not_found'}}, count)
+				self._respond(201 if self.command == 'POST' else 200, {'data': data}, count)
+
+			def _respond(self, status: int, body: dict, count: int):
+				payload = json.dumps(body).encode()
+				self.send_response(status)
+				self.send_header('Content-Type', 'application/json')
+				self.send_header('Content-Length', str(len(payload)))
+				self.send_header('X-Rate-Limit', f'{count}/{stand_in.rate_limit}')
+				if status == 429:
+					self.send_header('Retry-After', '0')
+				self.end_headers()
+				self.wfile.write(payload)
+
+		return Handler
+
+
+@contextmanager
+def redirect(base_url: str) -> Iterator[None]:
+	"""Redirects the requests of the library and of ynabtransactionadjuster to a stand-in"""
+	SessionRegistry.close()
+	with patch('ynabsplitbudget.client.YNAB_BASE_URL', base_url), \
+			patch('ynabsplitbudget.sessions.YNAB_HOST_URL', base_url), \
+			patch('ynabtransactionadjuster.client.YNAB_BASE_URL', base_url.rstrip('/')):
+		try:
+			yield
+		finally:
+			SessionRegistry.close()
+
+
+def populate(ynab: YnabStandIn, n: int, user_budget: str = 'budget_u', user_account: str = 'account_u',
+			 partner_budget: str = 'budget_p', partner_account: str = 'account_p', split_ratio: float = 0.1,
+			 transfer_ratio: float = 0.2, pushed_ratio: float = 0.5, duplicate_ratio: float = 0.01,
+			 orphan_ratio: float = 0.01, checking_accounts: int = 5, seed: int = 0) -> None:
+	"""Generates a synthetic pair of budgets with n transactions in the checking accounts of each budget within the
+	last four weeks
+
+	:param split_ratio: Share of the transactions of the user flagged to be split
+	:param transfer_ratio: Share of the transactions of the user which are transfers into the split account (roots)
+	:param pushed_ratio: Share of the roots which already have their complement in the split account of the partner
+	:param duplicate_ratio: Share of the roots with a deleted complement, whose import_id YNAB rejects as duplicate
+	:param orphan_ratio: Number of complements without root in the partner split account, relative to the roots
+	:param checking_accounts: Number of checking accounts in each budget
+	"""
+	rng = random.Random(seed)
+	ynab.add_account(user_budget, user_account, name='split')
+	ynab.add_account(partner_budget, partner_account, name='split')
+
+	def transaction(budget_id: str, i: int, **kwargs) -> dict:
+		t = {'id': f'{budget_id}-{i:08d}', 'account_id': f'{budget_id}-checking-{i % checking_accounts}',
+			 'date': (date.today() - timedelta(days=i % 28)).strftime('%Y-%m-%d'),
+			 'amount': -rng.randint(2, 500) * 1000, 'payee_name': f'payee {i % 50}',
+			 'category_id': 'category-groceries', 'category_name': 'Groceries'}
+		return ynab.add(budget_id, dict(t, **kwargs))
+
+	roots = []
+	for i in range(n):
+		draw = rng.random()
+		if draw < split_ratio:
+			transaction(user_budget, i, flag_color='purple', memo=rng.choice([None, '@30%', '@1']))
+		elif draw < split_ratio + transfer_ratio:
+			c = transaction(user_budget, i, payee_name='Transfer : split', import_payee_name=f'payee {i % 50}',
+							category_id=None, category_name='Uncategorized', transfer_account_id=user_account,
+							transfer_transaction_id=f'{user_budget}-root-{i:08d}')
+			roots.append(ynab.add(user_budget, {'id': f'{user_budget}-root-{i:08d}', 'account_id': user_account,
+												'date': c['date'], 'amount': -c['amount'],
+												'payee_name': f"Transfer : {c['account_name']}",
+												'transfer_account_id': c['account_id'],
+												'transfer_transaction_id': c['id']}))
+		else:
+			transaction(user_budget, i)
+		transaction(partner_budget, i)
+
+	for i, root in enumerate(roots):
+		share_id = TransactionBuilder.build_root(root).share_id
+		complement = {'account_id': partner_account, 'date': root['date'], 'amount': -root['amount'],
+					  'payee_name': root['payee_name'], 'import_id': f's||{share_id}||0'}
+		draw = rng.random()
+		if draw < pushed_ratio:
+			ynab.add(partner_budget, complement)
+		elif draw < pushed_ratio + duplicate_ratio:
+			ynab.add(partner_budget, dict(complement, deleted=True))
+	for i in range(int(len(roots) * orphan_ratio)):
+		ynab.add(partner_budget, {'account_id': partner_account, 'amount': 1000, 'payee_name': 'orphan',
+								  'import_id': f's||orphan{i:08d}||0'})
@@ -1,10 +1,18 @@
 import argparse
+import json
 import sys
 import warnings
 import logging
-from datetime import datetime
+from datetime import datetime, date, timedelta
+from pathlib import Path
+from typing import Optional
 
 from ynabsplitbudget import User
+from ynabsplitbudget.instrumentation import Metrics
+from ynabsplitbudget.models.pair import Pair
+from ynabsplitbudget.orchestrator import Orchestrator
+from ynabsplitbudget.trigger import TriggerServer, DEFAULT_PORT
+from ynabsplitbudget.watcher import Watcher, DEFAULT_INTERVAL
 from ynabsplitbudget.ynabsplitbudget import YnabSplitBudget
 
 logging.basicConfig(level=logging.INFO)
@@ -14,20 +22,33 @@ def custom_warn(message, category, filename, lineno, file=None, line=None):
 	sys.stdout.write(warnings.formatwarning(message, category, filename, lineno))
 
 
+def write_metrics(metrics: Optional[Metrics], metrics_path: Optional[str], summary_path: Optional[str]):
+	if metrics_path:
+		Path(metrics_path).write_text(metrics.to_openmetrics())
+	if summary_path:
+		Path(summary_path).write_text(json.dumps(metrics.to_dict(), indent=2))
+
+
 if __name__ == '__main__':
 	parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter,
-									 usage='ynabsplitbudget [-u | --user] <path/user.yaml> '
-										   '[-p | --partner] <path/partner.yaml> '
+									 usage='ynabsplitbudget ([-u | --user] <path/user.yaml> '
+										   '[-p | --partner] <path/partner.yaml> | --manifest <path/pairs.yaml>) '
 										   '[-s | --split] '
 										   '[-i | --push] '
 										   '[-iu | --push-uncleared] '
 										   '[-b | --balances]'
 										   '[-d | --delete-orphans]'
-										   '[--since "YYYY-mm-dd"]')
-	parser.add_argument("-u", "--user", type=str, required=True,
+										   '[--since "YYYY-mm-dd"]'
+										   '[--cache-dir <path>]'
+										   '[--metrics <path>] [--summary <path>]'
+										   '[--watch [--interval <seconds>]]'
+										   '[--serve [--host <host>] [--port <port>]]')
+	parser.add_argument("-u", "--user", type=str,
 						help="path of config YAML to use for user")
-	parser.add_argument("-p", "--partner", type=str, required=True,
+	parser.add_argument("-p", "--partner", type=str,
 						help="path of config YAML to use for partner")
+	parser.add_argument("--manifest", type=str,
+						help="path of YAML with pairs to sync instead of single user and partner, prints JSON report")
 	parser.add_argument("-s", "--split", action="store_true",
 						help="split transactions from account")
 	parser.add_argument("-i", "--push", action="store_true",
@@ -40,31 +61,91 @@ if __name__ == '__main__':
 						help='provide optional date if library should use something else than 30 days default')
 	parser.add_argument('-iu', "--push-uncleared", type=str,
 						help='push split transactions to partner account including uncleared transactions')
+	parser.add_argument("--cache-dir", type=str,
+						help='directory in which fetched transactions are cached to only fetch changes on next run')
+	parser.add_argument("--metrics", type=str,
+						help='path to write request and phase metrics to in the OpenMetrics text format after the run')
+	parser.add_argument("--summary", type=str,
+						help='path to write request and phase metrics to as JSON run summary after the run')
+	parser.add_argument("--watch", action="store_true",
+						help='keep running and poll for changes, run the given steps only if something changed')
+	parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL,
+						help='seconds between polls in watch mode')
+	parser.add_argument("--serve", action="store_true",
+						help='keep running and sync a pair on POST /sync/<pair name>, bursts are merged into one run')
+	parser.add_argument("--host", type=str, default='127.0.0.1',
+						help='host to listen on with --serve')
+	parser.add_argument("--port", type=int, default=DEFAULT_PORT,
+						help='port to listen on with --serve')
 
 	args = parser.parse_args()
 
+	if not args.manifest and not (args.user and args.partner):
+		parser.error('either --user and --partner or --manifest are required')
+
 	warnings.showwarning = custom_warn
-	user = User.from_yaml(args.user)
-	partner = User.from_yaml(args.partner)
-	ysb = YnabSplitBudget(user=user, partner=partner)
 
+	steps = [s for s, a in (('split', args.split), ('push', args.push), ('push_uncleared', args.push_uncleared),
+							 ('delete_orphans', args.delete_orphans), ('balances', args.balances)) if a]
+
+	if args.watch and (args.manifest or args.serve):
+		parser.error('--watch can only be used with --user and --partner')
+	if (args.watch or args.serve) and not args.manifest and not steps:
+		parser.error('--watch and --serve need at least one step to run')
+
+	since = None
 	if args.since:
 		try:
-			since = datetime.strptime(args.since, "%Y-%m-%d")
+			since = datetime.strptime(args.since, "%Y-%m-%d").date()
 		except ValueError as e:
 			raise ValueError(f"Incorrect date format {args.since}, should be YYYY-mm-dd") from e
-	else:
-		since = None
-
-	if args.split:
-		ysb.split()
-	if args.push:
-		ysb.push(since=since)
-	elif args.push_uncleared:
-		ysb.push(since=since, include_uncleared=True)
-	if args.delete_orphans:
-		ysb.delete_orphans(since=since)
-	if args.balances:
-		ysb.raise_on_balances_off()
+
+	if args.serve:
+		if args.manifest:
+			orchestrator = Orchestrator.from_yaml(args.manifest, since=since, cache_dir=args.cache_dir)
+			pairs, since = orchestrator.pairs, orchestrator.since
+		else:
+			user = User.from_yaml(args.user)
+			partner = User.from_yaml(args.partner)
+			pairs = [Pair(name=f'{user.name}-{partner.name}', user=user, partner=partner, steps=tuple(steps))]
+			since = since or date.today() - timedelta(days=30)
+		TriggerServer(pairs=pairs, since=since, cache_dir=args.cache_dir, host=args.host,
+					  port=args.port).serve_forever()
+		sys.exit(0)
+
+	metrics = Metrics() if args.metrics or args.summary else None
+
+	if args.manifest:
+		report = Orchestrator.from_yaml(args.manifest, since=since, cache_dir=args.cache_dir,
+										instrumentation=metrics).run()
+		write_metrics(metrics, metrics_path=args.metrics, summary_path=args.summary)
+		json.dump(report.to_dict(), sys.stdout, indent=2)
+		sys.exit(1 if report.failed else 0)
+
+	user = User.from_yaml(args.user)
+	partner = User.from_yaml(args.partner)
+	since = since or date.today() - timedelta(days=30)
+
+	ysb = YnabSplitBudget(user=user, partner=partner, since=since, cache_dir=args.cache_dir,
+						  instrumentation=metrics)
+
+	try:
+		if args.watch:
+			Watcher(split_budget=ysb, steps=steps, interval=args.interval).watch()
+			sys.exit(0)
+
+		with ysb.run():
+			if args.split:
+				ysb.split()
+			if args.push:
+				ysb.push()
+			elif args.push_uncleared:
+				ysb.push(include_uncleared=True)
+			if args.delete_orphans:
+				ysb.delete_orphans()
+			if args.balances:
+				ysb.raise_on_balances_off()
+	finally:
+		write_metrics(metrics, metrics_path=args.metrics, summary_path=args.summary)
 
 
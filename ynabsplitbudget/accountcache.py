@@ -0,0 +1,71 @@
+import threading
+import time
+from typing import Dict, Tuple, Optional, Callable, TYPE_CHECKING
+
+from ynabsplitbudget.client import Client
+from ynabsplitbudget.models.account import Account
+from ynabsplitbudget.transactionstore import TransactionStore
+
+if TYPE_CHECKING:
+	from ynabsplitbudget.models.user import User
+
+# names and transfer payees of accounts hardly ever change
+ACCOUNT_TTL = 24 * 60 * 60
+
+
+class AccountCache:
+	"""Keeps account metadata fetched from YNAB for a TTL, so that it isn't requested again for every split. On a miss
+	only the account endpoint and the budget summaries get requested. If a store is given, accounts are persisted in
+	it between runs. The cache shared by all users of the process is available via :meth:`shared`.
+
+	:param store: optional local store in which accounts are persisted
+	:param ttl: Seconds after which an account gets fetched again
+	:param clock: Function returning the current time in seconds
+	"""
+	_shared: Optional['AccountCache'] = None
+	_shared_lock = threading.Lock()
+
+	def __init__(self, store: Optional[TransactionStore] = None, ttl: float = ACCOUNT_TTL,
+				 clock: Callable[[], float] = time.time):
+		self.store = store
+		self.ttl = ttl
+		self._clock = clock
+		self._accounts: Dict[Tuple[str, str], Tuple[Account, float]] = {}
+		self._lock = threading.Lock()
+
+	@classmethod
+	def shared(cls) -> 'AccountCache':
+		with cls._shared_lock:
+			if cls._shared is None:
+				cls._shared = cls()
+			return cls._shared
+
+	def fetch(self, user: 'User') -> Account:
+		"""Returns account of the user from the cache, fetches it from YNAB if it is missing or expired
+
+		:raises BudgetNotFound: if budget of user doesn't exist
+		:raises AccountNotFound: if account of user doesn't exist in the budget
+		"""
+		key = (user.budget_id, user.account_id)
+		with self._lock:
+			entry = self._accounts.get(key)
+		if entry is None and self.store:
+			entry = self.store.load_account(*key)
+		if entry is None or self._clock() - entry[1] >= self.ttl:
+			client = Client(token=user.token, user_name=user.name, budget_id=user.budget_id,
+							account_id=user.account_id)
+			entry = (client.fetch_single_account(budget_id=user.budget_id, account_id=user.account_id), self._clock())
+			if self.store:
+				self.store.save_account(*entry)
+		with self._lock:
+			self._accounts[key] = entry
+		return entry[0]
+
+	def invalidate(self, budget_id: Optional[str] = None, account_id: Optional[str] = None) -> None:
+		"""Drops cached accounts so that they get fetched again, all of them if neither budget nor account is given"""
+		with self._lock:
+			for key in [k for k in self._accounts
+						if budget_id in (None, k[0]) and account_id in (None, k[1])]:
+				del self._accounts[key]
+		if self.store:
+			self.store.delete_accounts(budget_id=budget_id, account_id=account_id)
@@ -1,10 +1,14 @@
 from datetime import date
-from typing import List
+from typing import List, Dict, Optional, Callable
+
+from requests import Session
 
 from ynabtransactionadjuster import Adjuster, Credentials, ModifierSubTransaction
 from ynabtransactionadjuster.models import Transaction, Modifier
 
+from ynabsplitbudget.models.transaction import RootTransaction
 from ynabsplitbudget.splitparser import SplitParser
+from ynabsplitbudget.transactionbuilder import TransactionBuilder
 
 
 class ReconcileAdjuster(Adjuster):
@@ -21,8 +25,8 @@ class ReconcileAdjuster(Adjuster):
 
 class ClearAdjuster(Adjuster):
 
-	def __init__(self, credentials: Credentials, split_transaction_ids: List[str]):
-		super().__init__(credentials=credentials)
+	def __init__(self, credentials: Credentials, split_transaction_ids: List[str], session: Optional[Session] = None):
+		super().__init__(credentials=credentials, session=session)
 		self.split_transaction_ids = split_transaction_ids
 
 	def filter(self, transactions: List[Transaction]) -> List[Transaction]:
@@ -38,27 +42,54 @@ class ClearAdjuster(Adjuster):
 
 
 class SplitAdjuster(Adjuster):
-
-	def __init__(self, credentials: Credentials, flag_color: str, transfer_payee_id: str, account_id: str, since: date):
-		super().__init__(credentials=credentials)
+	"""
+	:param transaction_dicts: optional function returning the transaction dicts of the budget, e.g. from the snapshot
+	of a client, instead of fetching the whole budget via ynabtransactionadjuster
+	"""
+
+	def __init__(self, credentials: Credentials, flag_color: str, transfer_payee_id: str, account_id: str, since: date,
+				 session: Optional[Session] = None, transaction_dicts: Optional[Callable[[], List[dict]]] = None):
+		super().__init__(credentials=credentials, session=session)
 		self.flag_color = flag_color
 		self.transfer_payee_id = transfer_payee_id
 		self.account_id = account_id
 		self.since = since
+		self._transaction_dicts = transaction_dicts
+		self._split_amounts: Dict[str, int] = dict()
+
+	@property
+	def transactions(self) -> List[Transaction]:
+		if self._transaction_dicts is None:
+			return super().transactions
+		return [Transaction.from_dict(t) for t in self._transaction_dicts() if t['deleted'] is False]
 
 	def filter(self, transactions: List[Transaction]) -> List[Transaction]:
-		return [t for t in transactions if t.cleared in ('cleared', 'reconciled')
-				and t.approved
-				and t.flag_color == self.flag_color
-				and not t.subtransactions
-				and not t.account.id == self.account_id
-				and t.transaction_date >= self.since
-				and t.transfer_transaction_id is None]
+		filtered = [t for t in transactions if t.cleared in ('cleared', 'reconciled')
+					and t.approved
+					and t.flag_color == self.flag_color
+					and not t.subtransactions
+					and not t.account.id == self.account_id
+					and t.transaction_date >= self.since
+					and t.transfer_transaction_id is None]
+		split_amounts = SplitParser.parse_many(filtered)
+		self._split_amounts = dict(zip([t.id for t in filtered], split_amounts))
+		return filtered
 
 	def adjust(self, original: Transaction, modifier: Modifier) -> Modifier:
-		split_amount = SplitParser().parse_split(transaction=original)
+		split_amount = self._split_amounts.get(original.id)
+		if split_amount is None:
+			split_amount = SplitParser.parse_split(transaction=original)
 		s1 = ModifierSubTransaction(amount=split_amount, payee=self.payees.fetch_by_id(self.transfer_payee_id),
 									memo=f"{original.payee.name} | {original.memo}")
 		s2 = ModifierSubTransaction(amount=original.amount - split_amount, category=original.category, memo=original.memo)
 		modifier.subtransactions = [s1, s2]
 		return modifier
+
+	def build_roots(self, transactions: List[Transaction]) -> List[RootTransaction]:
+		"""Builds the roots YNAB created in the split account for the transfer subtransactions of the split
+		transactions returned by :meth:`update`, with the payee of the split transaction like the payee lookup does"""
+		return [TransactionBuilder.build_root({'id': st.transfer_transaction_id, 'memo': st.memo,
+											   'payee_name': t.payee.name, 'amount': -st.amount,
+											   'account_id': self.account_id}, transaction_date=t.transaction_date)
+				for t in transactions for st in t.subtransactions
+				if st.payee.id == self.transfer_payee_id and st.transfer_transaction_id]
@@ -0,0 +1,177 @@
+import asyncio
+from datetime import date
+from typing import List, Union, Tuple, Optional, Dict
+
+import httpx
+
+from ynabsplitbudget.client import BaseClient, YNAB_BASE_URL, MAX_DELETE_WORKERS, INSERT_CHUNK_SIZE, \
+    MAX_INSERT_WORKERS
+from ynabsplitbudget.models.insertresult import InsertResult
+from ynabsplitbudget.models.account import Account
+from ynabsplitbudget.models.transaction import RootTransaction, LookupTransaction, ComplementTransaction, \
+    InsertTransaction
+from ynabsplitbudget.scheduler import RateLimit, RetryPolicy
+from ynabsplitbudget.transactionstore import TransactionStore
+
+
+class SchedulingTransport(httpx.AsyncBaseTransport):
+    """Counterpart of :class:`ynabsplitbudget.scheduler.SchedulingAdapter` for httpx. Waits for a free slot in the
+    rate limit of the token without blocking the event loop and retries throttled and failed requests with backoff.
+
+    :param rate_limit: Rate limit of the token used for the requests
+    :param retry_policy: Retry behaviour to use
+    :param transport: Transport which sends the requests
+    """
+
+    def __init__(self, rate_limit: RateLimit, retry_policy: RetryPolicy = RetryPolicy(),
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.rate_limit = rate_limit
+        self.retry_policy = retry_policy
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        attempt = 0
+        while True:
+            await asyncio.sleep(self.rate_limit.reserve(max_wait=self.retry_policy.max_wait))
+            try:
+                response = await self._transport.handle_async_request(request)
+            except httpx.TransportError as e:
+                sent = not isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                if attempt >= self.retry_policy.retries or not self.retry_policy.retries_error(request.method,
+                                                                                               sent=sent):
+                    raise
+                await asyncio.sleep(self.retry_policy.delay(attempt))
+                attempt += 1
+                continue
+            self.rate_limit.update(response.headers.get('X-Rate-Limit'))
+            if not self.retry_policy.retries_status(request.method, response.status_code) \
+                    or attempt >= self.retry_policy.retries:
+                return response
+            await response.aclose()
+            await asyncio.sleep(self.retry_policy.delay(attempt, response.headers.get('Retry-After')))
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class AsyncClient(BaseClient):
+    """Client with the same methods as :class:`ynabsplitbudget.client.Client` which doesn't block the event loop
+    while waiting for YNAB. Needs the optional httpx dependency (``pip install ynab-split-budget[async]``)."""
+
+    def __init__(self, user_name: str, budget_id: str, account_id: str, token: str,
+                 store: Optional[TransactionStore] = None, retry_policy: RetryPolicy = RetryPolicy()):
+        super().__init__(user_name=user_name, budget_id=budget_id, account_id=account_id, store=store)
+        self.rate_limit = RateLimit.for_token(token)
+        self.session = httpx.AsyncClient(headers={'Authorization': f'Bearer {token}'},
+                                         transport=SchedulingTransport(rate_limit=self.rate_limit,
+                                                                       retry_policy=retry_policy))
+
+    async def fetch_account(self, budget_id: str, account_id: str) -> Account:
+        r = await self.session.get(f'{YNAB_BASE_URL}budgets', params=dict(include_accounts=True))
+        r.raise_for_status()
+        return self._build_account(r.json()['data'], budget_id=budget_id, account_id=account_id)
+
+    async def fetch_roots(self, since: date, include_uncleared: bool) -> List[RootTransaction]:
+        transactions_dicts = await self._fetch_transactions(since=since, account_id=self.account_id)
+        return self._build_roots(transactions_dicts, include_uncleared=include_uncleared)
+
+    async def fetch_lookup(self, since: date) -> List[Union[RootTransaction, LookupTransaction,
+                                                            ComplementTransaction]]:
+        data_dict = await self._fetch_transactions(since=since)
+        return self._build_lookup(data_dict)
+
+    async def fetch_complements(self, since: date) -> List[ComplementTransaction]:
+        transactions_dicts = await self._fetch_transactions(since=since, account_id=self.account_id)
+        return self._build_complements(transactions_dicts)
+
+    async def fetch_transfer_lookup(self, since: date, transaction_ids: List[str]) -> List[LookupTransaction]:
+        responses = await asyncio.gather(*[self._fetch_transactions(since=since, account_id=a)
+                                           for a in self._transfer_scopes(transaction_ids)])
+        return [lu for transactions_dicts in responses for lu in self._build_transfer_lookup(transactions_dicts)]
+
+    async def refresh(self, since: date, account_id: Optional[str] = None) -> None:
+        """Brings snapshot of budget or account in it up to date without building transactions from it"""
+        await self._fetch_transactions(since=since, account_id=account_id)
+
+    async def refresh_transfers(self, since: date, transaction_ids: List[str]) -> None:
+        await asyncio.gather(*[self.refresh(since=since, account_id=a)
+                               for a in self._transfer_scopes(transaction_ids)])
+
+    async def _fetch_transactions(self, since: date, account_id: Optional[str] = None) -> List[dict]:
+        cached = self._cached_transactions(since=since, account_id=account_id)
+        if cached is not None:
+            return cached
+        url, params = self._transactions_request(since=since, account_id=account_id)
+        r = await self.session.get(url, params=params)
+        r.raise_for_status()
+        return self._merge_transactions_response(r.json()['data'], since=since, account_id=account_id)
+
+    async def insert_complements(self, transactions: List[RootTransaction],
+                                 chunk_size: int = INSERT_CHUNK_SIZE) -> List[ComplementTransaction]:
+        return self._raise_on_failed_chunk(await self.insert_chunks(transactions, chunk_size=chunk_size))
+
+    async def insert_chunks(self, transactions: List[RootTransaction], chunk_size: int = INSERT_CHUNK_SIZE,
+                            max_workers: int = MAX_INSERT_WORKERS) -> List[InsertResult]:
+        """Inserts complements in chunks of which up to max_workers are in flight at once. A failing chunk doesn't
+        stop the remaining ones.
+
+        :return: result for each chunk in order of the transactions
+        """
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def insert(chunk: List[InsertTransaction]) -> Tuple[List[dict], Optional[Exception]]:
+            async with semaphore:
+                return await self._insert_chunk(chunk)
+
+        chunks = self._chunks(self._build_insert_transactions(transactions), chunk_size)
+        responses = await asyncio.gather(*[insert(c) for c in chunks])
+        return [self._chunk_result(chunk, *response) for chunk, response in zip(chunks, responses)]
+
+    async def _insert_chunk(self, transactions: List[InsertTransaction]) -> Tuple[List[dict], Optional[Exception]]:
+        data_dicts = []
+        try:
+            while transactions:
+                url, data = self._insert_request(transactions)
+                r = await self.session.post(url, json=dict(transactions=data))
+                r.raise_for_status()
+                data_dicts.append(r.json()['data'])
+                transactions = self._bump_duplicates(transactions, data_dicts[-1]['duplicate_import_ids'])
+        except httpx.HTTPError as e:
+            return data_dicts, e
+        return data_dicts, None
+
+    async def fetch_balance(self) -> int:
+        r = await self.session.get(self._balance_url())
+        r.raise_for_status()
+        return r.json()['data']['account']['balance']
+
+    async def delete_complement(self, transaction_id: str) -> None:
+        r = await self.session.delete(self._transaction_url(transaction_id))
+        r.raise_for_status()
+        self._merge_deletes([transaction_id])
+
+    async def delete_complements(self, transaction_ids: List[str],
+                                 max_workers: int = MAX_DELETE_WORKERS) -> Dict[str, Optional[Exception]]:
+        """Deletes transactions with a bounded number of concurrent requests. A failing request doesn't stop the
+        remaining ones.
+
+        :return: dict with the error for each transaction id, None if the transaction got deleted
+        """
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def delete(transaction_id: str) -> Optional[Exception]:
+            async with semaphore:
+                try:
+                    r = await self.session.delete(self._transaction_url(transaction_id))
+                    r.raise_for_status()
+                except httpx.HTTPError as e:
+                    return e
+
+        errors = await asyncio.gather(*[delete(ti) for ti in transaction_ids])
+        results = dict(zip(transaction_ids, errors))
+        self._merge_deletes([ti for ti, e in results.items() if e is None])
+        return results
+
+    async def aclose(self) -> None:
+        await self.session.aclose()
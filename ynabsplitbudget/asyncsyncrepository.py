@@ -0,0 +1,81 @@
+import asyncio
+from datetime import date
+from typing import List, Optional, Dict
+
+from ynabsplitbudget.asyncclient import AsyncClient
+from ynabsplitbudget.models.transaction import RootTransaction, ComplementTransaction
+from ynabsplitbudget.models.user import User
+from ynabsplitbudget.syncrepository import Reconciliation, PayeeReplacer
+from ynabsplitbudget.transactionstore import TransactionStore
+
+
+class AsyncSyncRepository:
+	"""Awaitable counterpart of :class:`ynabsplitbudget.syncrepository.SyncRepository`. Calls against user and partner
+	budget run concurrently on the event loop."""
+
+	def __init__(self, user: User, partner: User, store: Optional[TransactionStore] = None):
+		self._user = user
+		self._partner = partner
+		self._store = store
+		self._user_client = AsyncClient(token=user.token, budget_id=user.budget_id, account_id=user.account_id,
+										user_name=user.name, store=store)
+		self._partner_client = AsyncClient(token=partner.token, budget_id=partner.budget_id,
+										   account_id=partner.account_id, user_name=partner.name, store=store)
+
+	async def fetch_roots_wo_complement(self, since: date, include_uncleared: bool) -> List[RootTransaction]:
+		if self._store:
+			roots, _ = await asyncio.gather(
+				self._user_client.fetch_roots(since=since, include_uncleared=include_uncleared),
+				self._partner_client.refresh(since, account_id=self._partner.account_id))
+			complement_share_ids = self._store.fetch_share_ids(budget_id=self._partner.budget_id, kind='complement',
+															   account_id=self._partner.account_id)
+			roots_wo_complement = [t for t in roots if t.share_id not in complement_share_ids]
+			await self._user_client.refresh_transfers(since, [t.id for t in roots_wo_complement])
+			pr = self._fetch_stored_payee_replacer(roots_wo_complement)
+		else:
+			roots, complements = await asyncio.gather(
+				self._user_client.fetch_roots(since=since, include_uncleared=include_uncleared),
+				self._partner_client.fetch_complements(since))
+			roots_wo_complement = Reconciliation(roots=roots, complements=complements).unmatched
+			pr = PayeeReplacer(lookup=await self._user_client.fetch_transfer_lookup(
+				since, [t.id for t in roots_wo_complement]))
+		return [pr.replace(t) for t in roots_wo_complement]
+
+	async def insert_complements(self, transactions: List[RootTransaction]) -> List[ComplementTransaction]:
+		return await self._partner_client.insert_complements(transactions)
+
+	async def delete_complements(self, transactions: List[ComplementTransaction]) -> Dict[str, Optional[Exception]]:
+		return await self._partner_client.delete_complements([t.id for t in transactions])
+
+	async def find_orphaned_partner_complements(self, since: date) -> List[ComplementTransaction]:
+		if self._store:
+			await asyncio.gather(self._user_client.refresh(since, account_id=self._user.account_id),
+								 self._partner_client.refresh(since, account_id=self._partner.account_id))
+			current_complements = self._store.fetch_complements(budget_id=self._partner.budget_id, since=since,
+																account_id=self._partner.account_id)
+			root_share_ids = self._store.fetch_share_ids(budget_id=self._user.budget_id, kind='root',
+														 account_id=self._user.account_id)
+			orphaned = [c for c in current_complements if c.share_id not in root_share_ids]
+			# complements of deleted roots are found across the whole history, not only since the given date
+			orphaned_ids = {c.id for c in orphaned}
+			return orphaned + [c for c in self._store.fetch_tombstoned_complements(
+				budget_id=self._partner.budget_id, account_id=self._partner.account_id,
+				root_budget_id=self._user.budget_id, root_account_id=self._user.account_id)
+							   if c.id not in orphaned_ids]
+		current_roots, current_complements = await asyncio.gather(
+			self._user_client.fetch_roots(since=since, include_uncleared=True),
+			self._partner_client.fetch_complements(since=since))
+		return Reconciliation(roots=current_roots, complements=current_complements).orphaned
+
+	async def fetch_balances(self) -> (int, int):
+		user_balance, partner_balance = await asyncio.gather(self._user_client.fetch_balance(),
+															 self._partner_client.fetch_balance())
+		return user_balance, partner_balance
+
+	async def aclose(self) -> None:
+		await asyncio.gather(self._user_client.aclose(), self._partner_client.aclose())
+
+	def _fetch_stored_payee_replacer(self, transactions: List[RootTransaction]) -> PayeeReplacer:
+		return PayeeReplacer.from_payee_names(self._store.fetch_transfer_payees(
+			budget_id=self._user.budget_id, account_id=self._user.account_id,
+			transaction_ids=[t.id for t in transactions]))
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from datetime import date
+from pathlib import Path
+from typing import List, Optional, AsyncIterator
+
+from ynabtransactionadjuster import Transaction, ModifiedTransaction
+
+from ynabsplitbudget.asyncsyncrepository import AsyncSyncRepository
+from ynabsplitbudget.models.exception import BalancesDontMatch, OrphansNotDeleted
+from ynabsplitbudget.models.transaction import ComplementTransaction, RootTransaction
+from ynabsplitbudget.models.user import User
+from ynabsplitbudget.transactionstore import TransactionStore
+from ynabsplitbudget.ynabsplitbudget import YnabSplitBudget
+
+
+class AsyncYnabSplitBudget:
+	"""Awaitable interface to YNAB Split Budget with the split, push, balance check and orphan deletion methods of
+	:class:`ynabsplitbudget.ynabsplitbudget.YnabSplitBudget`. ``sync``, ``find_balance_drift`` and ``fetch_changes``
+	are only available on the synchronous class. Many pairs of users can be synced concurrently on one
+	event loop. Needs the optional httpx dependency (``pip install ynab-split-budget[async]``).
+
+	:ivar user: User to use for instance
+	:ivar partner: Partner to use for instance
+	:ivar since: date from which onwards to apply splitting
+	:ivar store: optional local store in which transactions and server knowledge are persisted between runs so that
+	only changed transactions get fetched from YNAB
+	"""
+	def __init__(self, user: User, partner: User, since: date, cache_dir: Optional[str] = None):
+		self.user = user
+		self.partner = partner
+		self.since = since
+		self.store = TransactionStore(str(Path(cache_dir) / 'transactions.sqlite')) if cache_dir else None
+		self._repository: Optional[AsyncSyncRepository] = None
+
+	@asynccontextmanager
+	async def run(self) -> AsyncIterator['AsyncYnabSplitBudget']:
+		"""Context in which all calls share the transactions fetched from YNAB, so that each transactions endpoint
+		gets requested at most once. Balances are still requested on each call. Without it each call fetches current
+		data on its own."""
+		self._repository = AsyncSyncRepository(user=self.user, partner=self.partner, store=self.store)
+		try:
+			yield self
+		finally:
+			await self._repository.aclose()
+			self._repository = None
+
+	async def push(self, include_uncleared: bool = False) -> List[ComplementTransaction]:
+		"""Pushes transactions from user split account to partner split account.
+
+		:param include_uncleared: If set to True, will also consider uncleared transactions
+		:return: List of inserted transactions in partner split account
+		"""
+		async with self._use_repository() as repo:
+			transactions = await repo.fetch_roots_wo_complement(since=self.since, include_uncleared=include_uncleared)
+			complement_transactions = await repo.insert_complements(transactions)
+		logging.getLogger(__name__).info(f'inserted {len(complement_transactions)} complements into account of '
+										 f'{self.partner.name}')
+		return complement_transactions
+
+	async def push_preview(self, include_uncleared: bool = False) -> List[RootTransaction]:
+		"""Previews transactions to be pushed from user split account to partner split account.
+
+		:param include_uncleared: If set to True, will also consider uncleared transactions
+		:return: List of inserted transactions in partner split account
+		"""
+		async with self._use_repository() as repo:
+			transactions = await repo.fetch_roots_wo_complement(since=self.since, include_uncleared=include_uncleared)
+		logging.getLogger(__name__).info(f'would insert {len(transactions)} complements into account of '
+										 f'{self.partner.name}')
+		return transactions
+
+	async def split(self) -> List[Transaction]:
+		"""Splits transactions (by default 50%) into subtransaction with original category and transfer subtransaction
+		to split account. As the underlying adjuster is synchronous it runs in the default executor.
+
+		:return: list with split transactions
+		"""
+		return await self._run_in_executor(YnabSplitBudget.split)
+
+	async def split_preview(self) -> List[ModifiedTransaction]:
+		"""Previews transactions to be split without updating the transactions in YNAB.
+
+		:return: list with modified transactions
+		"""
+		return await self._run_in_executor(YnabSplitBudget.split_preview)
+
+	async def raise_on_balances_off(self):
+		"""Evaluates cleared balances in both accounts
+
+		:raises BalancesDontMatch: if cleared amounts in both accounts don't match
+		"""
+		async with self._use_repository() as repo:
+			user_balance, partner_balance = await repo.fetch_balances()
+		if user_balance + partner_balance != 0:
+			raise BalancesDontMatch({'user': {'name': self.user.name,
+											  'balance': user_balance},
+									 'partner': {'name': self.partner.name,
+												 'balance': partner_balance}})
+
+	async def delete_orphans(self) -> List[ComplementTransaction]:
+		"""Delete orphaned transactions in partner account. Deletion continues if single transactions can't be deleted.
+
+		:return: List of deleted transactions
+		:raises OrphansNotDeleted: if some of the orphaned transactions couldn't be deleted
+		"""
+		async with self._use_repository() as repo:
+			orphaned_complements = await repo.find_orphaned_partner_complements(self.since)
+			errors = await repo.delete_complements(orphaned_complements)
+		deleted = [oc for oc in orphaned_complements if errors[oc.id] is None]
+		logging.getLogger(__name__).info(f'deleted {len(deleted)} orphaned complements in account of '
+										 f'{self.partner.name}')
+		if deleted:
+			logging.getLogger(__name__).info(deleted)
+		failed = {oc.id: str(errors[oc.id]) for oc in orphaned_complements if errors[oc.id] is not None}
+		if failed:
+			raise OrphansNotDeleted({'deleted': deleted, 'failed': failed})
+		return deleted
+
+	@asynccontextmanager
+	async def _use_repository(self) -> AsyncIterator[AsyncSyncRepository]:
+		if self._repository:
+			yield self._repository
+			return
+		repo = AsyncSyncRepository(user=self.user, partner=self.partner, store=self.store)
+		try:
+			yield repo
+		finally:
+			await repo.aclose()
+
+	async def _run_in_executor(self, func):
+		split_budget = YnabSplitBudget(user=self.user, partner=self.partner, since=self.since)
+		return await asyncio.get_running_loop().run_in_executor(None, func, split_budget)
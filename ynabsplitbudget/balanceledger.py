@@ -0,0 +1,97 @@
+import bisect
+from heapq import merge
+from typing import Dict, List, Optional, Iterable, Set
+
+from ynabsplitbudget.models.drift import BalanceDrift
+from ynabsplitbudget.transactionbuilder import TransactionBuilder, IMPORT_ID_PATTERN, parse_date
+
+
+class BalanceLedger:
+	"""Sums of the transactions of an account per date. It gets updated with changed transactions only, so that the
+	running balance of an account doesn't need to be recalculated from all of its transactions.
+
+	:ivar sums: Sum of the transaction amounts in milliunits per date (YYYY-mm-dd)
+	:ivar dates: Dates with transactions in ascending order
+	"""
+
+	def __init__(self):
+		self.sums: Dict[str, int] = {}
+		self.dates: List[str] = []
+		self._transactions: Dict[str, Dict[str, dict]] = {}
+
+	@classmethod
+	def from_transactions(cls, transactions: Iterable[dict]) -> 'BalanceLedger':
+		ledger = cls()
+		for t in transactions:
+			ledger.add(t)
+		return ledger
+
+	@property
+	def total(self) -> int:
+		return sum(self.sums.values())
+
+	def add(self, t: dict) -> None:
+		transactions = self._transactions.get(t['date'])
+		if transactions is None:
+			transactions = self._transactions[t['date']] = {}
+			self.sums[t['date']] = 0
+			bisect.insort(self.dates, t['date'])
+		transactions[t['id']] = t
+		self.sums[t['date']] += t['amount']
+
+	def remove(self, t: dict) -> None:
+		transactions = self._transactions.get(t['date'], {})
+		if transactions.pop(t['id'], None) is None:
+			return
+		self.sums[t['date']] -= t['amount']
+		if not transactions:
+			del self._transactions[t['date']]
+			del self.sums[t['date']]
+			del self.dates[bisect.bisect_left(self.dates, t['date'])]
+
+	def transactions_on(self, date_str: str) -> List[dict]:
+		return list(self._transactions.get(date_str, {}).values())
+
+
+def find_drift(user_ledger: BalanceLedger, partner_ledger: BalanceLedger, user_account_id: str,
+			   partner_account_id: str) -> Optional[BalanceDrift]:
+	"""Finds the first date up to which the running balances of the user and the partner split account don't add up to
+	zero and the transactions on that date which aren't balanced by the other account
+
+	:return: the drift, None if the running balances add up to zero on every date
+	"""
+	cumulative = 0
+	for date_str in _unique(merge(user_ledger.dates, partner_ledger.dates)):
+		cumulative += user_ledger.sums.get(date_str, 0) + partner_ledger.sums.get(date_str, 0)
+		if cumulative:
+			user_transactions = user_ledger.transactions_on(date_str)
+			partner_transactions = partner_ledger.transactions_on(date_str)
+			unbalanced = _unbalanced_share_ids(user_transactions + partner_transactions)
+			return BalanceDrift(
+				transaction_date=parse_date(date_str), difference=cumulative,
+				user_transactions=[TransactionBuilder(account_id=user_account_id).build(t)
+								   for t in user_transactions if _share_id(t) in unbalanced],
+				partner_transactions=[TransactionBuilder(account_id=partner_account_id).build(t)
+									  for t in partner_transactions if _share_id(t) in unbalanced])
+
+
+def _unique(dates: Iterable[str]) -> Iterable[str]:
+	previous = None
+	for d in dates:
+		if d != previous:
+			yield d
+		previous = d
+
+
+def _share_id(t: dict) -> str:
+	"""Returns share_id which roots and their complements have in common"""
+	if t['import_id'] and 's||' in t['import_id']:
+		return IMPORT_ID_PATTERN.search(t['import_id']).groups()[0]
+	return TransactionBuilder.share_id(t['id'])
+
+
+def _unbalanced_share_ids(transactions: List[dict]) -> Set[str]:
+	sums: Dict[str, int] = {}
+	for t in transactions:
+		sums[_share_id(t)] = sums.get(_share_id(t), 0) + t['amount']
+	return {s for s, amount in sums.items() if amount}
@@ -1,91 +1,254 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import date, datetime
-from typing import List, Union, Tuple
-from unicodedata import category
+from typing import List, Union, Tuple, Optional, Dict, Set, Iterator
 
 import requests
-from requests import HTTPError
 
+from ynabsplitbudget.balanceledger import BalanceLedger
+from ynabsplitbudget.instrumentation import Instrumentation
 from ynabsplitbudget.models.transaction import InsertTransaction
 from ynabsplitbudget.models.account import Account
 from ynabsplitbudget.models.exception import BudgetNotFound, AccountNotFound
+from ynabsplitbudget.models.insertresult import InsertResult
 from ynabsplitbudget.transactionbuilder import TransactionBuilder
 from ynabsplitbudget.models.transaction import RootTransaction, LookupTransaction, ComplementTransaction
+from ynabsplitbudget.scheduler import RateLimit, RetryPolicy
+from ynabsplitbudget.sessions import SessionRegistry
+from ynabsplitbudget.snapshot import Snapshot
+from ynabsplitbudget.streaming import TransactionStream, STREAM_CHUNK_SIZE
+from ynabsplitbudget.transactionstore import TransactionStore
 
 YNAB_BASE_URL = 'https://api.ynab.com/v1/'
+MAX_DELETE_WORKERS = 5
+INSERT_CHUNK_SIZE = 200
+MAX_INSERT_WORKERS = 2
+# above this number of accounts one request for the whole budget is cheaper than one request per account
+MAX_TRANSFER_ACCOUNTS = 2
+# running balances cover the whole history of the split accounts
+LEDGER_SINCE = date(1970, 1, 1)
 
 
-@dataclass
-class Client:
+class BaseClient:
+    """Holds the snapshots and builds requests and results independent of the HTTP library used by the concrete
+    client.
+
+    :param shared_with: Client for another account in the same budget whose snapshots get shared, so that the budget
+    is fetched only once for both
+    """
 
-    def __init__(self, user_name: str, budget_id: str, account_id: str, token: str):
-        self.session = requests.Session()
-        self.session.headers.update({'Authorization': f'Bearer {token}'})
+    def __init__(self, user_name: str, budget_id: str, account_id: str, store: Optional[TransactionStore] = None,
+                 shared_with: Optional['BaseClient'] = None):
         self.user_name = user_name
         self.budget_id = budget_id
         self.account_id = account_id
         self.transaction_builder = TransactionBuilder(account_id=self.account_id)
+        self.store = store
+        if shared_with:
+            self._snapshots, self._fresh, self._lock = shared_with._snapshots, shared_with._fresh, shared_with._lock
+        else:
+            self._snapshots: Dict[Optional[str], Snapshot] = {}
+            self._fresh: Set[Optional[str]] = set()
+            self._lock = threading.RLock()
 
-    def fetch_account(self, budget_id: str, account_id: str) -> Account:
-        r = self.session.get(f'{YNAB_BASE_URL}budgets', params=dict(include_accounts=True))
-        r.raise_for_status()
-        data_dict = r.json()['data']
+    def expire(self) -> None:
+        """Marks snapshots as outdated so that they get refreshed with the next fetch"""
+        self._fresh.clear()
 
+    def _build_account(self, data_dict: dict, budget_id: str, account_id: str) -> Account:
+        budget = self._find_budget(data_dict, budget_id=budget_id)
         try:
-            budget = next(b for b in data_dict['budgets'] if b['id'] == budget_id)
+            account = next(a for a in budget['accounts'] if a['id'] == account_id and a['deleted'] is False)
         except StopIteration:
-            raise BudgetNotFound(f"No budget with id '{budget_id} found for {self.user_name}'")
+            raise self._account_not_found(budget, account_id=account_id)
+        return self._account(budget, account)
 
+    def _find_budget(self, data_dict: dict, budget_id: str) -> dict:
         try:
-            account = next(a for a in budget['accounts'] if a['id'] == account_id and a['deleted'] is False)
+            return next(b for b in data_dict['budgets'] if b['id'] == budget_id)
         except StopIteration:
-            raise AccountNotFound(f"No Account with id '{account_id}' fund in budget '{budget['name']} "
-                                  f"for user {self.user_name}'")
+            raise BudgetNotFound(f"No budget with id '{budget_id} found for {self.user_name}'")
+
+    def _account_not_found(self, budget: dict, account_id: str) -> AccountNotFound:
+        return AccountNotFound(f"No Account with id '{account_id}' fund in budget '{budget['name']} "
+                               f"for user {self.user_name}'")
 
-        return Account(budget_id=budget_id,
+    @staticmethod
+    def _account(budget: dict, account: dict) -> Account:
+        return Account(budget_id=budget['id'],
                        budget_name=budget['name'],
-                       account_id=account_id,
+                       account_id=account['id'],
                        account_name=account['name'],
                        transfer_payee_id=account['transfer_payee_id'],
                        currency=budget['currency_format']['iso_code'])
 
-    def fetch_roots(self, since: date, include_uncleared: bool) -> List[RootTransaction]:
-        url = f'{YNAB_BASE_URL}budgets/{self.budget_id}/accounts/{self.account_id}/transactions'
-        r = self.session.get(url, params={'since_date': datetime.strftime(since, '%Y-%m-%d')})
-        r.raise_for_status()
-        transactions_dicts = r.json()['data']['transactions']
-        transactions_filtered = [t for t in transactions_dicts if t['deleted'] is False
-                              and (t['import_id'] is None or 's||' not in t['import_id'])
-                              and t['payee_name'] != 'Reconciliation Balance Adjustment']
+    def _build_roots(self, transactions_dicts: List[dict], include_uncleared: bool) -> List[RootTransaction]:
+        transactions_filtered = (t for t in transactions_dicts if t['deleted'] is False
+                                 and (t['import_id'] is None or 's||' not in t['import_id'])
+                                 and t['payee_name'] != 'Reconciliation Balance Adjustment')
         if not include_uncleared:
-            transactions_filtered = [t for t in transactions_filtered  if not t['cleared'] == 'uncleared']
+            transactions_filtered = (t for t in transactions_filtered if not t['cleared'] == 'uncleared')
         transactions = [self.transaction_builder.build_root(t_dict=t) for t in transactions_filtered]
         return transactions
 
-    def fetch_lookup(self, since: date) -> List[Union[RootTransaction, LookupTransaction, ComplementTransaction]]:
-        url = f'{YNAB_BASE_URL}budgets/{self.budget_id}/transactions'
-        r = self.session.get(url, params={'since_date': datetime.strftime(since, '%Y-%m-%d')})
-        r.raise_for_status()
-        data_dict = r.json()['data']['transactions']
-        transactions = [self.transaction_builder.build(t_dict=t) for t in data_dict]
-        return transactions
+    def _build_lookup(self, transactions_dicts: List[dict]) -> List[Union[RootTransaction, LookupTransaction,
+                                                                           ComplementTransaction]]:
+        return [self.transaction_builder.build(t_dict=t) for t in transactions_dicts]
+
+    def _build_complements(self, transactions_dicts: List[dict]) -> List[ComplementTransaction]:
+        return [self.transaction_builder.build_complement(t) for t in transactions_dicts
+                if t['import_id'] and 's||' in t['import_id']]
+
+    def _build_transfer_lookup(self, transactions_dicts: List[dict]) -> List[LookupTransaction]:
+        return [self.transaction_builder.build_lookup(t) for t in transactions_dicts
+                if not (t['import_id'] and 's||' in t['import_id']) and t['account_id'] != self.account_id]
+
+    def _transfer_scopes(self, transaction_ids: List[str]) -> List[Optional[str]]:
+        """Returns scopes to fetch for looking up the transfers among the given transactions of the split account.
+        These are the accounts the transfers come from, or the whole budget if there are more than
+        :data:`MAX_TRANSFER_ACCOUNTS` of them or its snapshot is fresh anyway."""
+        account_ids = sorted(self._transfer_account_ids(transaction_ids))
+        if len(account_ids) > MAX_TRANSFER_ACCOUNTS or (account_ids and None in self._fresh):
+            return [None]
+        return account_ids
+
+    def _transfer_account_ids(self, transaction_ids: List[str]) -> Set[str]:
+        """Returns ids of the accounts holding the other side of the transfers among the given transactions of the
+        split account. They are looked up in the snapshot of the whole budget if that one is fresh, as transactions
+        of the split account are taken from it then."""
+        with self._lock:
+            snapshot = self._load_snapshot(self.account_id)
+            budget_snapshot = self._snapshots.get(None) if None in self._fresh else None
+            t_dicts = [snapshot.transactions.get(ti) or (budget_snapshot and budget_snapshot.transactions.get(ti))
+                       for ti in transaction_ids]
+        return {t['transfer_account_id'] for t in t_dicts
+                if t and t.get('transfer_transaction_id') and t.get('transfer_account_id')} - {self.account_id}
 
-    def insert_complements(self, transactions: List[RootTransaction]) -> List[ComplementTransaction]:
-        insert_transactions = [InsertTransaction(id=t.id,
-                                                 amount=t.amount,
-                                                 share_id=t.share_id,
-                                                 memo=t.memo,
-                                                 transaction_date=t.transaction_date,
-                                                 payee_name=t.payee_name,
-                                                 account_id=t.account_id,
-                                                 iteration=0) for t in transactions]
-        complements, duplicates = self._insert(insert_transactions)
-        while duplicates:
-            complements_d, duplicates = self._insert_duplicates(insert_transactions, duplicates)
-            complements += complements_d
-        return complements
-
-    def _insert(self, transactions: List[InsertTransaction]) -> Tuple[List[ComplementTransaction], List[str]]:
+    def _cached_transactions(self, since: date, account_id: Optional[str]) -> Optional[List[dict]]:
+        """Returns transactions from snapshot if it has already been refreshed since the client got expired.
+        Transactions of an account are taken from the snapshot of the whole budget if that one is fresh."""
+        snapshot = self._load_snapshot(account_id, since=since)
+        if snapshot.covers(since) and account_id in self._fresh:
+            return snapshot.transactions_since(since)
+        budget_snapshot = self._snapshots.get(None)
+        if account_id is not None and None in self._fresh and budget_snapshot and budget_snapshot.covers(since) \
+                and not budget_snapshot.misses(since):
+            return [t for t in budget_snapshot.transactions_since(since) if t['account_id'] == account_id]
+
+    def _transactions_request(self, since: date, account_id: Optional[str]) -> Tuple[str, dict]:
+        """Returns url and params for fetching the transactions. If a snapshot with server knowledge exists for the
+        scope only changed transactions are requested, otherwise the snapshot gets reset."""
+        snapshot = self._load_snapshot(account_id, since=since)
+        if snapshot.covers(since):
+            params = {'since_date': datetime.strftime(snapshot.since, '%Y-%m-%d'),
+                      'last_knowledge_of_server': snapshot.server_knowledge}
+        else:
+            self._snapshots[account_id] = Snapshot(budget_id=self.budget_id, account_id=account_id, since=since,
+                                                   iterations=snapshot.iterations, reset=True)
+            params = {'since_date': datetime.strftime(since, '%Y-%m-%d')}
+        account_part_url = f'accounts/{account_id}/' if account_id else ''
+        return f'{YNAB_BASE_URL}budgets/{self.budget_id}/{account_part_url}transactions', params
+
+    def _merge_transactions_response(self, data_dict: Union[dict, TransactionStream], since: date,
+                                     account_id: Optional[str]) -> List[dict]:
+        """Merges response into snapshot and returns the transactions. Full responses are returned as they are.
+        Streamed responses are merged while they are parsed and returned from the snapshot."""
+        snapshot = self._snapshots[account_id]
+        delta = snapshot.server_knowledge is not None
+        if isinstance(data_dict, TransactionStream):
+            snapshot.merge(data_dict, server_knowledge=snapshot.server_knowledge)
+            snapshot.server_knowledge = data_dict.server_knowledge
+        else:
+            snapshot.merge(data_dict['transactions'], server_knowledge=data_dict.get('server_knowledge'))
+        self._save(snapshot)
+        self._fresh.add(account_id)
+        if delta or isinstance(data_dict, TransactionStream):
+            return snapshot.transactions_since(since)
+        return data_dict['transactions']
+
+    def _merge(self, transactions: List[dict]) -> None:
+        """Merges transactions changed by this client into the fetched snapshots"""
+        with self._lock:
+            for account_id, snapshot in self._snapshots.items():
+                if snapshot.since is None:
+                    continue
+                snapshot.merge([t for t in transactions if account_id is None or t.get('account_id') == account_id],
+                               server_knowledge=snapshot.server_knowledge)
+                self._save(snapshot)
+
+    def _save(self, snapshot: Snapshot) -> None:
+        """Saves snapshot to the store. Without store the changes are only needed by it, so they get cleared."""
+        if self.store:
+            self.store.save(snapshot)
+        else:
+            snapshot.clear_changes()
+
+    def _load_snapshot(self, account_id: Optional[str], since: Optional[date] = None) -> Snapshot:
+        """Returns snapshot of the budget or account. Only transactions since the given date are loaded from the
+        store, the snapshot gets loaded again if earlier ones are needed later on."""
+        snapshot = self._snapshots.get(account_id)
+        if snapshot is None or (self.store and since is not None and snapshot.misses(since)):
+            if self.store:
+                self._snapshots[account_id] = self.store.load(budget_id=self.budget_id, account_id=account_id,
+                                                              since=since)
+            else:
+                self._snapshots[account_id] = Snapshot(budget_id=self.budget_id, account_id=account_id)
+        return self._snapshots[account_id]
+
+    def _build_insert_transactions(self, transactions: List[RootTransaction]) -> List[InsertTransaction]:
+        """Builds transactions to insert with the next free iteration of their share_id as far as it is known from the
+        snapshots, so that YNAB doesn't reject them as duplicates"""
+        iterations = self._known_iterations()
+        return [InsertTransaction(id=t.id,
+                                  amount=t.amount,
+                                  share_id=t.share_id,
+                                  memo=t.memo,
+                                  transaction_date=t.transaction_date,
+                                  payee_name=t.payee_name,
+                                  account_id=t.account_id,
+                                  iteration=iterations.get(t.share_id, -1) + 1) for t in transactions]
+
+    def _known_iterations(self) -> Dict[str, int]:
+        """Returns highest iteration of import_ids used for each share_id as far as it is known from the snapshots"""
+        iterations = dict()
+        for snapshot in self._snapshots.values():
+            for share_id, iteration in snapshot.iterations.items():
+                iterations[share_id] = max(iterations.get(share_id, -1), iteration)
+        return iterations
+
+    @staticmethod
+    def _chunks(transactions: List[InsertTransaction], chunk_size: int) -> List[List[InsertTransaction]]:
+        return [transactions[i:i + chunk_size] for i in range(0, len(transactions), chunk_size)]
+
+    def _chunk_result(self, transactions: List[InsertTransaction], data_dicts: List[dict],
+                      error: Optional[Exception]) -> InsertResult:
+        """Merges the responses of a chunk into the snapshots and builds its result"""
+        complements = [c for data_dict in data_dicts for c in self._merge_insert_response(data_dict)[0]]
+        self._record_import_ids([t.get('import_id') for data_dict in data_dicts for t in data_dict['transactions']]
+                                + [di for data_dict in data_dicts for di in data_dict['duplicate_import_ids']])
+        return InsertResult(transactions=transactions, complements=complements, error=error)
+
+    def _record_import_ids(self, import_ids: List[str]) -> None:
+        """Remembers import_ids used by inserted complements and rejected as duplicates so that the next insert for
+        their share_id succeeds at first attempt"""
+        if not import_ids:
+            return
+        with self._lock:
+            # only the iterations are needed, not the stored transactions
+            snapshot = self._load_snapshot(None, since=date.max)
+            for import_id in import_ids:
+                snapshot.record_import_id(import_id)
+            self._save(snapshot)
+
+    @staticmethod
+    def _raise_on_failed_chunk(results: List[InsertResult]) -> List[ComplementTransaction]:
+        errors = [r.error for r in results if r.error is not None]
+        if errors:
+            raise errors[0]
+        return [c for r in results for c in r.complements]
+
+    def _insert_request(self, transactions: List[InsertTransaction]) -> Tuple[str, List[dict]]:
         url = f'{YNAB_BASE_URL}budgets/{self.budget_id}/transactions'
         data = [{
             "account_id": self.account_id,
@@ -97,32 +260,232 @@ class Client:
             "approved": False,
             "import_id": f's||{t.share_id}||{t.iteration}'
         } for t in transactions]
-        if data:
-            r = self.session.post(url, json=dict(transactions=data))
-            r.raise_for_status()
-            return ([self.transaction_builder.build_complement(c) for c in r.json()['data']['transactions']],
-                    r.json()['data']['duplicate_import_ids'])
-        return [], []
+        return url, data
 
-    def _insert_duplicates(self, transactions: List[InsertTransaction],
-                           duplicate_ids: List[str]) -> Tuple[List[ComplementTransaction], List[str]]:
+    def _merge_insert_response(self, data_dict: dict) -> Tuple[List[ComplementTransaction], List[str]]:
+        self._merge(data_dict['transactions'])
+        return ([self.transaction_builder.build_complement(c) for c in data_dict['transactions']],
+                data_dict['duplicate_import_ids'])
+
+    @staticmethod
+    def _bump_duplicates(transactions: List[InsertTransaction], duplicate_ids: List[str]) -> List[InsertTransaction]:
+        """Returns the transactions rejected as duplicates with their iteration raised above the existing one"""
         iteration_lookup = {did.split('||')[1]: int(did.split('||')[2])
                             for did in duplicate_ids
                             if 's||' in did and len(did.split('||')) == 3}
         duplicate_transactions = [t for t in transactions if t.share_id in iteration_lookup.keys()]
         for t in duplicate_transactions:
             t.iteration = iteration_lookup[t.share_id] + 1
-        complements, duplicates = self._insert(duplicate_transactions)
-        return complements, duplicates
+        return duplicate_transactions
 
-    def fetch_balance(self) -> int:
-        url = f'{YNAB_BASE_URL}budgets/{self.budget_id}/accounts/{self.account_id}'
-        r = self.session.get(url)
+    def _balance_url(self) -> str:
+        return f'{YNAB_BASE_URL}budgets/{self.budget_id}/accounts/{self.account_id}'
+
+    def _transaction_url(self, transaction_id: str) -> str:
+        return f'{YNAB_BASE_URL}budgets/{self.budget_id}/transactions/{transaction_id}'
+
+    def _merge_deletes(self, transaction_ids: List[str]) -> None:
+        self._merge([{'id': ti, 'account_id': self.account_id, 'deleted': True} for ti in transaction_ids])
+
+
+@dataclass
+class Client(BaseClient):
+    """
+    :param stream: If True transaction responses are parsed incrementally while they are downloaded and merged into
+    the snapshots transaction by transaction, so that the response body is never held as a whole
+    :param instrumentation: optional hooks to which requests and the phases of fetching, inserting and deleting get
+    reported
+    """
+
+    def __init__(self, user_name: str, budget_id: str, account_id: str, token: str,
+                 store: Optional[TransactionStore] = None, retry_policy: RetryPolicy = RetryPolicy(),
+                 shared_with: Optional['Client'] = None, stream: bool = True,
+                 instrumentation: Optional[Instrumentation] = None):
+        super().__init__(user_name=user_name, budget_id=budget_id, account_id=account_id, store=store,
+                         shared_with=shared_with)
+        self.stream = stream
+        self.instrumentation = instrumentation or Instrumentation()
+        self.rate_limit = RateLimit.for_token(token)
+        self.session = self.instrumentation.instrument(SessionRegistry.for_token(token, retry_policy=retry_policy))
+
+    def fetch_account(self, budget_id: str, account_id: str) -> Account:
+        r = self.session.get(f'{YNAB_BASE_URL}budgets', params=dict(include_accounts=True))
         r.raise_for_status()
-        balance = r.json()['data']['account']['balance']
+        return self._build_account(r.json()['data'], budget_id=budget_id, account_id=account_id)
+
+    def fetch_single_account(self, budget_id: str, account_id: str) -> Account:
+        """Fetches the account from its own endpoint and the budget from the budget summaries without accounts
+        instead of all budgets with all their accounts"""
+        r = self.session.get(f'{YNAB_BASE_URL}budgets')
+        r.raise_for_status()
+        budget = self._find_budget(r.json()['data'], budget_id=budget_id)
+        r = self.session.get(f'{YNAB_BASE_URL}budgets/{budget_id}/accounts/{account_id}')
+        try:
+            r.raise_for_status()
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                raise self._account_not_found(budget, account_id=account_id) from e
+            raise
+        account = r.json()['data']['account']
+        if account['deleted']:
+            raise self._account_not_found(budget, account_id=account_id)
+        return self._account(budget, account)
+
+    def fetch_roots(self, since: date, include_uncleared: bool) -> List[RootTransaction]:
+        transactions_dicts = self._fetch_transactions(since=since, account_id=self.account_id)
+        return self._build_roots(transactions_dicts, include_uncleared=include_uncleared)
+
+    def fetch_lookup(self, since: date) -> List[Union[RootTransaction, LookupTransaction, ComplementTransaction]]:
+        data_dict = self._fetch_transactions(since=since)
+        return self._build_lookup(data_dict)
+
+    def fetch_transaction_dicts(self, since: date) -> List[dict]:
+        """Fetches transaction dicts of the whole budget. Afterwards transactions of its accounts are taken from the
+        budget snapshot until the client gets expired."""
+        return self._fetch_transactions(since=since)
+
+    def fetch_complements(self, since: date) -> List[ComplementTransaction]:
+        """Fetches complements from the split account only"""
+        transactions_dicts = self._fetch_transactions(since=since, account_id=self.account_id)
+        return self._build_complements(transactions_dicts)
+
+    def fetch_transfer_lookup(self, since: date, transaction_ids: List[str]) -> List[LookupTransaction]:
+        """Fetches transactions which are the other side of transfers among the given transactions of the split
+        account. Only the accounts these transfers come from are requested, or the whole budget with one request if
+        these are many."""
+        return [lu for account_id in self._transfer_scopes(transaction_ids)
+                for lu in self._build_transfer_lookup(self._fetch_transactions(since=since, account_id=account_id))]
+
+    def refresh(self, since: date, account_id: Optional[str] = None) -> None:
+        """Brings snapshot of budget or account in it up to date without building transactions from it"""
+        self._fetch_transactions(since=since, account_id=account_id)
+
+    def refresh_transfers(self, since: date, transaction_ids: List[str]) -> None:
+        """Brings snapshots of the accounts the given transactions of the split account are transfers from up to
+        date"""
+        for account_id in self._transfer_scopes(transaction_ids):
+            self.refresh(since=since, account_id=account_id)
+
+    def _fetch_transactions(self, since: date, account_id: Optional[str] = None) -> List[dict]:
+        """Fetches transaction dicts of the budget or of an account in it. If a snapshot with server knowledge exists
+        for the scope only changed transactions are requested and merged into the snapshot. Each scope is requested
+        at most once until the client gets expired."""
+        with self._lock:
+            cached = self._cached_transactions(since=since, account_id=account_id)
+            if cached is not None:
+                return cached
+            with self.instrumentation.phase('fetch_transactions'):
+                data_dict = self._request_transactions(since=since, account_id=account_id)
+                return self._merge_transactions_response(data_dict, since=since, account_id=account_id)
+
+    def fetch_changes(self, since: date, account_id: Optional[str] = None) -> List[dict]:
+        """Fetches transactions of the budget or of an account in it which changed since the last request for the
+        scope, even if the client hasn't been expired
+
+        :return: changed transaction dicts, all transactions if the scope hasn't been requested before
+        """
+        with self._lock:
+            data_dict = self._request_transactions(since=since, account_id=account_id)
+            if isinstance(data_dict, TransactionStream):
+                data_dict = data_dict.read()
+            self._merge_transactions_response(data_dict, since=since, account_id=account_id)
+            return data_dict['transactions']
+
+    def _request_transactions(self, since: date, account_id: Optional[str]) -> Union[dict, TransactionStream]:
+        url, params = self._transactions_request(since=since, account_id=account_id)
+        if self.stream:
+            r = self.session.get(url, params=params, stream=True)
+            r.raise_for_status()
+            return TransactionStream(self._iter_body(r))
+        r = self.session.get(url, params=params)
+        r.raise_for_status()
+        return r.json()['data']
+
+    @staticmethod
+    def _iter_body(r: requests.Response) -> Iterator[bytes]:
+        """Yields body of a streamed response in chunks and releases the connection once it has been read"""
+        with r:
+            yield from r.iter_content(chunk_size=STREAM_CHUNK_SIZE)
+
+    def insert_complements(self, transactions: List[RootTransaction],
+                           chunk_size: int = INSERT_CHUNK_SIZE) -> List[ComplementTransaction]:
+        """Inserts complements for the transactions in chunks
+
+        :raises requests.RequestException: if a chunk couldn't be inserted, complements of other chunks get inserted
+        nevertheless
+        """
+        return self._raise_on_failed_chunk(self.insert_chunks(transactions, chunk_size=chunk_size))
+
+    def insert_chunks(self, transactions: List[RootTransaction], chunk_size: int = INSERT_CHUNK_SIZE,
+                      max_workers: int = MAX_INSERT_WORKERS) -> List[InsertResult]:
+        """Inserts complements in chunks of which up to max_workers are in flight at once, so that the next chunk
+        gets sent while the response for the previous one is outstanding. A failing chunk doesn't stop the remaining
+        ones.
+
+        :return: result for each chunk in order of the transactions
+        """
+        chunks = self._chunks(self._build_insert_transactions(transactions), chunk_size)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(self._insert_chunk, chunk) for chunk in chunks]
+            return [self._chunk_result(chunk, *future.result()) for chunk, future in zip(chunks, futures)]
+
+    def _insert_chunk(self, transactions: List[InsertTransaction]) -> Tuple[List[dict], Optional[Exception]]:
+        """Posts chunk and reposts transactions YNAB rejected as duplicates with a raised iteration
+
+        :return: data of the responses and the error which stopped the chunk if any
+        """
+        data_dicts = []
+        try:
+            while transactions:
+                url, data = self._insert_request(transactions)
+                # reposts of rejected duplicates are timed apart from first posts
+                with self.instrumentation.phase('insert_duplicates' if data_dicts else 'insert'):
+                    r = self.session.post(url, json=dict(transactions=data))
+                    r.raise_for_status()
+                    data_dicts.append(r.json()['data'])
+                transactions = self._bump_duplicates(transactions, data_dicts[-1]['duplicate_import_ids'])
+        except requests.RequestException as e:
+            return data_dicts, e
+        return data_dicts, None
+
+    def fetch_ledger(self) -> BalanceLedger:
+        """Fetches the split account since :data:`LEDGER_SINCE` and returns the sums of its transactions per date.
+        Once built, the ledger gets updated with the changed transactions of later requests only."""
+        with self._lock:
+            snapshot = self._load_snapshot(self.account_id, since=LEDGER_SINCE)
+            if not (snapshot.covers(LEDGER_SINCE) and self.account_id in self._fresh):
+                with self.instrumentation.phase('fetch_transactions'):
+                    data_dict = self._request_transactions(since=LEDGER_SINCE, account_id=self.account_id)
+                    self._merge_transactions_response(data_dict, since=LEDGER_SINCE, account_id=self.account_id)
+            return self._snapshots[self.account_id].build_ledger()
+
+    def fetch_balance(self) -> int:
+        with self.instrumentation.phase('fetch_balance'):
+            r = self.session.get(self._balance_url())
+            r.raise_for_status()
+            balance = r.json()['data']['account']['balance']
         return balance
 
     def delete_complement(self, transaction_id: str) -> None:
-        url = f'{YNAB_BASE_URL}budgets/{self.budget_id}/transactions/{transaction_id}'
-        r = self.session.delete(url)
+        r = self.session.delete(self._transaction_url(transaction_id))
         r.raise_for_status()
+        self._merge_deletes([transaction_id])
+
+    def delete_complements(self, transaction_ids: List[str],
+                           max_workers: int = MAX_DELETE_WORKERS) -> Dict[str, Optional[Exception]]:
+        """Deletes transactions with a bounded number of concurrent requests as YNAB doesn't offer a bulk delete. A
+        failing request doesn't stop the remaining ones.
+
+        :return: dict with the error for each transaction id, None if the transaction got deleted
+        """
+        def delete(transaction_id: str) -> Optional[Exception]:
+            try:
+                r = self.session.delete(self._transaction_url(transaction_id))
+                r.raise_for_status()
+            except requests.RequestException as e:
+                return e
+
+        with self.instrumentation.phase('delete'), ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = dict(zip(transaction_ids, executor.map(delete, transaction_ids)))
+        self._merge_deletes([ti for ti, e in results.items() if e is None])
+        return results
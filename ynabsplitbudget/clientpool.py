@@ -0,0 +1,52 @@
+import threading
+from typing import Dict, Optional, Tuple, List, Iterable
+
+from ynabsplitbudget.client import Client
+from ynabsplitbudget.instrumentation import Instrumentation
+from ynabsplitbudget.models.user import User
+from ynabsplitbudget.transactionstore import TransactionStore
+
+
+class ClientPool:
+	"""Hands out one client per user and account. Clients for accounts in the same budget share their snapshots, so
+	that a budget which is part of several pairs gets fetched only once until the pool is expired.
+
+	:param store: optional local store used by all clients of the pool
+	:param instrumentation: optional hooks used by all clients of the pool
+	"""
+
+	def __init__(self, store: Optional[TransactionStore] = None, instrumentation: Optional[Instrumentation] = None):
+		self.store = store
+		self.instrumentation = instrumentation
+		self._clients: Dict[Tuple[str, str, str], Client] = {}
+		self._lock = threading.Lock()
+
+	def get(self, user: User) -> Client:
+		with self._lock:
+			key = (user.token, user.budget_id, user.account_id)
+			if key not in self._clients:
+				shared_with = next((c for (token, budget_id, _), c in self._clients.items()
+									if token == user.token and budget_id == user.budget_id), None)
+				self._clients[key] = Client(token=user.token, budget_id=user.budget_id, account_id=user.account_id,
+											user_name=user.name, store=self.store, shared_with=shared_with,
+											instrumentation=self.instrumentation)
+			return self._clients[key]
+
+	@property
+	def clients(self) -> List[Client]:
+		with self._lock:
+			return list(self._clients.values())
+
+	def expire(self, users: Optional[Iterable[User]] = None) -> None:
+		"""Marks snapshots of clients as outdated so that they get refreshed with the next fetch
+
+		:param users: optional users to expire the clients of, defaults to all clients
+		"""
+		if users is None:
+			clients = self.clients
+		else:
+			with self._lock:
+				keys = [(u.token, u.budget_id, u.account_id) for u in users]
+				clients = [self._clients[k] for k in keys if k in self._clients]
+		for c in clients:
+			c.expire()
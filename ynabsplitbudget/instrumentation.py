@@ -0,0 +1,210 @@
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Tuple, Iterator, List
+from urllib.parse import urlparse
+
+import requests
+
+# upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+METRICS_PREFIX = 'ynabsplitbudget'
+# path segments of the YNAB API which aren't IDs
+ENDPOINT_SEGMENTS = {'v1', 'user', 'budgets', 'accounts', 'transactions', 'categories', 'payees', 'months',
+					 'scheduled_transactions', 'payee_locations', 'settings', 'bulk', 'import'}
+
+
+def endpoint(url: str) -> str:
+	"""Returns endpoint of the URL with IDs replaced, e.g. 'budgets/{id}/accounts/{id}/transactions'"""
+	segments = [s for s in urlparse(url).path.split('/') if s and s != 'v1']
+	return '/'.join(s if s in ENDPOINT_SEGMENTS else '{id}' for s in segments)
+
+
+class Instrumentation:
+	"""Hooks called by :class:`ynabsplitbudget.client.Client`, :class:`ynabsplitbudget.syncrepository.SyncRepository`
+	and :class:`ynabsplitbudget.YnabSplitBudget`. The hooks of this class do nothing, subclass it to record them
+	somewhere (see :class:`Metrics`).
+	"""
+
+	def instrument(self, session: requests.Session) -> requests.Session:
+		"""Returns session to use for requests. Return :func:`instrumented_session` to get :meth:`request` and
+		:meth:`received` called, this class returns the session as it is."""
+		return session
+
+	def request(self, method: str, endpoint: str, status: int, seconds: float, retries: int) -> None:
+		"""Called for each response
+
+		:param seconds: Time until the response headers of the last attempt arrived
+		:param retries: Number of retries until the response arrived
+		"""
+
+	def received(self, method: str, endpoint: str, size: int) -> None:
+		"""Called with the number of body bytes read from a response, for streamed responses once per chunk"""
+
+	@contextmanager
+	def phase(self, name: str) -> Iterator[None]:
+		"""Context around a phase of a run, e.g. fetching roots or inserting complements"""
+		yield
+
+
+def instrumented_session(session: requests.Session, instrumentation: Instrumentation) -> requests.Session:
+	"""Returns a session sharing headers, connection pools, rate limit and retries with the given one, whose responses
+	get reported to the instrumentation"""
+	instrumented = requests.Session()
+	instrumented.headers = session.headers
+	instrumented.adapters = session.adapters
+
+	def report(r: requests.Response, *args, stream: bool = False, **kwargs) -> requests.Response:
+		method, ep = r.request.method, endpoint(r.url)
+		instrumentation.request(method, ep, status=r.status_code, seconds=r.elapsed.total_seconds(),
+								retries=getattr(r, 'retries', 0))
+		if not stream:
+			instrumentation.received(method, ep, size=len(r.content))
+			return r
+		iter_content = r.iter_content
+
+		def counting_iter_content(*a, **kw) -> Iterator[bytes]:
+			for chunk in iter_content(*a, **kw):
+				instrumentation.received(method, ep, size=len(chunk))
+				yield chunk
+
+		r.iter_content = counting_iter_content
+		return r
+
+	instrumented.hooks['response'].append(report)
+	return instrumented
+
+
+@dataclass
+class Histogram:
+	"""Cumulative histogram as used by Prometheus
+
+	:ivar buckets: Upper bounds of the buckets
+	:ivar counts: Number of observations less or equal to each upper bound
+	"""
+	buckets: Tuple[float, ...] = LATENCY_BUCKETS
+	counts: List[int] = field(default_factory=lambda: [0] * len(LATENCY_BUCKETS))
+	count: int = 0
+	sum: float = 0
+
+	def observe(self, value: float) -> None:
+		self.count += 1
+		self.sum += value
+		for i, bound in enumerate(self.buckets):
+			if value <= bound:
+				self.counts[i] += 1
+
+	def to_dict(self) -> dict:
+		return {'count': self.count, 'sum': self.sum,
+				'buckets': {**{str(b): c for b, c in zip(self.buckets, self.counts)}, '+Inf': self.count}}
+
+
+@dataclass
+class EndpointMetrics:
+	"""Metrics of the requests to one endpoint with one method
+
+	:ivar statuses: Number of responses by status code
+	:ivar bytes: Body bytes received
+	:ivar retries: Number of retries of throttled and failed requests
+	:ivar latency: Histogram of the time until the response headers arrived in seconds
+	"""
+	statuses: Dict[int, int] = field(default_factory=dict)
+	bytes: int = 0
+	retries: int = 0
+	latency: Histogram = field(default_factory=Histogram)
+
+	@property
+	def requests(self) -> int:
+		return sum(self.statuses.values())
+
+
+@dataclass
+class PhaseMetrics:
+	"""
+	:ivar count: Number of times the phase ran
+	:ivar seconds: Total wall time of the phase in seconds
+	"""
+	count: int = 0
+	seconds: float = 0
+
+
+class Metrics(Instrumentation):
+	"""Records requests per endpoint and timings per phase in memory. They can be exported in the OpenMetrics text
+	format for Prometheus (:meth:`to_openmetrics`) or as run summary (:meth:`to_dict`). An instance can be shared by
+	several clients and split budgets.
+	"""
+
+	def __init__(self):
+		self.endpoints: Dict[Tuple[str, str], EndpointMetrics] = {}
+		self.phases: Dict[str, PhaseMetrics] = {}
+		self._lock = threading.Lock()
+
+	def instrument(self, session: requests.Session) -> requests.Session:
+		return instrumented_session(session, self)
+
+	def request(self, method: str, endpoint: str, status: int, seconds: float, retries: int) -> None:
+		with self._lock:
+			m = self.endpoints.setdefault((method, endpoint), EndpointMetrics())
+			m.statuses[status] = m.statuses.get(status, 0) + 1
+			m.retries += retries
+			m.latency.observe(seconds)
+
+	def received(self, method: str, endpoint: str, size: int) -> None:
+		with self._lock:
+			self.endpoints.setdefault((method, endpoint), EndpointMetrics()).bytes += size
+
+	@contextmanager
+	def phase(self, name: str) -> Iterator[None]:
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			duration = time.perf_counter() - start
+			with self._lock:
+				p = self.phases.setdefault(name, PhaseMetrics())
+				p.count += 1
+				p.seconds += duration
+
+	def to_dict(self) -> dict:
+		"""Returns run summary with the metrics of each endpoint, each phase and totals"""
+		with self._lock:
+			endpoints = [{'method': method, 'endpoint': ep, 'requests': m.requests,
+						  'statuses': {str(s): c for s, c in sorted(m.statuses.items())}, 'bytes': m.bytes,
+						  'retries': m.retries, 'latency': m.latency.to_dict()}
+						 for (method, ep), m in sorted(self.endpoints.items(), key=lambda i: (i[0][1], i[0][0]))]
+			phases = {name: {'count': p.count, 'seconds': p.seconds} for name, p in self.phases.items()}
+		return {'endpoints': endpoints, 'phases': phases,
+				'totals': {k: sum(e[k] for e in endpoints) for k in ('requests', 'bytes', 'retries')}}
+
+	def to_openmetrics(self) -> str:
+		"""Returns metrics in the OpenMetrics text format"""
+		p = METRICS_PREFIX
+		summary = self.to_dict()
+		lines = [f'# TYPE {p}_requests counter', f'# HELP {p}_requests Responses received from YNAB']
+		lines += [f'{p}_requests_total{{{_labels(e, status=s)}}} {c}'
+				  for e in summary['endpoints'] for s, c in e['statuses'].items()]
+		lines += [f'# TYPE {p}_response_bytes counter', f'# HELP {p}_response_bytes Body bytes received from YNAB']
+		lines += [f'{p}_response_bytes_total{{{_labels(e)}}} {e["bytes"]}' for e in summary['endpoints']]
+		lines += [f'# TYPE {p}_retries counter', f'# HELP {p}_retries Retries of throttled and failed requests']
+		lines += [f'{p}_retries_total{{{_labels(e)}}} {e["retries"]}' for e in summary['endpoints']]
+		lines += [f'# TYPE {p}_request_duration_seconds histogram',
+				  f'# HELP {p}_request_duration_seconds Time until response headers arrived']
+		for e in summary['endpoints']:
+			latency = e['latency']
+			lines += [f'{p}_request_duration_seconds_bucket{{{_labels(e, le=b)}}} {c}'
+					  for b, c in latency['buckets'].items()]
+			lines += [f'{p}_request_duration_seconds_count{{{_labels(e)}}} {latency["count"]}',
+					  f'{p}_request_duration_seconds_sum{{{_labels(e)}}} {latency["sum"]}']
+		lines += [f'# TYPE {p}_phase_duration_seconds summary',
+				  f'# HELP {p}_phase_duration_seconds Wall time spent in phases of runs']
+		for name, phase in summary['phases'].items():
+			lines += [f'{p}_phase_duration_seconds_count{{phase="{name}"}} {phase["count"]}',
+					  f'{p}_phase_duration_seconds_sum{{phase="{name}"}} {phase["seconds"]}']
+		lines.append('# EOF')
+		return '\n'.join(lines) + '\n'
+
+
+def _labels(e: dict, **extra: str) -> str:
+	labels = {'method': e['method'], 'endpoint': e['endpoint'], **extra}
+	return ','.join(f'{k}="{v}"' for k, v in labels.items())
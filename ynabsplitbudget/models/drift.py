@@ -0,0 +1,22 @@
+from dataclasses import dataclass, field
+from datetime import date
+from typing import List, Union
+
+from ynabsplitbudget.models.transaction import RootTransaction, ComplementTransaction
+
+
+@dataclass
+class BalanceDrift:
+	"""First date up to which the split accounts of user and partner don't balance each other
+
+	:ivar transaction_date: The first date at which the sum of both balances isn't zero
+	:ivar difference: Sum of both balances up to and including the date in milliunits
+	:ivar user_transactions: Transactions in the user split account on the date which aren't balanced by the partner
+	split account
+	:ivar partner_transactions: Transactions in the partner split account on the date which aren't balanced by the user
+	split account
+	"""
+	transaction_date: date
+	difference: int
+	user_transactions: List[Union[RootTransaction, ComplementTransaction]] = field(default_factory=list)
+	partner_transactions: List[Union[RootTransaction, ComplementTransaction]] = field(default_factory=list)
@@ -22,3 +22,11 @@ class ConfigNotValid(Exception):
 
 class BalancesDontMatch(Exception):
 	pass
+
+
+class OrphansNotDeleted(Exception):
+	pass
+
+
+class RateLimitExceeded(Exception):
+	pass
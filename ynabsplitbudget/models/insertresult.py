@@ -0,0 +1,17 @@
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from ynabsplitbudget.models.transaction import InsertTransaction, ComplementTransaction
+
+
+@dataclass
+class InsertResult:
+	"""Result of inserting one chunk of complements
+
+	:ivar transactions: Transactions sent in the chunk
+	:ivar complements: Complements created in YNAB
+	:ivar error: Error which stopped the chunk, None if all transactions of the chunk got inserted
+	"""
+	transactions: List[InsertTransaction]
+	complements: List[ComplementTransaction] = field(default_factory=list)
+	error: Optional[Exception] = None
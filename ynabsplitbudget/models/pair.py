@@ -0,0 +1,44 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Tuple, Union, Optional
+
+from ynabsplitbudget.models.user import User
+
+STEPS = ('split', 'push', 'push_uncleared', 'delete_orphans', 'balances')
+DEFAULT_STEPS = ('split', 'push', 'delete_orphans')
+
+
+@dataclass(eq=True, frozen=True)
+class Pair:
+	"""Pair of user and partner to sync
+
+	:ivar name: Name of the pair used in the report
+	:ivar user: User whose split transactions get pushed
+	:ivar partner: Partner into whose split account complements get pushed
+	:ivar steps: Steps to run for the pair, one of 'split', 'push', 'push_uncleared', 'delete_orphans' and 'balances'
+	"""
+	name: str
+	user: User
+	partner: User
+	steps: Tuple[str, ...] = field(default=DEFAULT_STEPS)
+
+	@classmethod
+	def from_dict(cls, data: dict, base_dir: Optional[Path] = None) -> 'Pair':
+		"""Creates pair from manifest entry. User and partner can be given as dict or as path to a user YAML file
+		relative to base_dir.
+
+		:raises ValueError: if an unknown step is given
+		"""
+		user = cls._load_user(data['user'], base_dir)
+		partner = cls._load_user(data['partner'], base_dir)
+		steps = tuple(data.get('steps', DEFAULT_STEPS))
+		unknown = [s for s in steps if s not in STEPS]
+		if unknown:
+			raise ValueError(f'Unknown steps {unknown}, allowed are {list(STEPS)}')
+		return cls(name=data.get('name', f'{user.name}-{partner.name}'), user=user, partner=partner, steps=steps)
+
+	@staticmethod
+	def _load_user(data: Union[dict, str], base_dir: Optional[Path]) -> User:
+		if isinstance(data, dict):
+			return User.from_dict(data)
+		return User.from_yaml(str(base_dir / data if base_dir else data))
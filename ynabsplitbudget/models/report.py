@@ -0,0 +1,37 @@
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Optional, List
+
+
+@dataclass
+class PairReport:
+	"""Outcome of syncing one pair
+
+	:ivar name: Name of the pair
+	:ivar results: Number of transactions affected by each step which ran
+	:ivar timings: Duration of each step which ran in seconds
+	:ivar error: Error which stopped the pair, None if all steps succeeded
+	"""
+	name: str
+	results: Dict[str, int] = field(default_factory=dict)
+	timings: Dict[str, float] = field(default_factory=dict)
+	error: Optional[str] = None
+
+
+@dataclass
+class RunReport:
+	"""Outcome of syncing several pairs
+
+	:ivar pairs: Report for each pair
+	:ivar duration: Duration of the whole run in seconds
+	:ivar rate_limits: Remaining requests within the rate limit of YNAB by budget id
+	"""
+	pairs: List[PairReport]
+	duration: float
+	rate_limits: Dict[str, int]
+
+	@property
+	def failed(self) -> List[PairReport]:
+		return [p for p in self.pairs if p.error is not None]
+
+	def to_dict(self) -> dict:
+		return asdict(self)
@@ -2,43 +2,50 @@ from dataclasses import dataclass
 from datetime import date
 from typing import List
 
+# Models use __slots__ instead of a per-instance __dict__ as full histories of several pairs are held in memory.
+# Amounts are integer milliunits as returned by YNAB.
+
 
 @dataclass
 class RootTransaction:
+    __slots__ = ('id', 'share_id', 'transaction_date', 'memo', 'payee_name', 'amount', 'account_id')
     id: str
     share_id: str
     transaction_date: date
     memo: str
     payee_name: str
-    amount: float
+    amount: int
     account_id: str
 
 
 @dataclass
 class ComplementTransaction:
+    __slots__ = ('id', 'share_id', 'transaction_date', 'memo', 'payee_name', 'amount', 'account_id', 'iteration')
     id: str
     share_id: str
     transaction_date: date
     memo: str
     payee_name: str
-    amount: float
+    amount: int
     account_id: str
     iteration: int
 
 
 @dataclass
 class LookupTransaction:
+    __slots__ = ('account_id', 'payee_name', 'transfer_transaction_ids')
     account_id: str
     payee_name: str
     transfer_transaction_ids: List[str]
 
 @dataclass
 class InsertTransaction:
+    __slots__ = ('id', 'share_id', 'transaction_date', 'memo', 'payee_name', 'amount', 'account_id', 'iteration')
     id: str
     share_id: str
     transaction_date: date
     memo: str
     payee_name: str
-    amount: float
+    amount: int
     account_id: str
     iteration: int
@@ -1,10 +1,10 @@
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Literal
+from typing import Literal, Optional
 
 import yaml
 
-from ynabsplitbudget.client import Client
+from ynabsplitbudget.accountcache import AccountCache
 from ynabsplitbudget.models.account import Account
 
 
@@ -24,13 +24,14 @@ class User:
 	account_id: str
 	flag_color: Literal['red', 'green', 'blue', 'orange', 'purple', 'yellow']
 
-	def fetch_account(self) -> Account:
-		"""Fetches account data from the API or user
+	def fetch_account(self, cache: Optional[AccountCache] = None) -> Account:
+		"""Fetches account data from the API or user. Accounts are cached, by default in the cache shared within the
+		process.
 
+		:param cache: optional cache to use instead of the shared one
 		:return: Account object with budget and account name, transfer_payee_id and currency
 		"""
-		client = Client(token=self.token, user_name=self.name, budget_id=self.budget_id, account_id=self.account_id)
-		return client.fetch_account(budget_id=self.budget_id, account_id=self.account_id)
+		return (cache or AccountCache.shared()).fetch(self)
 
 	@classmethod
 	def from_dict(cls, data: dict) -> 'User':
@@ -0,0 +1,134 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import List, Optional, Dict, Callable
+
+import yaml
+
+from ynabsplitbudget.clientpool import ClientPool
+from ynabsplitbudget.instrumentation import Instrumentation
+from ynabsplitbudget.models.pair import Pair
+from ynabsplitbudget.models.report import PairReport, RunReport
+from ynabsplitbudget.scheduler import RateLimit
+from ynabsplitbudget.transactionstore import TransactionStore
+from ynabsplitbudget.ynabsplitbudget import YnabSplitBudget
+
+MAX_PAIR_WORKERS = 4
+
+STEP_CALLS: Dict[str, Callable[[YnabSplitBudget], int]] = {
+	'split': lambda ysb: len(ysb.split()),
+	'push': lambda ysb: len(ysb.push()),
+	'push_uncleared': lambda ysb: len(ysb.push(include_uncleared=True)),
+	'delete_orphans': lambda ysb: len(ysb.delete_orphans()),
+	'balances': lambda ysb: ysb.raise_on_balances_off() or 0,
+}
+
+
+def run_steps(ysb: YnabSplitBudget, steps: List[str], report: PairReport) -> None:
+	"""Runs steps of a pair and records them in the report. A failing step stops the remaining ones of the pair."""
+	for step in steps:
+		start = time.perf_counter()
+		try:
+			report.results[step] = STEP_CALLS[step](ysb)
+		except Exception as e:
+			report.error = f'{step}: {e!r}'
+			logging.getLogger(__name__).exception(f'{step} failed for pair {report.name}')
+			return
+		finally:
+			report.timings[step] = time.perf_counter() - start
+
+
+class Orchestrator:
+	"""Syncs many pairs of users with a bounded pool of workers. Pairs sharing a budget share its snapshots, so that
+	it gets fetched once per run. All pairs get split first, afterwards the snapshots are refreshed once and the
+	remaining steps run. A budget is split once per flag color, pairs of the same user budget get split one after
+	another by the same worker. Requests made with the same token share its rate limit.
+
+	:param pairs: Pairs to sync
+	:param since: date from which onwards to sync
+	:param cache_dir: optional directory in which transactions get cached between runs
+	:param max_workers: Maximum number of pairs synced at once
+	:param instrumentation: optional hooks shared by all pairs
+	"""
+
+	def __init__(self, pairs: List[Pair], since: date, cache_dir: Optional[str] = None,
+				 max_workers: int = MAX_PAIR_WORKERS, instrumentation: Optional[Instrumentation] = None):
+		names = [p.name for p in pairs]
+		if len(set(names)) != len(names):
+			raise ValueError(f'Names of pairs need to be unique: {names}')
+		self.pairs = pairs
+		self.since = since
+		self.max_workers = max_workers
+		self.instrumentation = instrumentation
+		store = TransactionStore(str(Path(cache_dir) / 'transactions.sqlite')) if cache_dir else None
+		self.clients = ClientPool(store=store, instrumentation=instrumentation)
+
+	@classmethod
+	def from_yaml(cls, path: str, since: Optional[date] = None, cache_dir: Optional[str] = None,
+				  instrumentation: Optional[Instrumentation] = None) -> 'Orchestrator':
+		"""Creates instance from a manifest YAML file with the keys 'pairs' and optionally 'since', 'cache_dir' and
+		'max_workers'. Arguments given take precedence over the manifest, since defaults to 30 days ago.
+
+		:param path: Path to the manifest
+		"""
+		with Path(path).open(mode='r') as f:
+			manifest = yaml.safe_load(f)
+		try:
+			pairs = [Pair.from_dict(p, base_dir=Path(path).parent) for p in manifest['pairs']]
+		except (KeyError, TypeError) as e:
+			raise ValueError(f'Could not load manifest from YAML file: {path}') from e
+		if since is None and manifest.get('since'):
+			since = datetime.strptime(str(manifest['since']), '%Y-%m-%d').date()
+		elif since is None:
+			since = date.today() - timedelta(days=30)
+		return cls(pairs=pairs, since=since, cache_dir=cache_dir or manifest.get('cache_dir'),
+				   max_workers=manifest.get('max_workers', MAX_PAIR_WORKERS), instrumentation=instrumentation)
+
+	def run(self) -> RunReport:
+		"""Runs the steps of all pairs
+
+		:return: report with results and timings for each pair
+		"""
+		start = time.perf_counter()
+		split_budgets = {p.name: YnabSplitBudget(user=p.user, partner=p.partner, since=self.since,
+												 clients=self.clients, instrumentation=self.instrumentation)
+						 for p in self.pairs}
+		reports = {p.name: PairReport(name=p.name) for p in self.pairs}
+
+		def run_split(pairs: List[Pair]):
+			flag_colors = set()
+			for pair in pairs:
+				if pair.user.flag_color in flag_colors:
+					# flagged transactions got already split for another pair with the same user budget
+					reports[pair.name].results['split'] = 0
+					continue
+				flag_colors.add(pair.user.flag_color)
+				run_steps(split_budgets[pair.name], ['split'], reports[pair.name])
+
+		def run_sync(pair: Pair):
+			if reports[pair.name].error is None:
+				with split_budgets[pair.name].run() as ysb:
+					run_steps(ysb, [s for s in pair.steps if s != 'split'], reports[pair.name])
+
+		with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+			list(executor.map(run_split, self._split_groups()))
+			self.clients.expire()
+			list(executor.map(run_sync, self.pairs))
+
+		budgets = {u.budget_id: u.token for p in self.pairs for u in (p.user, p.partner)}
+		report = RunReport(pairs=[reports[p.name] for p in self.pairs], duration=time.perf_counter() - start,
+						   rate_limits={budget_id: RateLimit.for_token(token).remaining
+										for budget_id, token in budgets.items()})
+		logging.getLogger(__name__).info(f'synced {len(self.pairs) - len(report.failed)} of {len(self.pairs)} pairs '
+										 f'in {report.duration:.1f}s')
+		return report
+
+	def _split_groups(self) -> List[List[Pair]]:
+		"""Groups pairs to split by the budget of their user"""
+		groups: Dict[tuple, List[Pair]] = {}
+		for p in self.pairs:
+			if 'split' in p.steps:
+				groups.setdefault((p.user.token, p.user.budget_id), []).append(p)
+		return list(groups.values())
@@ -0,0 +1,179 @@
+import logging
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional, Dict, Callable
+
+from requests import Response, PreparedRequest
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, ConnectTimeout, Timeout
+from urllib3.exceptions import NewConnectionError
+
+from ynabsplitbudget.models.exception import RateLimitExceeded
+
+# YNAB allows 200 requests per token within a rolling hour
+RATE_LIMIT = 200
+RATE_LIMIT_PERIOD = 3600
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+# YNAB might have processed these before failing, so they only get retried if it certainly didn't
+NON_IDEMPOTENT_METHODS = ('POST', 'PATCH')
+
+
+class RateLimit:
+	"""Tracks the requests made with a token within the rolling rate limit period of YNAB. Instances are shared by all
+	clients using the same token (see :meth:`for_token`).
+
+	:param limit: Number of requests allowed within the period
+	:param period: Length of the period in seconds
+	:param clock: Function returning the current time in seconds
+	"""
+	_registry: Dict[str, 'RateLimit'] = {}
+	_registry_lock = threading.Lock()
+
+	def __init__(self, limit: int = RATE_LIMIT, period: float = RATE_LIMIT_PERIOD,
+				 clock: Callable[[], float] = time.monotonic):
+		self.limit = limit
+		self.period = period
+		self._clock = clock
+		self._requests = deque()
+		self._lock = threading.Lock()
+
+	@classmethod
+	def for_token(cls, token: str) -> 'RateLimit':
+		with cls._registry_lock:
+			if token not in cls._registry:
+				cls._registry[token] = cls()
+			return cls._registry[token]
+
+	@property
+	def remaining(self) -> int:
+		"""Number of requests which can be made right now without exceeding the limit"""
+		with self._lock:
+			self._drop_expired(self._clock())
+			return max(self.limit - len(self._requests), 0)
+
+	def reserve(self, max_wait: Optional[float] = None) -> float:
+		"""Reserves a slot for a request
+
+		:param max_wait: optional maximum seconds to wait for a slot
+		:return: seconds to wait before the request can be sent
+		:raises RateLimitExceeded: if the next free slot is further away than max_wait, no slot gets reserved then
+		"""
+		with self._lock:
+			now = self._clock()
+			self._drop_expired(now)
+			slot = now
+			if len(self._requests) >= self.limit:
+				slot = max(now, self._requests[-self.limit] + self.period)
+			if max_wait is not None and slot - now > max_wait:
+				raise RateLimitExceeded(f'Rate limit of {self.limit} requests used up, next free slot in '
+										f'{slot - now:.0f}s')
+			self._requests.append(slot)
+		if slot > now:
+			logging.getLogger(__name__).info(f'waiting {slot - now:.1f}s for a free slot in the rate limit')
+		return slot - now
+
+	def update(self, header: Optional[str]) -> None:
+		"""Syncs with the X-Rate-Limit header (e.g. '36/200') YNAB returns, which also counts requests made with the
+		token by other processes"""
+		if not header or '/' not in header:
+			return
+		used, limit = (int(v) for v in header.split('/'))
+		with self._lock:
+			now = self._clock()
+			self._drop_expired(now)
+			self.limit = limit
+			self._requests.extend([now] * (used - len(self._requests)))
+
+	def _drop_expired(self, now: float) -> None:
+		while self._requests and self._requests[0] <= now - self.period:
+			self._requests.popleft()
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+	"""Retry behaviour for throttled (429) and failed (5xx) requests
+
+	:ivar retries: Maximum number of retries per request
+	:ivar backoff_factor: Base of the exponential backoff in seconds
+	:ivar max_backoff: Upper bound for a single backoff in seconds
+	:ivar max_retry_after: Upper bound for waiting as told by the Retry-After header in seconds
+	:ivar max_wait: Maximum seconds to wait for a free slot in the rate limit before raising
+	:class:`ynabsplitbudget.models.exception.RateLimitExceeded`
+	"""
+	retries: int = 5
+	backoff_factor: float = 0.5
+	max_backoff: float = 60
+	max_retry_after: float = 300
+	max_wait: float = 300
+
+	def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+		"""Returns seconds to wait before the next attempt. Uses the Retry-After header if present, otherwise
+		exponential backoff with full jitter."""
+		if retry_after and retry_after.isdigit():
+			return min(float(retry_after), self.max_retry_after)
+		return random.uniform(0, min(self.max_backoff, self.backoff_factor * 2 ** attempt))
+
+	@staticmethod
+	def retries_status(method: Optional[str], status_code: int) -> bool:
+		"""Returns True if a response with the status code can be retried. Non-idempotent requests are only retried
+		if they got throttled, as a failed response doesn't tell whether YNAB processed them."""
+		if (method or '').upper() in NON_IDEMPOTENT_METHODS:
+			return status_code == 429
+		return status_code in RETRY_STATUS_CODES
+
+	@staticmethod
+	def retries_error(method: Optional[str], sent: bool) -> bool:
+		"""Returns True if a request which failed without response can be retried. Non-idempotent requests are only
+		retried if they never got sent."""
+		return not sent or (method or '').upper() not in NON_IDEMPOTENT_METHODS
+
+
+class SchedulingAdapter(HTTPAdapter):
+	"""Transport adapter which waits for a free slot in the rate limit of the token before sending a request and
+	retries throttled and failed requests with backoff. Non-idempotent requests are only retried if YNAB certainly didn't
+	process them (see :class:`RetryPolicy`). The number of retries a response took is set as its retries attribute.
+
+	:param rate_limit: Rate limit of the token used for the requests
+	:param retry_policy: Retry behaviour to use
+	:param sleep: Function used for waiting
+	"""
+
+	def __init__(self, rate_limit: RateLimit, retry_policy: RetryPolicy = RetryPolicy(),
+				 sleep: Callable[[float], None] = time.sleep, **kwargs):
+		super().__init__(**kwargs)
+		self.rate_limit = rate_limit
+		self.retry_policy = retry_policy
+		self._sleep = sleep
+
+	def send(self, request: PreparedRequest, **kwargs) -> Response:
+		attempt = 0
+		while True:
+			self._sleep(self.rate_limit.reserve(max_wait=self.retry_policy.max_wait))
+			try:
+				response = super().send(request, **kwargs)
+			except (ConnectionError, Timeout) as e:
+				if attempt >= self.retry_policy.retries or not self.retry_policy.retries_error(request.method,
+																							   sent=_sent(e)):
+					raise
+				self._sleep(self.retry_policy.delay(attempt))
+				attempt += 1
+				continue
+			self.rate_limit.update(response.headers.get('X-Rate-Limit'))
+			if not self.retry_policy.retries_status(request.method, response.status_code) \
+					or attempt >= self.retry_policy.retries:
+				response.retries = attempt
+				return response
+			response.close()
+			self._sleep(self.retry_policy.delay(attempt, response.headers.get('Retry-After')))
+			attempt += 1
+
+
+def _sent(error: Exception) -> bool:
+	"""Returns False if the connection couldn't be established, so the request never reached YNAB"""
+	if isinstance(error, ConnectTimeout):
+		return False
+	reason = getattr(error.args[0], 'reason', None) if error.args else None
+	return not isinstance(reason, NewConnectionError)
@@ -0,0 +1,47 @@
+import threading
+from typing import Dict, Tuple
+
+import requests
+
+from ynabsplitbudget.scheduler import RateLimit, RetryPolicy, SchedulingAdapter
+
+YNAB_HOST_URL = 'https://api.ynab.com/'
+# all requests go to a single host, the pool only needs to cover concurrent requests like deletes and pairs
+POOL_CONNECTIONS = 1
+POOL_MAXSIZE = 10
+
+
+class SessionRegistry:
+	"""Process-wide requests sessions, one per token and retry policy. All clients and adjusters of a token share one
+	session, so connections to YNAB are kept alive and reused across steps instead of doing a TLS handshake per
+	client. Requests of the session wait for the rate limit of the token and get retried (see
+	:class:`ynabsplitbudget.scheduler.SchedulingAdapter`).
+	"""
+	_registry: Dict[Tuple[str, RetryPolicy], requests.Session] = {}
+	_registry_lock = threading.Lock()
+
+	@classmethod
+	def for_token(cls, token: str, retry_policy: RetryPolicy = RetryPolicy()) -> requests.Session:
+		with cls._registry_lock:
+			key = (token, retry_policy)
+			if key not in cls._registry:
+				cls._registry[key] = cls._create(token, retry_policy=retry_policy)
+			return cls._registry[key]
+
+	@classmethod
+	def close(cls) -> None:
+		"""Closes all sessions and their connections"""
+		with cls._registry_lock:
+			for session in cls._registry.values():
+				session.close()
+			cls._registry.clear()
+
+	@staticmethod
+	def _create(token: str, retry_policy: RetryPolicy) -> requests.Session:
+		session = requests.Session()
+		session.headers.update({'Authorization': f'Bearer {token}', 'Accept-Encoding': 'gzip',
+								'Connection': 'keep-alive'})
+		session.mount(YNAB_HOST_URL, SchedulingAdapter(rate_limit=RateLimit.for_token(token),
+													   retry_policy=retry_policy, pool_connections=POOL_CONNECTIONS,
+													   pool_maxsize=POOL_MAXSIZE))
+		return session
@@ -0,0 +1,113 @@
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from ynabsplitbudget.balanceledger import BalanceLedger
+from ynabsplitbudget.transactionbuilder import TransactionBuilder
+
+
+@dataclass
+class Snapshot:
+	"""Local copy of the transactions of a budget or of a single account in a budget together with the server
+	knowledge YNAB returned for it. Allows fetching only changed transactions via delta requests.
+
+	:ivar budget_id: The ID of the budget the transactions belong to
+	:ivar account_id: The ID of the account if snapshot is scoped to an account, None if it covers the whole budget
+	:ivar since: Earliest transaction date covered by the snapshot
+	:ivar server_knowledge: Server knowledge of the last response merged into the snapshot
+	:ivar transactions: Transaction dicts as returned by YNAB keyed by transaction id
+	:ivar changed_ids: IDs of transactions which got added or changed since the snapshot was last saved
+	:ivar deleted_ids: IDs of transactions which got deleted in YNAB since the snapshot was last saved
+	:ivar iterations: Highest import_id iteration used for each share_id. Includes deleted complements as YNAB keeps
+	rejecting their import_ids.
+	:ivar changed_iterations: share_ids whose iteration changed since the snapshot was last saved
+	:ivar tombstones: Account id and share_id of roots which got deleted in YNAB since the snapshot was last saved,
+	keyed by transaction id
+	:ivar window: Earliest date of the transactions held if older ones were only kept in the store, None if all are
+	held
+	:ivar reset: True if the snapshot got replaced by a full request since it was last saved, so that stored
+	transactions of its scope since its start date which aren't part of it any more get removed
+	:ivar ledger: Sums of the transactions per date, kept up to date by :meth:`merge` once built with
+	:meth:`build_ledger`
+	"""
+	budget_id: str
+	account_id: Optional[str] = None
+	since: Optional[date] = None
+	server_knowledge: Optional[int] = None
+	transactions: Dict[str, dict] = field(default_factory=dict)
+	changed_ids: Set[str] = field(default_factory=set)
+	deleted_ids: Set[str] = field(default_factory=set)
+	iterations: Dict[str, int] = field(default_factory=dict)
+	changed_iterations: Set[str] = field(default_factory=set)
+	tombstones: Dict[str, Tuple[str, str]] = field(default_factory=dict)
+	window: Optional[date] = field(default=None, compare=False)
+	reset: bool = False
+	ledger: Optional[BalanceLedger] = field(default=None, repr=False, compare=False)
+
+	def covers(self, since: date) -> bool:
+		"""Returns True if snapshot can be updated via delta request for the given date"""
+		return self.server_knowledge is not None and self.since is not None and self.since <= since
+
+	def misses(self, since: date) -> bool:
+		"""Returns True if the snapshot misses transactions from the given date on which were only kept in the store"""
+		return self.window is not None and since < self.window
+
+	def merge(self, transactions: List[dict], server_knowledge: Optional[int]) -> None:
+		"""Merges changed transactions from a YNAB response into the snapshot. Deleted transactions are removed."""
+		for t in transactions:
+			self.record_import_id(self.transactions.get(t['id'], t).get('import_id'))
+			self.record_import_id(t.get('import_id'))
+			if self.ledger is not None:
+				self._update_ledger(self.transactions.get(t['id']), t)
+			if t['deleted']:
+				self._record_tombstone(self.transactions.get(t['id'], t))
+				self.transactions.pop(t['id'], None)
+				self.changed_ids.discard(t['id'])
+				self.deleted_ids.add(t['id'])
+			else:
+				self.transactions[t['id']] = t
+				self.changed_ids.add(t['id'])
+				self.deleted_ids.discard(t['id'])
+		self.server_knowledge = server_knowledge
+
+	def record_import_id(self, import_id: Optional[str]) -> None:
+		"""Records iteration of complement import_ids (s||<share_id>||<iteration>), other import_ids are ignored"""
+		parts = import_id.split('||') if import_id else []
+		if len(parts) == 3 and parts[0] == 's' and parts[2].isdigit():
+			self.record_iteration(parts[1], int(parts[2]))
+
+	def record_iteration(self, share_id: str, iteration: int) -> None:
+		if iteration > self.iterations.get(share_id, -1):
+			self.iterations[share_id] = iteration
+			self.changed_iterations.add(share_id)
+
+	def clear_changes(self) -> None:
+		self.changed_ids.clear()
+		self.deleted_ids.clear()
+		self.changed_iterations.clear()
+		self.tombstones.clear()
+		self.reset = False
+
+	def build_ledger(self) -> BalanceLedger:
+		"""Returns ledger of the transactions, builds it from all transactions on first call"""
+		if self.ledger is None:
+			self.ledger = BalanceLedger.from_transactions(self.transactions.values())
+		return self.ledger
+
+	def _update_ledger(self, previous: Optional[dict], t: dict) -> None:
+		if previous is not None:
+			self.ledger.remove(previous)
+		if not t['deleted']:
+			self.ledger.add(t)
+
+	def _record_tombstone(self, t: dict) -> None:
+		"""Records deleted root, deletes which don't tell whether the transaction was a root are ignored"""
+		if 'import_id' not in t or not t.get('account_id') or (t['import_id'] and 's||' in t['import_id']):
+			return
+		self.tombstones[t['id']] = (t['account_id'], TransactionBuilder.share_id(t['id']))
+
+	def transactions_since(self, since: date) -> List[dict]:
+		since_str = datetime.strftime(since, '%Y-%m-%d')
+		return [t for t in self.transactions.values() if t['date'] >= since_str]
+
+
@@ -1,29 +1,45 @@
 import re
+from functools import lru_cache
+from typing import Optional, Tuple, List
 
 from ynabtransactionadjuster import Transaction
 
 from ynabsplitbudget.models.exception import SplitNotValid
 
+SPLIT_PATTERN = re.compile(r'@(\d+\.?\d*)(%?)')
+# number of distinct memos for which the parsed split attribution is kept
+MEMO_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=MEMO_CACHE_SIZE)
+def parse_memo(memo: Optional[str]) -> Optional[Tuple[float, bool]]:
+	"""Parses split attribution from memo
+
+	:return: split number and whether it is a percentage, None if memo contains no split attribution
+	"""
+	if not isinstance(memo, str):
+		return None
+	r = SPLIT_PATTERN.search(memo)
+	if r is None:
+		return None
+	return float(r.group(1)), r.group(2) == '%'
+
 
 class SplitParser:
 
 	@staticmethod
 	def parse_split(transaction: Transaction) -> int:
 		amount = transaction.amount
-
-		try:
-			r = re.search(r'@(\d+\.?\d*)(%?)', transaction.memo)
-		except TypeError:
-			r = None
+		attribution = parse_memo(transaction.memo)
 
 		# return half the amount if no split attribution is found
-		if r is None:
+		if attribution is None:
 			return int(amount * 0.5)
 
-		split_number = float(r.groups()[0])
+		split_number, is_percentage = attribution
 
 		# return amount percentage if % in memo
-		if r.groups()[1] == '%':
+		if is_percentage:
 			if split_number <= 100:
 				return int(amount * split_number / 100)
 			raise SplitNotValid(f"Split is above 100% for transaction {transaction}")
@@ -33,3 +49,12 @@ class SplitParser:
 			raise SplitNotValid(f"Split is above total amount of {amount / 1000:.2f} for transaction {transaction}")
 		sign = -1 if amount < 0 else 1
 		return int(sign * split_number * 1000)
+
+	@classmethod
+	def parse_many(cls, transactions: List[Transaction]) -> List[int]:
+		"""Parses split amounts of transactions in one pass. Memos are parsed once each.
+
+		:return: split amount for each transaction in order of the transactions
+		:raises SplitNotValid: if the split of one of the transactions is not valid
+		"""
+		return [cls.parse_split(t) for t in transactions]
@@ -0,0 +1,95 @@
+import codecs
+import json
+import re
+import sys
+from typing import Iterable, Iterator, Optional
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+ARRAY_START_PATTERN = re.compile(r'"transactions"\s*:\s*\[')
+SERVER_KNOWLEDGE_PATTERN = re.compile(r'"server_knowledge"\s*:\s*(\d+)')
+WHITESPACE = ' \t\r\n,'
+
+
+class TransactionStream:
+	"""Parses the transactions of a YNAB transactions response incrementally while the body is downloaded, so that
+	neither the body nor a list of all transactions has to be held at once. Iterating yields the transaction dicts
+	one by one, the server knowledge is available afterwards. Can only be iterated once.
+
+	:param chunks: Body of the response in chunks of bytes
+	"""
+
+	def __init__(self, chunks: Iterable[bytes]):
+		self._chunks = iter(chunks)
+		self._text_decoder = codecs.getincrementaldecoder('utf-8')()
+		# keys get interned as each item is decoded separately and wouldn't share them otherwise
+		self._json_decoder = json.JSONDecoder(object_pairs_hook=lambda pairs: {sys.intern(k): v for k, v in pairs})
+		self._buffer = ''
+		self._pos = 0
+		self._head = ''
+		self.server_knowledge: Optional[int] = None
+
+	def __iter__(self) -> Iterator[dict]:
+		self._seek_array()
+		while True:
+			if not self._skip_whitespace():
+				raise ValueError('response ended within transactions')
+			if self._buffer[self._pos] == ']':
+				self._pos += 1
+				break
+			try:
+				item, end = self._json_decoder.raw_decode(self._buffer, self._pos)
+			except json.JSONDecodeError:
+				if not self._read():
+					raise
+				continue
+			self._pos = end
+			yield item
+			self._compact()
+		self._read_server_knowledge()
+
+	def read(self) -> dict:
+		"""Reads the whole response
+
+		:return: data dict in the same form as the one of a parsed response
+		"""
+		transactions = list(self)
+		return {'transactions': transactions, 'server_knowledge': self.server_knowledge}
+
+	def _seek_array(self) -> None:
+		while True:
+			m = ARRAY_START_PATTERN.search(self._buffer)
+			if m:
+				self._head, self._pos = self._buffer[:m.start()], m.end()
+				return
+			if not self._read():
+				raise ValueError('response contains no transactions')
+
+	def _skip_whitespace(self) -> bool:
+		while True:
+			while self._pos < len(self._buffer) and self._buffer[self._pos] in WHITESPACE:
+				self._pos += 1
+			if self._pos < len(self._buffer):
+				return True
+			if not self._read():
+				return False
+
+	def _read(self) -> bool:
+		"""Appends next chunk to the buffer. Returns False if the body has been read completely."""
+		for chunk in self._chunks:
+			text = self._text_decoder.decode(chunk)
+			if text:
+				self._buffer += text
+				return True
+		return False
+
+	def _compact(self) -> None:
+		if self._pos > STREAM_CHUNK_SIZE:
+			self._buffer = self._buffer[self._pos:]
+			self._pos = 0
+
+	def _read_server_knowledge(self) -> None:
+		while self._read():
+			pass
+		m = SERVER_KNOWLEDGE_PATTERN.search(self._buffer, self._pos) or SERVER_KNOWLEDGE_PATTERN.search(self._head)
+		self.server_knowledge = int(m.group(1)) if m else None
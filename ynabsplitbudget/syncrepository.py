@@ -1,47 +1,190 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
-from typing import List, Union
+from typing import List, Union, Optional, Dict, Tuple, Callable, TypeVar
 
+from ynabsplitbudget.balanceledger import BalanceLedger
 from ynabsplitbudget.client import Client
+from ynabsplitbudget.clientpool import ClientPool
+from ynabsplitbudget.instrumentation import Instrumentation
 from ynabsplitbudget.models.transaction import RootTransaction, ComplementTransaction, LookupTransaction
 from ynabsplitbudget.models.user import User
+from ynabsplitbudget.transactionstore import TransactionStore
+
+T = TypeVar('T')
+U = TypeVar('U')
 
 
 class SyncRepository:
 
-	def __init__(self, user: User, partner: User):
-		self._user_client = Client(token=user.token, budget_id=user.budget_id, account_id=user.account_id,
-								   user_name=user.name)
-		self._partner_client = Client(token=partner.token, budget_id=partner.budget_id, account_id=partner.account_id,
-									  user_name=partner.name)
-
-	def fetch_roots_wo_complement(self, since: date, include_uncleared: bool) -> List[RootTransaction]:
-		roots = self._user_client.fetch_roots(since=since, include_uncleared=include_uncleared)
-		pl = [t for t in self._partner_client.fetch_lookup(since) if isinstance(t, ComplementTransaction)]
-		roots_wo_complement = [t for t in roots if t.share_id not in [lo.share_id for lo in pl]]
-		transactions_replaced_payee = self.replace_payee(transactions=roots_wo_complement,
-															 lookup_date=since)
+	def __init__(self, user: User, partner: User, store: Optional[TransactionStore] = None,
+				 clients: Optional[ClientPool] = None, instrumentation: Optional[Instrumentation] = None):
+		self._user = user
+		self._partner = partner
+		self._store = store
+		self._instrumentation = instrumentation or Instrumentation()
+		if clients:
+			self._user_client = clients.get(user)
+			self._partner_client = clients.get(partner)
+		else:
+			self._user_client = Client(token=user.token, budget_id=user.budget_id, account_id=user.account_id,
+									   user_name=user.name, store=store, instrumentation=instrumentation)
+			self._partner_client = Client(token=partner.token, budget_id=partner.budget_id,
+										  account_id=partner.account_id, user_name=partner.name, store=store,
+										  instrumentation=instrumentation)
+
+	def fetch_roots_wo_complement(self, since: date, include_uncleared: bool,
+								  new_roots: Optional[List[RootTransaction]] = None) -> List[RootTransaction]:
+		"""
+		:param new_roots: Roots created after the user budget got fetched, e.g. by splitting in the same run. They are
+		considered regardless of include_uncleared and keep their payee.
+		"""
+		with self._instrumentation.phase('fetch_roots_wo_complement'):
+			return self._fetch_roots_wo_complement(since=since, include_uncleared=include_uncleared,
+												   new_roots=new_roots or [])
+
+	def _fetch_roots_wo_complement(self, since: date, include_uncleared: bool,
+								   new_roots: List[RootTransaction]) -> List[RootTransaction]:
+		if self._store:
+			roots, _ = self._run_concurrently(
+				lambda: self._with_new(self._user_client.fetch_roots(since=since, include_uncleared=include_uncleared),
+									   new_roots),
+				lambda: self._partner_client.refresh(since, account_id=self._partner.account_id))
+			complement_share_ids = self._store.fetch_share_ids(budget_id=self._partner.budget_id, kind='complement',
+															   account_id=self._partner.account_id)
+			roots_wo_complement = [t for t in roots if t.share_id not in complement_share_ids]
+			with self._instrumentation.phase('fetch_transfer_lookup'):
+				self._user_client.refresh_transfers(since, [t.id for t in roots_wo_complement])
+				pr = self._fetch_stored_payee_replacer(roots_wo_complement)
+		else:
+			roots, complements = self._run_concurrently(
+				lambda: self._with_new(self._user_client.fetch_roots(since=since, include_uncleared=include_uncleared),
+									   new_roots),
+				lambda: self._partner_client.fetch_complements(since))
+			roots_wo_complement = Reconciliation(roots=roots, complements=complements).unmatched
+			with self._instrumentation.phase('fetch_transfer_lookup'):
+				pr = PayeeReplacer(lookup=self._user_client.fetch_transfer_lookup(
+					since, [t.id for t in roots_wo_complement]))
+		transactions_replaced_payee = [pr.replace(t) for t in roots_wo_complement]
 		return transactions_replaced_payee
 
 	def insert_complements(self, transactions: List[RootTransaction]) -> List[ComplementTransaction]:
-		return self._partner_client.insert_complements(transactions)
+		with self._instrumentation.phase('insert_complements'):
+			return self._partner_client.insert_complements(transactions)
+
+	def delete_complements(self, transactions: List[ComplementTransaction]) -> Dict[str, Optional[Exception]]:
+		with self._instrumentation.phase('delete_complements'):
+			return self._partner_client.delete_complements([t.id for t in transactions])
 
 	def replace_payee(self, transactions: List[RootTransaction], lookup_date: date) -> List[RootTransaction]:
-		ul = self._user_client.fetch_lookup(lookup_date)
-		pr = PayeeReplacer(lookup=ul)
+		if self._store:
+			self._user_client.refresh_transfers(lookup_date, [t.id for t in transactions])
+			pr = self._fetch_stored_payee_replacer(transactions)
+		else:
+			ul = self._user_client.fetch_transfer_lookup(lookup_date, [t.id for t in transactions])
+			pr = PayeeReplacer(lookup=ul)
 		transactions_replaced = [pr.replace(t) for t in transactions]
 		return transactions_replaced
 
 	def find_orphaned_partner_complements(self, since: date) -> List[ComplementTransaction]:
-		current_complements = [lo for lo in self._partner_client.fetch_lookup(since=since) if isinstance(lo, ComplementTransaction)]
-		current_roots = [cr for cr in self._user_client.fetch_roots(since=since, include_uncleared=True)]
-		orphaned_complements = [c for c in current_complements if c.share_id not in [d.share_id for d in current_roots]]
-		return orphaned_complements
+		with self._instrumentation.phase('find_orphaned_partner_complements'):
+			return self._find_orphaned_partner_complements(since)
+
+	def _find_orphaned_partner_complements(self, since: date) -> List[ComplementTransaction]:
+		if self._store:
+			self._run_concurrently(lambda: self._user_client.refresh(since, account_id=self._user.account_id),
+								   lambda: self._partner_client.refresh(since, account_id=self._partner.account_id))
+			current_complements = self._store.fetch_complements(budget_id=self._partner.budget_id, since=since,
+																account_id=self._partner.account_id)
+			root_share_ids = self._store.fetch_share_ids(budget_id=self._user.budget_id, kind='root',
+														 account_id=self._user.account_id)
+			orphaned = [c for c in current_complements if c.share_id not in root_share_ids]
+			# complements of deleted roots are found across the whole history, not only since the given date
+			orphaned_ids = {c.id for c in orphaned}
+			return orphaned + [c for c in self._store.fetch_tombstoned_complements(
+				budget_id=self._partner.budget_id, account_id=self._partner.account_id,
+				root_budget_id=self._user.budget_id, root_account_id=self._user.account_id)
+							   if c.id not in orphaned_ids]
+		current_roots, current_complements = self._run_concurrently(
+			lambda: self._user_client.fetch_roots(since=since, include_uncleared=True),
+			lambda: self._partner_client.fetch_complements(since=since))
+		return Reconciliation(roots=current_roots, complements=current_complements).orphaned
+
+	def fetch_user_transactions(self, since: date) -> List[dict]:
+		"""Fetches transaction dicts of the whole user budget, which also covers the roots in the split account"""
+		return self._user_client.fetch_transaction_dicts(since)
+
+	def expire_user(self) -> None:
+		"""Marks snapshots of the user budget as outdated, e.g. after transactions in it got changed by splitting"""
+		self._user_client.expire()
+
+	def fetch_changes(self, since: date) -> Tuple[List[dict], List[dict]]:
+		"""Expires the clients and fetches transactions which changed in the budgets of user and partner since they were
+		last requested"""
+		self._user_client.expire()
+		self._partner_client.expire()
+		return self._run_concurrently(lambda: self._user_client.fetch_changes(since),
+									  lambda: self._partner_client.fetch_changes(since))
 
 	def fetch_balances(self) -> (int, int):
-		user_balance = self._user_client.fetch_balance()
-		partner_balance = self._partner_client.fetch_balance()
+		with self._instrumentation.phase('fetch_balances'):
+			user_balance, partner_balance = self._run_concurrently(self._user_client.fetch_balance,
+																   self._partner_client.fetch_balance)
 		return user_balance, partner_balance
 
+	def fetch_ledgers(self) -> Tuple[BalanceLedger, BalanceLedger]:
+		with self._instrumentation.phase('fetch_ledgers'):
+			return self._run_concurrently(self._user_client.fetch_ledger, self._partner_client.fetch_ledger)
+
+	def _fetch_stored_payee_replacer(self, transactions: List[RootTransaction]) -> 'PayeeReplacer':
+		return PayeeReplacer.from_payee_names(self._store.fetch_transfer_payees(
+			budget_id=self._user.budget_id, account_id=self._user.account_id,
+			transaction_ids=[t.id for t in transactions]))
+
+	@staticmethod
+	def _with_new(roots: List[RootTransaction], new_roots: List[RootTransaction]) -> List[RootTransaction]:
+		root_ids = {r.id for r in roots}
+		return roots + [r for r in new_roots if r.id not in root_ids]
+
+	@staticmethod
+	def _run_concurrently(user_call: Callable[[], T], partner_call: Callable[[], U]) -> Tuple[T, U]:
+		"""Runs calls against user and partner budget in parallel as they don't depend on each other"""
+		with ThreadPoolExecutor(max_workers=2) as executor:
+			user_future = executor.submit(user_call)
+			partner_future = executor.submit(partner_call)
+			return user_future.result(), partner_future.result()
+
+
+class Reconciliation:
+	"""Matches roots and complements via share_id indexes
+
+	:param roots: Root transactions from the user split account
+	:param complements: Complement transactions from the partner split account
+	"""
+
+	def __init__(self, roots: List[RootTransaction], complements: List[ComplementTransaction]):
+		self._roots = roots
+		self._complements = complements
+		self._root_share_ids = {r.share_id for r in roots}
+		self._complements_by_share_id: Dict[str, List[ComplementTransaction]] = dict()
+		for c in complements:
+			self._complements_by_share_id.setdefault(c.share_id, []).append(c)
+
+	@property
+	def matched(self) -> List[Tuple[RootTransaction, List[ComplementTransaction]]]:
+		"""Roots with their complements"""
+		return [(r, self._complements_by_share_id[r.share_id]) for r in self._roots
+				if r.share_id in self._complements_by_share_id]
+
+	@property
+	def unmatched(self) -> List[RootTransaction]:
+		"""Roots without complement"""
+		return [r for r in self._roots if r.share_id not in self._complements_by_share_id]
+
+	@property
+	def orphaned(self) -> List[ComplementTransaction]:
+		"""Complements without root"""
+		return [c for c in self._complements if c.share_id not in self._root_share_ids]
+
 
 class PayeeReplacer:
 
@@ -49,6 +192,13 @@ class PayeeReplacer:
 		lookup_filtered = [lu for lu in lookup if isinstance(lu, LookupTransaction)]
 		self._lookup_dict = {ti: lu.payee_name for lu in lookup_filtered for ti in lu.transfer_transaction_ids}
 
+	@classmethod
+	def from_payee_names(cls, payee_names: Dict[str, str]) -> 'PayeeReplacer':
+		"""Creates instance from payee names keyed by the transaction id they replace the payee for"""
+		pr = cls(lookup=[])
+		pr._lookup_dict = payee_names
+		return pr
+
 	def replace(self, t: RootTransaction) -> RootTransaction:
 		if t.id in self._lookup_dict.keys():
 			t.payee_name = self._lookup_dict[t.id]
@@ -1,11 +1,26 @@
 import hashlib
 import re
+import sys
+from functools import lru_cache
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Union
+from datetime import datetime, date
+from typing import Union, Optional
 
 from ynabsplitbudget.models.transaction import RootTransaction, ComplementTransaction, LookupTransaction
 
+IMPORT_ID_PATTERN = re.compile(r's\|\|(.[^|]*)(?:\|\|)?(\d*)')
+
+
+@lru_cache(maxsize=8192)
+def parse_date(date_str: str) -> date:
+	"""Parses YNAB date string. Transactions of the same day share one date object."""
+	return datetime.strptime(date_str, '%Y-%m-%d').date()
+
+
+def intern(value: Optional[str]) -> Optional[str]:
+	"""Interns strings which repeat across transactions like account ids and payee names"""
+	return sys.intern(value) if value is not None else None
+
 
 @dataclass
 class TransactionBuilder:
@@ -19,27 +34,32 @@ class TransactionBuilder:
 		return self.build_root(t_dict)
 
 	@staticmethod
-	def build_root(t_dict: dict) -> RootTransaction:
-		share_id = hashlib.shake_128(str(t_dict['id']).encode()).hexdigest(10)
+	def share_id(transaction_id: str) -> str:
+		"""Returns share_id of a root, which is derived from its transaction id"""
+		return hashlib.shake_128(str(transaction_id).encode()).hexdigest(10)
+
+	@staticmethod
+	def build_root(t_dict: dict, transaction_date: Optional[date] = None) -> RootTransaction:
+		share_id = TransactionBuilder.share_id(t_dict['id'])
 		return RootTransaction(id=t_dict['id'],
-							   transaction_date=datetime.strptime(t_dict['date'], '%Y-%m-%d').date(),
+							   transaction_date=transaction_date or parse_date(t_dict['date']),
 				   			   memo=t_dict['memo'],
-				   			   payee_name=t_dict['payee_name'],
+				   			   payee_name=intern(t_dict['payee_name']),
 				   			   amount=t_dict['amount'],
-				   			   account_id=t_dict['account_id'],
+				   			   account_id=intern(t_dict['account_id']),
 				   			   share_id=share_id)
 
 	@staticmethod
 	def build_complement(t_dict: dict) -> ComplementTransaction:
-		regex = re.search(r's\|\|(.[^|]*)(?:\|\|)?(\d*)', t_dict['import_id']).groups()
+		regex = IMPORT_ID_PATTERN.search(t_dict['import_id']).groups()
 		share_id = regex[0]
 		iteration = int(regex[1]) if regex[1] != '' else 0
 		return ComplementTransaction(id=t_dict['id'],
-									 transaction_date=datetime.strptime(t_dict['date'], '%Y-%m-%d').date(),
+									 transaction_date=parse_date(t_dict['date']),
 									 memo=t_dict['memo'],
-									 payee_name=t_dict['payee_name'],
+									 payee_name=intern(t_dict['payee_name']),
 									 amount=t_dict['amount'],
-									 account_id=t_dict['account_id'],
+									 account_id=intern(t_dict['account_id']),
 									 share_id=share_id,
 									 iteration=iteration)
 
@@ -57,8 +77,8 @@ class TransactionBuilder:
 					  if st['transfer_transaction_id'] is not None]
 			payee_name = t_dict['payee_name']
 
-		return LookupTransaction(payee_name=payee_name,
+		return LookupTransaction(payee_name=intern(payee_name),
 				   transfer_transaction_ids=tt_ids,
-				   account_id=t_dict['account_id'])
+				   account_id=intern(t_dict['account_id']))
 
 
@@ -0,0 +1,285 @@
+import functools
+import json
+import sqlite3
+import threading
+from datetime import date, datetime
+from pathlib import Path
+from dataclasses import asdict
+from typing import Optional, List, Set, Dict, Callable, Tuple
+
+from ynabsplitbudget.models.account import Account
+from ynabsplitbudget.models.transaction import ComplementTransaction
+from ynabsplitbudget.snapshot import Snapshot
+from ynabsplitbudget.transactionbuilder import TransactionBuilder, parse_date, intern
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+	budget_id TEXT NOT NULL,
+	scope TEXT NOT NULL,
+	since TEXT,
+	server_knowledge INTEGER,
+	PRIMARY KEY (budget_id, scope)
+);
+CREATE TABLE IF NOT EXISTS transactions (
+	budget_id TEXT NOT NULL,
+	id TEXT NOT NULL,
+	account_id TEXT NOT NULL,
+	kind TEXT NOT NULL,
+	share_id TEXT NOT NULL,
+	iteration INTEGER,
+	date TEXT NOT NULL,
+	memo TEXT,
+	payee_name TEXT,
+	amount INTEGER NOT NULL,
+	cleared TEXT NOT NULL,
+	payload TEXT NOT NULL,
+	PRIMARY KEY (budget_id, id)
+);
+CREATE INDEX IF NOT EXISTS ix_transactions_share_id ON transactions (budget_id, account_id, kind, share_id);
+CREATE INDEX IF NOT EXISTS ix_transactions_date ON transactions (budget_id, account_id, date);
+CREATE TABLE IF NOT EXISTS transfers (
+	budget_id TEXT NOT NULL,
+	transaction_id TEXT NOT NULL,
+	account_id TEXT NOT NULL,
+	transfer_transaction_id TEXT NOT NULL,
+	payee_name TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_transfers_transaction_id ON transfers (budget_id, transaction_id);
+CREATE INDEX IF NOT EXISTS ix_transfers_transfer_transaction_id ON transfers (budget_id, transfer_transaction_id);
+CREATE TABLE IF NOT EXISTS iterations (
+	budget_id TEXT NOT NULL,
+	share_id TEXT NOT NULL,
+	iteration INTEGER NOT NULL,
+	PRIMARY KEY (budget_id, share_id)
+);
+CREATE TABLE IF NOT EXISTS tombstones (
+	budget_id TEXT NOT NULL,
+	transaction_id TEXT NOT NULL,
+	account_id TEXT NOT NULL,
+	share_id TEXT NOT NULL,
+	PRIMARY KEY (budget_id, transaction_id)
+);
+CREATE INDEX IF NOT EXISTS ix_tombstones_account_id ON tombstones (budget_id, account_id);
+CREATE TABLE IF NOT EXISTS accounts (
+	budget_id TEXT NOT NULL,
+	account_id TEXT NOT NULL,
+	payload TEXT NOT NULL,
+	fetched_at REAL NOT NULL,
+	PRIMARY KEY (budget_id, account_id)
+);
+"""
+
+# stay well below the maximum number of host parameters in a SQLite statement
+MAX_PARAMS = 500
+
+
+def locked(func: Callable) -> Callable:
+	"""Serializes access to the connection as the store is shared between the clients of user and partner"""
+	@functools.wraps(func)
+	def wrapper(self: 'TransactionStore', *args, **kwargs):
+		with self._lock:
+			return func(self, *args, **kwargs)
+	return wrapper
+
+
+class TransactionStore:
+	"""Local SQLite store holding the transactions fetched from YNAB. It persists the snapshots used for delta requests
+	and indexes the transactions by budget, account and share_id so that they can be queried without rebuilding them
+	from YNAB responses. Transactions stay in the store after they dropped out of the fetched timeframe. Roots which
+	got deleted in YNAB are kept as tombstones with their share_id.
+
+	:param path: Path of the SQLite database file, defaults to an in-memory database
+	"""
+
+	def __init__(self, path: str = ':memory:'):
+		if path != ':memory:':
+			Path(path).parent.mkdir(parents=True, exist_ok=True)
+		self._connection = sqlite3.connect(path, check_same_thread=False)
+		self._connection.executescript(SCHEMA)
+		self._lock = threading.RLock()
+
+	@locked
+	def load(self, budget_id: str, account_id: Optional[str], since: Optional[date] = None) -> Snapshot:
+		"""Loads snapshot for budget or account in it. Returns an empty one if none has been saved yet
+
+		:param since: optional date from which on transactions are loaded, older ones stay in the store only
+		"""
+		row = self._connection.execute('SELECT since, server_knowledge FROM snapshots WHERE budget_id = ? AND scope = ?',
+									   (budget_id, account_id or '')).fetchone()
+		if row is None:
+			return Snapshot(budget_id=budget_id, account_id=account_id)
+		query = 'SELECT payload FROM transactions WHERE budget_id = ?'
+		params = [budget_id]
+		if account_id:
+			query += ' AND account_id = ?'
+			params.append(account_id)
+		if since:
+			query += ' AND date >= ?'
+			params.append(datetime.strftime(since, '%Y-%m-%d'))
+		transactions = [json.loads(p) for p, in self._connection.execute(query, params)]
+		iterations = self._connection.execute('SELECT share_id, iteration FROM iterations WHERE budget_id = ?',
+											  (budget_id, )).fetchall()
+		return Snapshot(budget_id=budget_id, account_id=account_id,
+						since=datetime.strptime(row[0], '%Y-%m-%d').date() if row[0] else None,
+						server_knowledge=row[1],
+						transactions={t['id']: t for t in transactions},
+						iterations=dict(iterations), window=since)
+
+	@locked
+	def save(self, snapshot: Snapshot) -> None:
+		"""Saves snapshot. Only transactions which changed since the snapshot was last saved are written, deleted
+		ones are removed from the store. If the snapshot got reset, stored transactions of its scope since its start
+		date are replaced by the ones in it."""
+		changed = [snapshot.transactions[i] for i in snapshot.changed_ids]
+		with self._connection:
+			self._connection.execute('INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?)',
+									 (snapshot.budget_id, snapshot.account_id or '',
+									  datetime.strftime(snapshot.since, '%Y-%m-%d') if snapshot.since else None,
+									  snapshot.server_knowledge))
+			if snapshot.reset:
+				self._delete_scope(snapshot.budget_id, snapshot.account_id, snapshot.since)
+			self._delete(snapshot.budget_id, list(snapshot.deleted_ids | snapshot.changed_ids))
+			self._connection.executemany('INSERT INTO transactions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+										 [self._transaction_row(snapshot.budget_id, t) for t in changed])
+			self._connection.executemany('INSERT INTO transfers VALUES (?, ?, ?, ?, ?)',
+										 [row for t in changed for row in self._transfer_rows(snapshot.budget_id, t)])
+			self._connection.executemany('INSERT INTO iterations VALUES (?, ?, ?) ON CONFLICT (budget_id, share_id) '
+										 'DO UPDATE SET iteration = max(iteration, excluded.iteration)',
+										 [(snapshot.budget_id, si, snapshot.iterations[si])
+										  for si in snapshot.changed_iterations])
+			self._connection.executemany('INSERT OR IGNORE INTO tombstones VALUES (?, ?, ?, ?)',
+										 [(snapshot.budget_id, ti, account_id, share_id)
+										  for ti, (account_id, share_id) in snapshot.tombstones.items()])
+		snapshot.clear_changes()
+
+	@locked
+	def fetch_complements(self, budget_id: str, since: date,
+						  account_id: Optional[str] = None) -> List[ComplementTransaction]:
+		"""Fetches complement transactions in budget or account"""
+		query = ("SELECT id, share_id, date, memo, payee_name, amount, account_id, iteration "
+				 "FROM transactions WHERE budget_id = ? AND kind = 'complement' AND date >= ?")
+		params = [budget_id, datetime.strftime(since, '%Y-%m-%d')]
+		if account_id:
+			query += ' AND account_id = ?'
+			params.append(account_id)
+		rows = self._connection.execute(query, params).fetchall()
+		return [ComplementTransaction(id=r[0], share_id=r[1], transaction_date=parse_date(r[2]), memo=r[3],
+									  payee_name=intern(r[4]), amount=r[5], account_id=intern(r[6]), iteration=r[7])
+				for r in rows]
+
+	@locked
+	def fetch_share_ids(self, budget_id: str, kind: str, account_id: Optional[str] = None) -> Set[str]:
+		"""Fetches share_ids of all stored roots or complements in budget or account
+
+		:param kind: Either 'root' or 'complement'
+		"""
+		query = 'SELECT share_id FROM transactions WHERE budget_id = ? AND kind = ?'
+		params = [budget_id, kind]
+		if account_id:
+			query += ' AND account_id = ?'
+			params.append(account_id)
+		return {s for s, in self._connection.execute(query, params)}
+
+	@locked
+	def fetch_tombstoned_complements(self, budget_id: str, account_id: str, root_budget_id: str,
+									 root_account_id: str) -> List[ComplementTransaction]:
+		"""Fetches complements in account whose root got deleted from the root account, regardless of their date. Roots
+		still stored in the root account with the same share_id keep their complements."""
+		rows = self._connection.execute(
+			"SELECT id, share_id, date, memo, payee_name, amount, account_id, iteration FROM transactions "
+			"WHERE budget_id = ? AND account_id = ? AND kind = 'complement' "
+			"AND share_id IN (SELECT share_id FROM tombstones WHERE budget_id = ? AND account_id = ?) "
+			"AND share_id NOT IN (SELECT share_id FROM transactions "
+			"WHERE budget_id = ? AND account_id = ? AND kind = 'root')",
+			(budget_id, account_id, root_budget_id, root_account_id, root_budget_id, root_account_id)).fetchall()
+		return [ComplementTransaction(id=r[0], share_id=r[1], transaction_date=parse_date(r[2]), memo=r[3],
+									  payee_name=intern(r[4]), amount=r[5], account_id=intern(r[6]), iteration=r[7])
+				for r in rows]
+
+	@locked
+	def fetch_transfer_payees(self, budget_id: str, account_id: str, transaction_ids: List[str]) -> Dict[str, str]:
+		"""Fetches payee names of the transactions outside of the account which are transfers to the given
+		transactions
+
+		:return: dict with payee names keyed by the id of the transaction in the account
+		"""
+		payees = dict()
+		for i in range(0, len(transaction_ids), MAX_PARAMS):
+			chunk = transaction_ids[i:i + MAX_PARAMS]
+			rows = self._connection.execute(f"SELECT transfer_transaction_id, payee_name FROM transfers "
+											f"WHERE budget_id = ? AND account_id != ? "
+											f"AND transfer_transaction_id IN ({', '.join('?' * len(chunk))})",
+											[budget_id, account_id, *chunk])
+			payees.update({ti: p for ti, p in rows})
+		return payees
+
+	@locked
+	def load_account(self, budget_id: str, account_id: str) -> Optional[Tuple[Account, float]]:
+		"""Loads account metadata together with the time it got fetched from YNAB, None if it isn't stored"""
+		row = self._connection.execute('SELECT payload, fetched_at FROM accounts WHERE budget_id = ? AND account_id = ?',
+									   (budget_id, account_id)).fetchone()
+		if row is None:
+			return None
+		return Account(**json.loads(row[0])), row[1]
+
+	@locked
+	def save_account(self, account: Account, fetched_at: float) -> None:
+		with self._connection:
+			self._connection.execute('INSERT OR REPLACE INTO accounts VALUES (?, ?, ?, ?)',
+									 (account.budget_id, account.account_id, json.dumps(asdict(account)), fetched_at))
+
+	@locked
+	def delete_accounts(self, budget_id: Optional[str] = None, account_id: Optional[str] = None) -> None:
+		"""Deletes stored account metadata, all of it if neither budget nor account is given"""
+		query = 'DELETE FROM accounts WHERE 1 = 1'
+		params = []
+		if budget_id:
+			query += ' AND budget_id = ?'
+			params.append(budget_id)
+		if account_id:
+			query += ' AND account_id = ?'
+			params.append(account_id)
+		with self._connection:
+			self._connection.execute(query, params)
+
+	@locked
+	def close(self) -> None:
+		self._connection.close()
+
+	def _delete(self, budget_id: str, ids: List[str]) -> None:
+		for i in range(0, len(ids), MAX_PARAMS):
+			chunk = ids[i:i + MAX_PARAMS]
+			placeholders = ', '.join('?' * len(chunk))
+			self._connection.execute(f'DELETE FROM transactions WHERE budget_id = ? AND id IN ({placeholders})',
+									 [budget_id, *chunk])
+			self._connection.execute(f'DELETE FROM transfers WHERE budget_id = ? AND transaction_id IN ({placeholders})',
+									 [budget_id, *chunk])
+
+	def _delete_scope(self, budget_id: str, account_id: Optional[str], since: date) -> None:
+		query = 'SELECT id FROM transactions WHERE budget_id = ? AND date >= ?'
+		params = [budget_id, datetime.strftime(since, '%Y-%m-%d')]
+		if account_id:
+			query += ' AND account_id = ?'
+			params.append(account_id)
+		self._delete(budget_id, [i for i, in self._connection.execute(query, params)])
+
+	@staticmethod
+	def _transaction_row(budget_id: str, t_dict: dict) -> tuple:
+		if t_dict['import_id'] and 's||' in t_dict['import_id']:
+			t = TransactionBuilder.build_complement(t_dict)
+			kind, iteration = 'complement', t.iteration
+		else:
+			t = TransactionBuilder.build_root(t_dict)
+			kind, iteration = 'root', None
+			if t_dict['payee_name'] == 'Reconciliation Balance Adjustment':
+				kind = 'reconciliation'
+		return (budget_id, t.id, t.account_id, kind, t.share_id, iteration, t_dict['date'], t.memo, t.payee_name,
+				t.amount, t_dict['cleared'], json.dumps(t_dict))
+
+	@staticmethod
+	def _transfer_rows(budget_id: str, t_dict: dict) -> List[tuple]:
+		if t_dict['import_id'] and 's||' in t_dict['import_id']:
+			return []
+		lookup = TransactionBuilder.build_lookup(t_dict)
+		return [(budget_id, t_dict['id'], lookup.account_id, tt_id, lookup.payee_name)
+				for tt_id in lookup.transfer_transaction_ids]
@@ -0,0 +1,168 @@
+import json
+import logging
+import threading
+from dataclasses import asdict
+from datetime import date
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from typing import Callable, List, Optional, Dict
+
+from ynabsplitbudget.clientpool import ClientPool
+from ynabsplitbudget.models.pair import Pair
+from ynabsplitbudget.models.report import PairReport
+from ynabsplitbudget.orchestrator import run_steps
+from ynabsplitbudget.transactionstore import TransactionStore
+from ynabsplitbudget.ynabsplitbudget import YnabSplitBudget
+
+DEFAULT_PORT = 8080
+DEFAULT_DELAY = 1.0
+
+
+class CoalescingJob:
+	"""Runs a job in its own thread whenever it gets triggered. Triggers arriving within the delay or while the job
+	is running are merged into a single subsequent run, so runs never overlap.
+
+	:param job: Function to run
+	:param delay: Seconds to wait for further triggers before running the job
+	"""
+
+	def __init__(self, job: Callable[[], None], delay: float = DEFAULT_DELAY):
+		self.job = job
+		self.delay = delay
+		self.triggers = 0
+		self.runs = 0
+		self.running = False
+		self._pending = threading.Event()
+		self._stopped = threading.Event()
+		self._lock = threading.Lock()
+		self._thread = threading.Thread(target=self._loop, daemon=True)
+		self._thread.start()
+
+	def trigger(self) -> bool:
+		"""Requests a run of the job
+
+		:return: True if a new run got scheduled, False if the trigger got merged into a pending one
+		"""
+		with self._lock:
+			self.triggers += 1
+			merged = self._pending.is_set()
+			self._pending.set()
+			return not merged
+
+	def stop(self) -> None:
+		self._stopped.set()
+		self._pending.set()
+		self._thread.join()
+
+	def _loop(self) -> None:
+		while True:
+			self._pending.wait()
+			if self._stopped.wait(self.delay):
+				return
+			with self._lock:
+				self._pending.clear()
+				self.running = True
+			try:
+				self.job()
+			except Exception:
+				logging.getLogger(__name__).exception('triggered job failed')
+			finally:
+				self.running = False
+				self.runs += 1
+
+
+class TriggerServer:
+	"""Embedded HTTP endpoint which syncs pairs on demand. ``POST /sync/<pair name>`` schedules a run of the steps of
+	the pair and answers with 202 right away, ``GET /sync/<pair name>`` returns the state of the pair and the report of
+	its last run. Bursts of triggers for a pair are merged into a single run.
+
+	:param pairs: Pairs which can be triggered
+	:param since: date from which onwards to sync
+	:param cache_dir: optional directory in which transactions get cached between runs
+	:param host: Host to listen on
+	:param port: Port to listen on, 0 picks a free one
+	:param delay: Seconds to wait for further triggers before a run starts
+	"""
+
+	def __init__(self, pairs: List[Pair], since: date, cache_dir: Optional[str] = None, host: str = '127.0.0.1',
+				 port: int = DEFAULT_PORT, delay: float = DEFAULT_DELAY):
+		store = TransactionStore(str(Path(cache_dir) / 'transactions.sqlite')) if cache_dir else None
+		self.clients = ClientPool(store=store)
+		self.since = since
+		self.pairs = {p.name: p for p in pairs}
+		self.reports: Dict[str, Optional[PairReport]] = {p.name: None for p in pairs}
+		self.jobs = {p.name: CoalescingJob(job=self._job(p), delay=delay) for p in pairs}
+		self._server = ThreadingHTTPServer((host, port), self._handler())
+
+	@property
+	def port(self) -> int:
+		return self._server.server_address[1]
+
+	def serve_forever(self) -> None:
+		logging.getLogger(__name__).info(f'listening for triggers on port {self.port}')
+		self._server.serve_forever()
+
+	def shutdown(self) -> None:
+		self._server.shutdown()
+		self._server.server_close()
+		for j in self.jobs.values():
+			j.stop()
+
+	def trigger(self, name: str) -> bool:
+		"""Requests a sync of the pair
+
+		:return: True if a new run got scheduled, False if the trigger got merged into a pending one
+		:raises KeyError: if there is no pair with the name
+		"""
+		return self.jobs[name].trigger()
+
+	def status(self, name: str) -> dict:
+		job = self.jobs[name]
+		report = self.reports[name]
+		return {'pair': name, 'triggers': job.triggers, 'runs': job.runs, 'running': job.running,
+				'last_report': asdict(report) if report else None}
+
+	def _job(self, pair: Pair) -> Callable[[], None]:
+		def job():
+			self.clients.expire([pair.user, pair.partner])
+			report = PairReport(name=pair.name)
+			ysb = YnabSplitBudget(user=pair.user, partner=pair.partner, since=self.since, clients=self.clients)
+			with ysb.run():
+				run_steps(ysb, list(pair.steps), report)
+			self.reports[pair.name] = report
+		return job
+
+	def _handler(self) -> type:
+		trigger_server = self
+
+		class Handler(BaseHTTPRequestHandler):
+
+			def do_POST(self):
+				name = self._pair_name()
+				if name is not None:
+					scheduled = trigger_server.trigger(name)
+					self._respond(202, {'pair': name, 'scheduled': scheduled})
+
+			def do_GET(self):
+				name = self._pair_name()
+				if name is not None:
+					self._respond(200, trigger_server.status(name))
+
+			def log_message(self, format, *args):
+				logging.getLogger(__name__).debug(format % args)
+
+			def _pair_name(self) -> Optional[str]:
+				parts = self.path.strip('/').split('/')
+				if len(parts) == 2 and parts[0] == 'sync' and parts[1] in trigger_server.pairs:
+					return parts[1]
+				self._respond(404, {'error': f'unknown path {self.path}'})
+
+			def _respond(self, status: int, body: dict):
+				payload = json.dumps(body).encode()
+				self.send_response(status)
+				self.send_header('Content-Type', 'application/json')
+				self.send_header('Content-Length', str(len(payload)))
+				self.end_headers()
+				self.wfile.write(payload)
+
+		return Handler
@@ -0,0 +1,108 @@
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Callable, Tuple
+
+from ynabsplitbudget.models.pair import STEPS
+from ynabsplitbudget.ynabsplitbudget import YnabSplitBudget
+
+DEFAULT_INTERVAL = 60
+# steps which don't change anything in YNAB, so that there is nothing to catch up on if they failed
+READ_ONLY_STEPS = {'balances'}
+
+STEP_CALLS: Dict[str, Callable[[YnabSplitBudget, Tuple[str, ...]], int]] = {
+	'push': lambda ysb, steps: len(ysb.push(include_uncleared='push_uncleared' in steps)),
+	'delete_orphans': lambda ysb, steps: len(ysb.delete_orphans()),
+	'balances': lambda ysb, steps: ysb.raise_on_balances_off() or 0,
+}
+
+
+class Watcher:
+	"""Keeps clients and snapshots of a split budget in memory and polls YNAB for changed transactions with delta
+	requests. Steps only run if the changes in a poll are relevant for them, so that polls without changes cost one
+	request per budget. Steps which failed or didn't run because an earlier step failed are run again by the next poll,
+	as their changes won't be fetched again. The read-only balances step only runs on changes.
+
+	:param split_budget: Split budget to watch
+	:param steps: Steps to run on changes, one of 'split', 'push', 'push_uncleared', 'delete_orphans' and 'balances'
+	:param interval: Seconds between polls
+	"""
+
+	def __init__(self, split_budget: YnabSplitBudget, steps: Iterable[str] = ('split', 'push'),
+				 interval: float = DEFAULT_INTERVAL):
+		self.split_budget = split_budget
+		self.steps = tuple(steps)
+		unknown = [s for s in self.steps if s not in STEPS]
+		if unknown:
+			raise ValueError(f'Unknown steps {unknown}, allowed are {list(STEPS)}')
+		self.interval = interval
+		self._pending: Set[str] = set()
+
+	def watch(self, stop: Optional[threading.Event] = None) -> None:
+		"""Polls until stop is set. Errors in a poll get logged and polling continues.
+
+		:param stop: optional event to stop watching
+		"""
+		stop = stop or threading.Event()
+		with self.split_budget.run():
+			while True:
+				try:
+					self.poll()
+				except Exception:
+					logging.getLogger(__name__).exception('poll failed')
+				if stop.wait(self.interval):
+					return
+
+	def poll(self) -> Dict[str, int]:
+		"""Fetches changes and runs the steps affected by them. Needs to be called within the run() context of the
+		split budget to only fetch changes, otherwise all transactions count as changed.
+
+		:return: number of transactions affected by each step which ran
+		"""
+		ysb = self.split_budget
+		user_changes, partner_changes = ysb.fetch_changes()
+		pending, self._pending = self._pending, set()
+		due = ['split'] if 'split' in self.steps and ('split' in pending or self._to_split(user_changes)) else []
+		due += self._due_steps(user_changes, partner_changes, pending)
+		results = dict()
+		try:
+			if 'split' in due:
+				results['split'] = len(ysb.split())
+				due.remove('split')
+				if results['split']:
+					new_user_changes, new_partner_changes = ysb.fetch_changes()
+					due = self._due_steps(user_changes + new_user_changes, partner_changes + new_partner_changes,
+										  set(due))
+			for step in list(due):
+				results[step] = STEP_CALLS[step](ysb, self.steps)
+				due.remove(step)
+		except Exception:
+			self._pending = set(due) - READ_ONLY_STEPS
+			raise
+		if results:
+			logging.getLogger(__name__).info(f'poll ran {results}')
+		return results
+
+	def _due_steps(self, user_changes: List[dict], partner_changes: List[dict], pending: Set[str]) -> List[str]:
+		"""Returns steps after split which need to run for the changes or are pending from a failed poll"""
+		ysb = self.split_budget
+		user_account = [t for t in user_changes if t['account_id'] == ysb.user.account_id]
+		partner_account = [t for t in partner_changes if t['account_id'] == ysb.partner.account_id]
+		changed = bool(user_account or partner_account)
+		due = []
+		if ('push' in self.steps or 'push_uncleared' in self.steps) and (changed or 'push' in pending):
+			due.append('push')
+		if 'delete_orphans' in self.steps and (partner_account or any(t['deleted'] for t in user_account)
+											   or 'delete_orphans' in pending):
+			due.append('delete_orphans')
+		if 'balances' in self.steps and changed:
+			due.append('balances')
+		return due
+
+	def _to_split(self, changes: List[dict]) -> bool:
+		"""Returns True if changes contain flagged transactions which might need to be split"""
+		user = self.split_budget.user
+		return any(not t['deleted']
+				   and t.get('flag_color') == user.flag_color
+				   and not t.get('subtransactions')
+				   and t['account_id'] != user.account_id
+				   and t.get('transfer_transaction_id') is None for t in changes)
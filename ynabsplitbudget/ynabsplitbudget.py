@@ -1,16 +1,24 @@
 import logging
+from contextlib import contextmanager
 from datetime import date
-from typing import List
+from pathlib import Path
+from typing import List, Optional, Iterator, Tuple, Callable
 
 from ynabtransactionadjuster import Credentials, Transaction, ModifiedTransaction
 
 from ynabsplitbudget.models.transaction import RootTransaction
+from ynabsplitbudget.accountcache import AccountCache
 from ynabsplitbudget.adjusters import SplitAdjuster
-from ynabsplitbudget.client import Client
-from ynabsplitbudget.models.exception import BalancesDontMatch
+from ynabsplitbudget.balanceledger import find_drift
+from ynabsplitbudget.clientpool import ClientPool
+from ynabsplitbudget.instrumentation import Instrumentation
+from ynabsplitbudget.models.drift import BalanceDrift
+from ynabsplitbudget.models.exception import BalancesDontMatch, OrphansNotDeleted
 from ynabsplitbudget.models.transaction import ComplementTransaction
 from ynabsplitbudget.models.user import User
+from ynabsplitbudget.sessions import SessionRegistry
 from ynabsplitbudget.syncrepository import SyncRepository
+from ynabsplitbudget.transactionstore import TransactionStore
 
 
 class YnabSplitBudget:
@@ -19,13 +27,44 @@ class YnabSplitBudget:
 	:ivar user: User to use for instance
 	:ivar partner: Partner to use for instance
 	:ivar since: date from which onwards to apply splitting
+	:ivar store: optional local store in which transactions and server knowledge are persisted between runs so that
+	only changed transactions get fetched from YNAB
+	:ivar clients: optional pool of clients shared with other instances, its store is used instead of cache_dir
+	:ivar accounts: cache of account metadata, persisted in the store if there is one
+	:ivar instrumentation: hooks to which requests and the phases of each call get reported, e.g.
+	:class:`ynabsplitbudget.instrumentation.Metrics`
 	:ivar logger: Logger of the instance
 	"""
-	def __init__(self, user: User, partner: User, since: date):
+	def __init__(self, user: User, partner: User, since: date, cache_dir: Optional[str] = None,
+				 clients: Optional[ClientPool] = None, instrumentation: Optional[Instrumentation] = None):
 		self.user = user
 		self.partner = partner
 		self.since = since
+		self.clients = clients
+		self.instrumentation = instrumentation or Instrumentation()
+		if clients:
+			self.store = clients.store
+		else:
+			self.store = TransactionStore(str(Path(cache_dir) / 'transactions.sqlite')) if cache_dir else None
+		self.accounts = AccountCache(store=self.store) if self.store else AccountCache.shared()
 		self.logger = self._set_up_logger()
+		self._repository: Optional[SyncRepository] = None
+
+	@contextmanager
+	def run(self) -> Iterator['YnabSplitBudget']:
+		"""Context in which all calls share the transactions fetched from YNAB, so that each transactions endpoint
+		gets requested at most once. Balances are still requested on each call. Without it each call fetches current
+		data on its own.
+
+		>>> with split_budget.run():
+		...     split_budget.push()
+		...     split_budget.delete_orphans()
+		"""
+		self._repository = self._create_repository()
+		try:
+			yield self
+		finally:
+			self._repository = None
 
 	def push(self, include_uncleared: bool = False, ) -> List[ComplementTransaction]:
 		"""Pushes transactions from user split account to partner split account.
@@ -33,10 +72,10 @@ class YnabSplitBudget:
 		:param include_uncleared: If set to True, will also consider uncleared transactions
 		:return: List of inserted transactions in partner split account
 		"""
-		repo = SyncRepository(user=self.user, partner=self.partner)
-		transactions = repo.fetch_roots_wo_complement(since=self.since, include_uncleared=include_uncleared)
-
-		complement_transactions = repo.insert_complements(transactions)
+		with self.instrumentation.phase('push'):
+			repo = self._get_repository()
+			transactions = repo.fetch_roots_wo_complement(since=self.since, include_uncleared=include_uncleared)
+			complement_transactions = repo.insert_complements(transactions)
 		logging.getLogger(__name__).info(f'inserted {len(complement_transactions)} complements into account of '
 										 f'{self.partner.name}')
 		return complement_transactions
@@ -47,7 +86,7 @@ class YnabSplitBudget:
 		:param include_uncleared: If set to True, will also consider uncleared transactions
 		:return: List of inserted transactions in partner split account
 		"""
-		repo = SyncRepository(user=self.user, partner=self.partner)
+		repo = self._get_repository()
 		transactions = repo.fetch_roots_wo_complement(since=self.since, include_uncleared=include_uncleared)
 
 		logging.getLogger(__name__).info(f'would insert {len(transactions)} complements into account of '
@@ -60,26 +99,50 @@ class YnabSplitBudget:
 
 		:return: list with split transactions
 		"""
-		creds = Credentials(token=self.user.token, budget=self.user.budget_id)
-		s = SplitAdjuster(creds, flag_color=self.user.flag_color,
-						  transfer_payee_id=self.user.fetch_account().transfer_payee_id,
-						  account_id=self.user.account_id, since=self.since)
-		mod_trans = s.apply()
-		updated_transactions = s.update(mod_trans)
+		with self.instrumentation.phase('split'):
+			s = self._create_split_adjuster()
+			with self.instrumentation.phase('split_apply'):
+				mod_trans = s.apply()
+			with self.instrumentation.phase('split_update'):
+				updated_transactions = s.update(mod_trans)
 		logging.getLogger(__name__).info(f'split {len(updated_transactions)} transactions for {self.user.name}')
 
 		return updated_transactions
 
+	def sync(self, include_uncleared: bool = False) -> Tuple[List[Transaction], List[ComplementTransaction]]:
+		"""Splits transactions and pushes the resulting and all other new transactions from user split account to
+		partner split account in one pass. The user budget gets fetched once for both and the transfers created by
+		splitting are pushed straight from the update response instead of fetching them again.
+
+		:param include_uncleared: If set to True, will also consider uncleared transactions. Transfers created by
+		splitting are always pushed, as only cleared transactions get split.
+		:return: split transactions and transactions inserted in partner split account
+		"""
+		with self.instrumentation.phase('sync'):
+			repo = self._get_repository()
+			s = self._create_split_adjuster(transaction_dicts=lambda: repo.fetch_user_transactions(self.since))
+			with self.instrumentation.phase('split_apply'):
+				mod_trans = s.apply()
+			with self.instrumentation.phase('split_update'):
+				updated_transactions = s.update(mod_trans)
+			try:
+				transactions = repo.fetch_roots_wo_complement(since=self.since, include_uncleared=include_uncleared,
+															  new_roots=s.build_roots(updated_transactions))
+				complement_transactions = repo.insert_complements(transactions)
+			finally:
+				# snapshot of the user budget predates the split
+				repo.expire_user()
+		logging.getLogger(__name__).info(f'split {len(updated_transactions)} transactions for {self.user.name} and '
+										 f'inserted {len(complement_transactions)} complements into account of '
+										 f'{self.partner.name}')
+		return updated_transactions, complement_transactions
+
 	def split_preview(self) -> List[ModifiedTransaction]:
 		"""Previews transactions to be split without updating the transactions in YNAB.
 
 		:return: list with modified transactions
 		"""
-
-		creds = Credentials(token=self.user.token, budget=self.user.budget_id)
-		s = SplitAdjuster(creds, flag_color=self.user.flag_color,
-						  transfer_payee_id=self.user.fetch_account().transfer_payee_id,
-						  account_id=self.user.account_id, since=self.since)
+		s = self._create_split_adjuster()
 		mod_trans = s.apply()
 		logging.getLogger(__name__).info(f'would split {len(mod_trans)} transactions for {self.user.name}')
 		return mod_trans
@@ -89,26 +152,72 @@ class YnabSplitBudget:
 
 		:raises BalancesDontMatch: if cleared amounts in both accounts don't match
 		"""
-		repo = SyncRepository(user=self.user, partner=self.partner)
-		user_balance, partner_balance = repo.fetch_balances()
+		with self.instrumentation.phase('raise_on_balances_off'):
+			user_balance, partner_balance = self._get_repository().fetch_balances()
 		if user_balance + partner_balance != 0:
 			raise BalancesDontMatch({'user': {'name': self.user.name,
 											  'balance': user_balance},
 									 'partner': {'name': self.partner.name,
 												 'balance': partner_balance}})
 
+	def find_balance_drift(self) -> Optional[BalanceDrift]:
+		"""Compares the running balances of both split accounts over their whole history and locates the first date
+		from which on they don't add up to zero any more, together with the transactions on that date which aren't
+		balanced by the other account. The whole history of both accounts gets fetched, with a ``cache_dir`` only the
+		transactions which changed since the last run. Within the :meth:`run` context further calls reuse the fetched
+		transactions.
+
+		:return: the drift, None if the running balances add up to zero on every date
+		"""
+		with self.instrumentation.phase('find_balance_drift'):
+			user_ledger, partner_ledger = self._get_repository().fetch_ledgers()
+			return find_drift(user_ledger, partner_ledger, user_account_id=self.user.account_id,
+							  partner_account_id=self.partner.account_id)
+
 	def delete_orphans(self) -> List[ComplementTransaction]:
-		"""Delete orphaned transactions in partner account.
+		"""Delete orphaned transactions in partner account. Deletion continues if single transactions can't be deleted.
 
+		:return: List of deleted transactions
+		:raises OrphansNotDeleted: if some of the orphaned transactions couldn't be deleted
 		"""
-		orphaned_complements = SyncRepository(user=self.user, partner=self.partner).find_orphaned_partner_complements(self.since)
-		c = Client(user_name=self.partner.name, budget_id=self.partner.budget_id, account_id=self.partner.account_id,
-				   token=self.partner.token)
-		[c.delete_complement(oc.id) for oc in orphaned_complements]
-		logging.getLogger(__name__).info(f'deleted {len(orphaned_complements)} orphaned complements in account of {self.partner.name}')
-		if orphaned_complements:
-			logging.getLogger(__name__).info(orphaned_complements)
-		return orphaned_complements
+		with self.instrumentation.phase('delete_orphans'):
+			repo = self._get_repository()
+			orphaned_complements = repo.find_orphaned_partner_complements(self.since)
+			errors = repo.delete_complements(orphaned_complements)
+		deleted = [oc for oc in orphaned_complements if errors[oc.id] is None]
+		logging.getLogger(__name__).info(f'deleted {len(deleted)} orphaned complements in account of '
+										 f'{self.partner.name}')
+		if deleted:
+			logging.getLogger(__name__).info(deleted)
+		failed = {oc.id: str(errors[oc.id]) for oc in orphaned_complements if errors[oc.id] is not None}
+		if failed:
+			raise OrphansNotDeleted({'deleted': deleted, 'failed': failed})
+		return deleted
+
+	def fetch_changes(self) -> Tuple[List[dict], List[dict]]:
+		"""Fetches transactions which changed in the budgets of user and partner since the last call within the
+		:meth:`run` context. Subsequent calls in the context work on the changed transactions.
+
+		:return: transaction dicts changed in user and in partner budget
+		"""
+		return self._get_repository().fetch_changes(since=self.since)
+
+	def _get_repository(self) -> SyncRepository:
+		if self._repository:
+			return self._repository
+		return self._create_repository()
+
+	def _create_repository(self) -> SyncRepository:
+		return SyncRepository(user=self.user, partner=self.partner, store=self.store, clients=self.clients,
+							  instrumentation=self.instrumentation)
+
+	def _create_split_adjuster(self, transaction_dicts: Optional[Callable[[], List[dict]]] = None) -> SplitAdjuster:
+		creds = Credentials(token=self.user.token, budget=self.user.budget_id)
+		return SplitAdjuster(creds, flag_color=self.user.flag_color,
+							 transfer_payee_id=self.user.fetch_account(cache=self.accounts).transfer_payee_id,
+							 account_id=self.user.account_id, since=self.since,
+							 session=self.instrumentation.instrument(SessionRegistry.for_token(self.user.token)),
+							 transaction_dicts=transaction_dicts)
 
 	@staticmethod
 	def _set_up_logger() -> logging.Logger: